@@ -0,0 +1,42 @@
+"""Stress test for backpatch lists: conditions of up to 50k relational terms joined by or, by and, and by
+alternating or/and go through code generation, whose time should grow linearly with the terms.  Run from
+the repository root with ``python -m benchmarks.boolean_chains``."""
+import time
+
+from src.code_generator import CodeGenerator
+from src.compiler import prepare_lexer, prepare_parser
+
+
+def boolean_chain(terms: int, operators) -> str:
+    condition = "(a < b)"
+    for i in range(1, terms):
+        condition += f" {operators[i % len(operators)]} (a < {i})"
+    return "\n".join([
+        "program chain",
+        "var a, b : integer;",
+        "begin",
+        f"\tif {condition} then a := 1 else a := 2;",
+        f"\twhile {condition} do a := a + 1",
+        "end",
+    ])
+
+
+def main():
+    pascal_lexer = prepare_lexer()
+    pascal_parser = prepare_parser(pascal_lexer, start="program")
+    print(f"{'operators':>9} {'terms':>6} {'quadruples':>10} {'codegen s':>9}")
+    for operators in [["or"], ["and"], ["or", "and"]]:
+        for terms in [12_500, 25_000, 50_000]:
+            pascal_lexer.reset()
+            pascal_parser.reset()
+            pascal_lexer.input(boolean_chain(terms, operators))
+            root = pascal_parser.parse()
+            begin = time.perf_counter()
+            quadruples = CodeGenerator(root).generate(False)
+            seconds = time.perf_counter() - begin
+            assert all(str(quadruple).find("goto None") < 0 for quadruple in quadruples)
+            print(f"{'/'.join(operators):>9} {terms:>6} {len(quadruples):>10} {seconds:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
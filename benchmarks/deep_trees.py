@@ -0,0 +1,39 @@
+"""Stress test for the traversals of very deep syntax trees: a left nested expression with 100k
+operands and deeply nested if/while bodies go through code generation and the DOT generator
+without reaching the recursion limit.  Run from the repository root with
+``python -m benchmarks.deep_trees``."""
+import io
+import time
+
+from benchmarks.programs import long_expression, nested_statements
+from src.code_generator import CodeGenerator
+from src.compiler import prepare_lexer, prepare_parser
+from src.pydot_generator import PyDotGenerator
+
+
+def compile_source(pascal_lexer, pascal_parser, source: str):
+    pascal_lexer.reset()
+    pascal_parser.reset()
+    pascal_lexer.input(source)
+    root = pascal_parser.parse()
+    begin = time.perf_counter()
+    quadruples = CodeGenerator(root).generate(False)
+    code_generation = time.perf_counter() - begin
+    begin = time.perf_counter()
+    PyDotGenerator("Syntax Tree", root).write_dot(io.StringIO())
+    dot_generation = time.perf_counter() - begin
+    return len(quadruples), code_generation, dot_generation
+
+
+def main():
+    pascal_lexer = prepare_lexer()
+    pascal_parser = prepare_parser(pascal_lexer, start="program")
+    print(f"{'input':>28} {'quadruples':>10} {'codegen s':>9} {'dot s':>9}")
+    for name, source in [("expression, 100000 operands", long_expression(100_000)),
+                         ("nesting depth 10000", nested_statements(10_000))]:
+        quadruples, code_generation, dot_generation = compile_source(pascal_lexer, pascal_parser, source)
+        print(f"{name:>28} {quadruples:>10} {code_generation:>9.3f} {dot_generation:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Measures code generation for programs with many procedures, whose activation record structs used to
+be inserted at the front of the quadruple list one by one: the time per procedure should stay flat as
+the procedure count grows. The garbage collector is paused while timing, as its passes over the growing
+heap would hide the trend.  Run from the repository root with ``python -m benchmarks.many_procedures``."""
+import gc
+import time
+
+from src.code_generator import CodeGenerator
+from src.compiler import prepare_lexer, prepare_parser
+
+
+def many_procedures(procedures: int) -> str:
+    lines = ["program many", "var a, b : integer;"]
+    for i in range(procedures):
+        lines.extend([
+            f"procedure p{i} (n : integer);",
+            "var i : integer;",
+            "begin",
+            "\ti := n;",
+            "\twhile i > 0 do i := i - 1",
+            "end;",
+        ])
+    lines.extend([
+        "begin",
+        ";\n".join(f"\tp{i}(a + b)" for i in range(procedures)),
+        "end",
+    ])
+    return "\n".join(lines)
+
+
+def main():
+    pascal_lexer = prepare_lexer()
+    pascal_parser = prepare_parser(pascal_lexer, start="program")
+    print(f"{'procedures':>10} {'quadruples':>10} {'codegen s':>9} {'us/procedure':>12}")
+    for procedures in [1_000, 4_000, 16_000]:
+        pascal_lexer.reset()
+        pascal_parser.reset()
+        pascal_lexer.input(many_procedures(procedures))
+        root = pascal_parser.parse()
+        gc.collect()
+        gc.disable()
+        begin = time.perf_counter()
+        quadruples = CodeGenerator(root).generate(False)
+        seconds = time.perf_counter() - begin
+        gc.enable()
+        print(f"{procedures:>10} {len(quadruples):>10} {seconds:>9.3f} {seconds / procedures * 1e6:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Reports the memory taken by the syntax tree of a program with about a million nodes, in bytes per
+node, for node objects and for the syntax arena.  Run from the repository root with
+``python -m benchmarks.node_memory``."""
+import sys
+import tracemalloc
+from collections import Counter
+
+from src.lexer import Token
+from src.symbol_table import DataType
+from src.syntax_arena import SyntaxArena, NodeKind
+from src.syntax_tree import Node, Program, Declarations, Procedures, CompoundStatement, AssignmentStatement, \
+    BinaryExpression, TerminalExpression, IfStatement, Declaration
+
+
+def build_tree(statements: int, tokens) -> Node:
+    # statements alternate between 'x := (a + 1) * b' and 'if a < b then x := a', built the way
+    # the parser actions build them; tokens are shared so only the nodes are measured
+    name, x, a, b, one, plus, times, less_than = tokens
+    compound_statement = None
+    for i in range(statements):
+        if i % 2 == 0:
+            statement = AssignmentStatement(x, BinaryExpression(
+                times,
+                BinaryExpression(plus, TerminalExpression(a), TerminalExpression(one)),
+                TerminalExpression(b)
+            ))
+        else:
+            statement = IfStatement(
+                BinaryExpression(less_than, TerminalExpression(a), TerminalExpression(b)),
+                AssignmentStatement(x, TerminalExpression(a))
+            )
+        if compound_statement is None:
+            compound_statement = CompoundStatement(statement)
+        else:
+            compound_statement.add_children(statement)
+    declaration = Declaration(x)
+    declaration.set_data_type(Token("INTEGER", "integer", None, 1))
+    return Program(name, Declarations(declaration), Procedures(), compound_statement)
+
+
+def build_arena(statements: int, tokens) -> SyntaxArena:
+    # the same program as build_tree
+    name, x, a, b, one, plus, times, less_than = tokens
+    arena = SyntaxArena()
+    add_node = arena.add_node
+    compound_statement = None
+    for i in range(statements):
+        if i % 2 == 0:
+            addition = add_node(NodeKind.BINARY_EXPRESSION, plus, (
+                add_node(NodeKind.TERMINAL_EXPRESSION, a), add_node(NodeKind.TERMINAL_EXPRESSION, one)))
+            multiplication = add_node(NodeKind.BINARY_EXPRESSION, times, (
+                addition, add_node(NodeKind.TERMINAL_EXPRESSION, b)))
+            statement = add_node(NodeKind.ASSIGNMENT, x, (multiplication,))
+        else:
+            condition = add_node(NodeKind.BINARY_EXPRESSION, less_than, (
+                add_node(NodeKind.TERMINAL_EXPRESSION, a), add_node(NodeKind.TERMINAL_EXPRESSION, b)))
+            body = add_node(NodeKind.ASSIGNMENT, x, (add_node(NodeKind.TERMINAL_EXPRESSION, a),))
+            statement = add_node(NodeKind.IF, children=(condition, body))
+        if compound_statement is None:
+            compound_statement = add_node(NodeKind.COMPOUND_STATEMENT, children=(statement,))
+        else:
+            arena.add_child(compound_statement, statement)
+    declaration = add_node(NodeKind.DECLARATION, children=(add_node(NodeKind.IDENTIFIER, x),),
+                           data_type=DataType.INTEGER)
+    arena.root = add_node(NodeKind.PROGRAM, name, (
+        add_node(NodeKind.DECLARATIONS, children=(declaration,)), add_node(NodeKind.PROCEDURES), compound_statement))
+    arena.last_child.clear()
+    return arena
+
+
+def walk(root: Node):
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(node.children)
+
+
+def main():
+    tokens = (
+        Token("ID", "million", None, 1), Token("ID", "x", None, 1), Token("ID", "a", None, 1),
+        Token("ID", "b", None, 1), Token("INTEGER_CONSTANT", "1", 1, 1), Token("PLUS", "+", None, 1),
+        Token("TIMES", "*", None, 1), Token("LESS_THAN", "<", None, 1),
+    )
+    tracemalloc.start()
+    root = build_tree(1_000_000 // 6, tokens)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    counts = Counter()
+    samples = {}
+    for node in walk(root):
+        counts[type(node).__name__] += 1
+        samples.setdefault(type(node).__name__, node)
+    nodes = sum(counts.values())
+    print(f"nodes: {nodes}, traced bytes: {size}, bytes per node: {size / nodes:.1f}")
+    print(f"{'class':>20} {'count':>8} {'object bytes':>12}")
+    for name, count in counts.most_common():
+        print(f"{name:>20} {count:>8} {sys.getsizeof(samples[name]):>12}")
+    del root
+    tracemalloc.start()
+    arena = build_arena(1_000_000 // 6, tokens)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"arena nodes: {len(arena)}, traced bytes: {size}, bytes per node: {size / len(arena):.1f}")
+
+
+if __name__ == "__main__":
+    main()
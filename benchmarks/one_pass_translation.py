@@ -0,0 +1,53 @@
+"""Compares the two-pass compilation (syntax tree, then code generation over it) with the one-pass
+syntax directed translation, by time and peak traced memory.  Run from the repository root with
+``python -m benchmarks.one_pass_translation``."""
+import time
+import tracemalloc
+
+from benchmarks.programs import synthetic_program
+from src.code_generator import CodeGenerator
+from src.compiler import prepare_lexer, prepare_parser, prepare_translator
+
+
+def two_pass(pascal_lexer, pascal_parser, source: str):
+    pascal_lexer.reset()
+    pascal_parser.reset()
+    pascal_lexer.input(source)
+    root = pascal_parser.parse()
+    return CodeGenerator(root).generate(False)
+
+
+def one_pass(pascal_lexer, pascal_translator, source: str):
+    pascal_lexer.reset()
+    pascal_translator.reset()
+    pascal_lexer.input(source)
+    return pascal_translator.parse()
+
+
+def measure(compile_function, pascal_lexer, pascal_parser, source: str):
+    begin = time.perf_counter()
+    quadruples = compile_function(pascal_lexer, pascal_parser, source)
+    seconds = time.perf_counter() - begin
+    del quadruples
+    tracemalloc.start()
+    quadruples = compile_function(pascal_lexer, pascal_parser, source)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(quadruples), seconds, peak
+
+
+def main():
+    pascal_lexer = prepare_lexer()
+    pascal_parser = prepare_parser(pascal_lexer, start="program")
+    pascal_translator = prepare_translator(pascal_lexer)
+    print(f"{'statements':>10} {'mode':>8} {'quadruples':>10} {'seconds':>9} {'peak MiB':>9}")
+    for statements in [1000, 10000, 50000]:
+        source = synthetic_program(statements)
+        for mode, compile_function, parser in [("two-pass", two_pass, pascal_parser),
+                                               ("one-pass", one_pass, pascal_translator)]:
+            quadruples, seconds, peak = measure(compile_function, pascal_lexer, parser, source)
+            print(f"{statements:>10} {mode:>8} {quadruples:>10} {seconds:>9.3f} {peak / 2 ** 20:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
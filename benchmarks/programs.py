@@ -0,0 +1,53 @@
+"""Synthetic Pascal sources for the benchmarks."""
+
+
+def synthetic_program(statements: int) -> str:
+    # a procedure and a main body of assignments, loops and conditionals over a few variables
+    body = []
+    for i in range(statements):
+        kind = i % 4
+        if kind == 0:
+            body.append(f"a := (a + {i}) * b - c div 3")
+        elif kind == 1:
+            body.append(f"while (a < {i}) and not (b > c) do a := a + 1")
+        elif kind == 2:
+            body.append(f"if (a = b) or (c <> {i}) then b := b + a else c := c - 1")
+        else:
+            body.append("s := s * 2.5 + a")
+    return "\n".join([
+        "program synthetic",
+        "var a, b, c : integer; s : real;",
+        "procedure step (n : integer);",
+        "var i : integer;",
+        "begin",
+        "\ti := n;",
+        "\twhile i > 0 do i := i - 1",
+        "end;",
+        "begin",
+        ";\n".join(f"\t{statement}" for statement in body) + ";",
+        "\tstep(a)",
+        "end",
+    ])
+
+
+def long_expression(operands: int) -> str:
+    # a left nested expression, as deep as it has operands
+    return "\n".join([
+        "program long",
+        "var a, b : integer;",
+        "begin",
+        "\ta := " + " + ".join("a" if i % 2 else "b" for i in range(operands)),
+        "end",
+    ])
+
+
+def nested_statements(depth: int) -> str:
+    # alternating if and while statements, each the body of the previous one
+    heads = ["if a < b then " if i % 2 else "while a < b do " for i in range(depth)]
+    return "\n".join([
+        "program nested",
+        "var a, b : integer;",
+        "begin",
+        "\t" + "".join(heads) + "a := a + 1",
+        "end",
+    ])
@@ -0,0 +1,55 @@
+"""Measures identifier resolution from the innermost of deeply nested procedure scopes, with most
+references resolving to names declared at the outer levels, against walking the parent chain on
+every reference.  Run from the repository root with ``python -m benchmarks.scope_lookup``."""
+import random
+import time
+
+from src.lexer import Token
+from src.symbol_table import SymbolTable, DataType, EntryType
+
+
+def nested_scopes(depth: int, names_per_scope: int) -> SymbolTable:
+    symbol_table = SymbolTable(Token("ID", "nested", None, 0))
+    for level in range(depth):
+        for name in range(names_per_scope):
+            symbol_table.insert_entry(Token("ID", f"v{level}_{name}", None, 0), DataType.INTEGER,
+                                      EntryType.DECLARATION)
+        symbol_table, _ = symbol_table.insert_procedure(Token("ID", f"p{level}", None, 0))
+    return symbol_table
+
+
+def walk_parent_chain(symbol_table: SymbolTable, identifier: Token):
+    lexeme = identifier.lexeme
+    current = symbol_table
+    while current is not None:
+        if lexeme in current.entries:
+            return current.entries[lexeme]
+        current = current.parent
+    return None
+
+
+def main():
+    random.seed(0)
+    names_per_scope = 8
+    references = 200_000
+    print(f"{'depth':>6} {'walk s':>8} {'lookup s':>8} {'speedup':>8}")
+    for depth in [2, 8, 32, 128]:
+        innermost = nested_scopes(depth, names_per_scope)
+        # references favour the outer levels, as globals are referenced from everywhere
+        identifiers = [Token("ID", f"v{int(random.triangular(0, depth, 0))}_{random.randrange(names_per_scope)}",
+                             None, 0) for _ in range(references)]
+        begin = time.perf_counter()
+        for identifier in identifiers:
+            walk_parent_chain(innermost, identifier)
+        walk_seconds = time.perf_counter() - begin
+        begin = time.perf_counter()
+        for identifier in identifiers:
+            innermost.lookup_entries(identifier)
+        lookup_seconds = time.perf_counter() - begin
+        assert all(innermost.lookup_entries(identifier) is walk_parent_chain(innermost, identifier)
+                   for identifier in identifiers)
+        print(f"{depth:>6} {walk_seconds:>8.3f} {lookup_seconds:>8.3f} {walk_seconds / lookup_seconds:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Compares the peak traced memory and the time of code generation and emission of a large program when
+the whole quadruple list is written at the end and when finalized quadruples are streamed to the output
+in chunks; both write the same C.  Run from the repository root with
+``python -m benchmarks.streaming_emission``."""
+import filecmp
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.programs import synthetic_program
+from src.code_generator import CodeGenerator
+from src.compiler import prepare_lexer, prepare_parser
+
+
+def generate_and_write(root, path: str, stream_code: bool):
+    tracemalloc.start()
+    begin = time.perf_counter()
+    code_generator = CodeGenerator(root, stream_code=stream_code)
+    code_generator.generate(False)
+    with open(path, "w") as f:
+        code_generator.write_code(f)
+    seconds = time.perf_counter() - begin
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak
+
+
+def main():
+    pascal_lexer = prepare_lexer()
+    pascal_parser = prepare_parser(pascal_lexer, start="program")
+    print(f"{'statements':>10} {'whole MB':>8} {'whole s':>7} {'stream MB':>9} {'stream s':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for statements in [20_000, 80_000]:
+            pascal_lexer.reset()
+            pascal_parser.reset()
+            pascal_lexer.input(synthetic_program(statements))
+            # a tree per mode, as code generation annotates the nodes
+            whole_root = pascal_parser.parse()
+            pascal_lexer.reset()
+            pascal_parser.reset()
+            pascal_lexer.input(synthetic_program(statements))
+            stream_root = pascal_parser.parse()
+            whole_path = os.path.join(directory, "whole.c")
+            stream_path = os.path.join(directory, "stream.c")
+            whole_seconds, whole_peak = generate_and_write(whole_root, whole_path, False)
+            del whole_root
+            stream_seconds, stream_peak = generate_and_write(stream_root, stream_path, True)
+            assert filecmp.cmp(whole_path, stream_path, shallow=False)
+            print(f"{statements:>10} {whole_peak / 2 ** 20:>8.1f} {whole_seconds:>7.2f} "
+                  f"{stream_peak / 2 ** 20:>9.1f} {stream_seconds:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Measures writing the symbol table of deeply nested procedure scopes, against stringifying every
+procedure and re-indenting its lines once per enclosing scope, and the size and load time of the binary
+form.  Run from the repository root with ``python -m benchmarks.symbol_table_dump``."""
+import io
+import sys
+import time
+
+from src.lexer import Token
+from src.symbol_table import SymbolTable, DataType, EntryType
+from src.symbol_table_file import SymbolTableWriter, SymbolTableReader
+
+
+def nested_scopes(depth: int, names_per_scope: int) -> SymbolTable:
+    root = symbol_table = SymbolTable(Token("ID", "nested", None, 0))
+    for level in range(depth):
+        for name in range(names_per_scope):
+            symbol_table.insert_entry(Token("ID", f"v{level}_{name}", None, 0), DataType.INTEGER,
+                                      EntryType.DECLARATION)
+        symbol_table, _ = symbol_table.insert_procedure(Token("ID", f"p{level}", None, 0))
+    return root
+
+
+def reindented(symbol_table: SymbolTable) -> str:
+    lines = list(symbol_table.scope_lines(""))
+    for lexeme, procedure in symbol_table.procedures.items():
+        lines.append(f"\tprocedure: {lexeme} -> ")
+        lines.extend(f"\t\t{line}" for line in reindented(procedure).splitlines())
+    return "\n".join(lines)
+
+
+def main():
+    names_per_scope = 8
+    print(f"{'depth':>6} {'re-indent s':>11} {'write s':>8} {'text KB':>8} {'binary KB':>9} {'load s':>7}")
+    for depth in [50, 200, 800]:
+        root = nested_scopes(depth, names_per_scope)
+        begin = time.perf_counter()
+        text = reindented(root)
+        reindent_seconds = time.perf_counter() - begin
+        begin = time.perf_counter()
+        buffer = io.StringIO()
+        root.write(buffer)
+        write_seconds = time.perf_counter() - begin
+        assert buffer.getvalue() == text
+        data = SymbolTableWriter().dumps(root)
+        begin = time.perf_counter()
+        loaded = SymbolTableReader(data).loads()
+        load_seconds = time.perf_counter() - begin
+        assert str(loaded) == text
+        print(f"{depth:>6} {reindent_seconds:>11.3f} {write_seconds:>8.3f} {len(text) / 1024:>8.0f} "
+              f"{len(data) / 1024:>9.0f} {load_seconds:>7.3f}")
+
+
+if __name__ == "__main__":
+    sys.setrecursionlimit(10_000)  # for the recursive baseline
+    main()
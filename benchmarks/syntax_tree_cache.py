@@ -0,0 +1,40 @@
+"""Compares parsing a program with loading its syntax tree from the binary cache, by time and by
+the size of the cache file against the size of the source.  Run from the repository root with
+``python -m benchmarks.syntax_tree_cache``."""
+import tempfile
+import time
+
+from benchmarks.programs import synthetic_program
+from src.compiler import prepare_lexer, prepare_parser, parse_result
+from src.syntax_tree_cache import SyntaxTreeCache
+
+
+def main():
+    pascal_lexer = prepare_lexer()
+    pascal_parser = prepare_parser(pascal_lexer, start="program")
+    print(f"{'statements':>10} {'parse s':>8} {'store s':>8} {'load s':>8} {'source KiB':>10} {'cache KiB':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        cache = SyntaxTreeCache(directory)
+        for statements in [1000, 10000, 20000]:
+            source = synthetic_program(statements)
+            key = cache.key(source, pascal_parser.grammar_signature())
+            begin = time.perf_counter()
+            pascal_lexer.reset()
+            pascal_parser.reset()
+            pascal_lexer.input(source)
+            result = parse_result(pascal_lexer, pascal_parser, pascal_parser.parse())
+            parse_seconds = time.perf_counter() - begin
+            begin = time.perf_counter()
+            cache.store(key, result)
+            store_seconds = time.perf_counter() - begin
+            begin = time.perf_counter()
+            cache.load(key)
+            load_seconds = time.perf_counter() - begin
+            with open(cache.path(key), "rb") as f:
+                cache_size = len(f.read())
+            print(f"{statements:>10} {parse_seconds:>8.3f} {store_seconds:>8.3f} {load_seconds:>8.3f} "
+                  f"{len(source.encode()) / 1024:>10.0f} {cache_size / 1024:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
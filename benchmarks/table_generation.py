@@ -0,0 +1,61 @@
+"""Times LALR table generation for the Pascal grammar and for synthetically enlarged
+copies of it.  Run from the repository root with ``python -m benchmarks.table_generation``."""
+import sys
+import time
+
+from src.lexer import PascalLexer
+from src.parser import PascalParser
+from src.ply.yacc import Grammar, LRTable, ParserReflect, PlyLogger
+
+
+def pascal_grammar_specification():
+    pascal_parser = PascalParser()
+    pdict = {name: getattr(pascal_parser, name) for name in dir(pascal_parser)}
+    pdict["tokens"] = PascalLexer.tokens
+    pdict["start"] = "program"
+    reflect = ParserReflect(pdict, log=PlyLogger(sys.stderr))
+    reflect.get_all()
+    reflect.validate_all()
+    return reflect.tokens, reflect.preclist, reflect.grammar
+
+
+def build_grammar(copies: int) -> Grammar:
+    # copy i renames every nonterminal X to X_i, and a new start symbol selects one copy
+    tokens, preclist, rules = pascal_grammar_specification()
+    nonterminals = {prodname for _, (_, _, prodname, _) in rules}
+    selectors = [f"COPY_{i}" for i in range(1, copies)]
+    grammar = Grammar(list(tokens) + selectors)
+    for term, assoc, level in preclist:
+        grammar.set_precedence(term, assoc, level)
+    grammar.add_production("start", ["program"])
+    for i, selector in enumerate(selectors, start=1):
+        grammar.add_production("start", [selector, f"program_{i}"])
+    for i in range(copies):
+        def rename(symbol):
+            return f"{symbol}_{i}" if i and symbol in nonterminals else symbol
+        for _, (_, _, prodname, syms) in rules:
+            grammar.add_production(rename(prodname), [rename(symbol) for symbol in syms])
+    grammar.set_start("start")
+    return grammar
+
+
+def time_table_generation(copies: int, repeat: int):
+    best = None
+    for _ in range(repeat):
+        grammar = build_grammar(copies)
+        begin = time.perf_counter()
+        table = LRTable(grammar)
+        elapsed = time.perf_counter() - begin
+        best = elapsed if best is None else min(best, elapsed)
+    return len(grammar.Productions), len(table.lr_action), best
+
+
+def main():
+    print(f"{'copies':>6} {'productions':>11} {'states':>6} {'seconds':>9}")
+    for copies, repeat in [(1, 5), (4, 3), (16, 1), (32, 1)]:
+        productions, states, seconds = time_table_generation(copies, repeat)
+        print(f"{copies:>6} {productions:>11} {states:>6} {seconds:>9.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,12 @@
 import sys
-from src.compiler import compile_
+from src.compiler import compile_many
 
 
-compile_(sys.argv[1], "./tests/out")
+input_file_paths = sys.argv[1:]
+results = compile_many(input_file_paths, "./tests/out")
+failed = False
+for input_file_path, result in zip(input_file_paths, results):
+    if result.error is not None:
+        print(f"{input_file_path}: {result.error}", file=sys.stderr)
+        failed = True
+sys.exit(1 if failed else 0)
@@ -0,0 +1,76 @@
+from typing import List
+
+from src.symbol_table import SymbolTable, EntryType, Entry, align
+
+
+# The layout of the activation record struct of a procedure, with the offsets the C compiler gives its
+# members: every member aligned to its size, a nested struct to its widest member, and the record padded
+# to a multiple of its widest member. The links come first, as every call and return touches them. The
+# parameters, the temporaries of each data type and the locals follow, the groups with the most accesses
+# per byte first, and within the parameters and the locals the most accessed fields come first, the wider
+# first among equally accessed ones, so fields of a size stay together and padding only falls between sizes.
+# The accesses are counted by the code generator, see CodeGenerator.emit.
+
+POINTER_WIDTH = 8  # the control link and the return address, on the 64 bit targets we compile for
+CACHE_LINE = 64
+
+
+class Group:
+    # a member of the record after the links: a nested struct or an array of temporaries
+    def __init__(self, name: str, entries: List[Entry], size: int, alignment: int, array: bool = False):
+        self.name = name
+        self.array = array
+        self.entries = entries
+        self.size = size
+        self.alignment = alignment
+        self.accesses = sum(entry.accesses for entry in entries)
+
+
+def struct_group(name: str, entries: List[Entry]) -> Group:
+    # orders the fields, the sort is stable so declaration order breaks ties, and sets their offsets
+    # relative to the struct
+    fields = sorted(entries, key=lambda entry: (-entry.accesses, -entry.width))
+    offset = 0
+    alignment = 1
+    for entry in fields:
+        offset = align(offset, entry.width)
+        entry.offset = offset
+        offset += entry.width
+        alignment = max(alignment, entry.width)
+    return Group(name, fields, align(offset, alignment), alignment)
+
+
+def array_group(name: str, pool: List[Entry]) -> Group:
+    width = pool[0].width
+    for slot, entry in enumerate(pool):
+        entry.offset = slot * width
+    return Group(name, pool, len(pool) * width, width, array=True)
+
+
+class ActivationRecordLayout:
+    def __init__(self, procedure: SymbolTable):
+        self.parameters = struct_group("parameters", procedure.parameters or [])
+        self.locals = struct_group("locals", [entry for entry in procedure.entries.values()
+                                              if entry.entry_type == EntryType.DECLARATION])
+        groups = [self.parameters, self.locals]
+        groups.extend(array_group(f"temporary_{data_type.name}", pool)
+                      for data_type, pool in procedure.temporaries.items() if pool)
+        groups.sort(key=lambda group: (-group.accesses / max(group.size, 1), -group.alignment))
+        self.groups: List[Group] = groups
+        offset = 2 * POINTER_WIDTH
+        for group in groups:
+            offset = align(offset, group.alignment)
+            for entry in group.entries:
+                entry.offset += offset
+            offset += group.size
+        self.size = align(offset, POINTER_WIDTH)
+        self.cache_lines = -(-self.size // CACHE_LINE)
+
+
+def lay_out_activation_records(symbol_table: SymbolTable):
+    # lays out the records of all procedures in the scope, once all accesses to their entries are counted
+    stack = list(symbol_table.procedures.values())
+    while stack:
+        procedure = stack.pop()
+        procedure.activation_record = ActivationRecordLayout(procedure)
+        stack.extend(procedure.procedures.values())
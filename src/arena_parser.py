@@ -0,0 +1,92 @@
+from src.lexer import Token
+from src.parser import PascalParser
+from src.symbol_table import DataType
+from src.syntax_arena import SyntaxArena, NodeKind, NONE
+from src.syntax_tree import Declaration
+
+
+class PascalArenaParser(PascalParser):
+    # Builds the syntax tree into a SyntaxArena: the grammar and its reductions are those of PascalParser,
+    # whose node factories are overridden to add arena nodes and pass node indexes instead of node objects.
+
+    def __init__(self):
+        super().__init__()
+        self.arena = SyntaxArena()
+
+    def make_program(self, name: Token, declarations: int, procedures: int, compound_statement: int) -> int:
+        return self.arena.add_node(NodeKind.PROGRAM, name, (declarations, procedures, compound_statement))
+
+    def make_declarations(self, first_declaration: int = None) -> int:
+        children = () if first_declaration is None else (first_declaration,)
+        return self.arena.add_node(NodeKind.DECLARATIONS, children=children)
+
+    def make_declaration(self, first_identifier: Token) -> int:
+        identifier = self.arena.add_node(NodeKind.IDENTIFIER, first_identifier)
+        return self.arena.add_node(NodeKind.DECLARATION, children=(identifier,), data_type=DataType.INTEGER)
+
+    def add_identifier(self, declaration: int, identifier: Token):
+        self.arena.add_child(declaration, self.arena.add_node(NodeKind.IDENTIFIER, identifier))
+
+    def set_data_type(self, declaration: int, data_type: Token):
+        self.arena.set_data_type(declaration, Declaration.to_data_type(data_type))
+
+    def make_procedures(self, first_procedure: int = None) -> int:
+        children = () if first_procedure is None else (first_procedure,)
+        return self.arena.add_node(NodeKind.PROCEDURES, children=children)
+
+    def make_procedure(self, name: Token, parameters: int, declarations: int, compound_statement: int) -> int:
+        return self.arena.add_node(NodeKind.PROCEDURE, name, (parameters, declarations, compound_statement))
+
+    def make_parameters(self, declarations: int) -> int:
+        return self.arena.add_node(NodeKind.PARAMETERS, children=(declarations,))
+
+    def make_compound_statement(self, first_statement: int) -> int:
+        return self.arena.add_node(NodeKind.COMPOUND_STATEMENT, children=(first_statement,))
+
+    def make_print(self, expression: int) -> int:
+        return self.arena.add_node(NodeKind.PRINT, children=(expression,))
+
+    def make_assignment(self, lvalue: Token, rvalue: int) -> int:
+        return self.arena.add_node(NodeKind.ASSIGNMENT, lvalue, (rvalue,))
+
+    def make_while(self, condition: int, body: int) -> int:
+        return self.arena.add_node(NodeKind.WHILE, children=(condition, body))
+
+    def make_procedure_call(self, procedure_name: Token, arguments: int) -> int:
+        return self.arena.add_node(NodeKind.PROCEDURE_CALL, procedure_name, (arguments,))
+
+    def make_if(self, condition: int, body: int) -> int:
+        return self.arena.add_node(NodeKind.IF, children=(condition, body))
+
+    def make_if_else(self, condition: int, then_body: int, else_body: int) -> int:
+        return self.arena.add_node(NodeKind.IF_ELSE, children=(condition, then_body, else_body))
+
+    def make_error(self, token: Token) -> int:
+        return self.arena.add_node(NodeKind.ERROR, token)
+
+    def make_arguments(self, first_expression: int = None) -> int:
+        children = () if first_expression is None else (first_expression,)
+        return self.arena.add_node(NodeKind.ARGUMENTS, children=children)
+
+    def make_binary(self, binary_operator: Token, left_operand: int, right_operand: int) -> int:
+        return self.arena.add_node(NodeKind.BINARY_EXPRESSION, binary_operator, (left_operand, right_operand))
+
+    def make_unary(self, unary_operator: Token, operand: int) -> int:
+        return self.arena.add_node(NodeKind.UNARY_EXPRESSION, unary_operator, (operand,))
+
+    def make_terminal(self, terminal: Token) -> int:
+        return self.arena.add_node(NodeKind.TERMINAL_EXPRESSION, terminal)
+
+    def append(self, node: int, child: int):
+        self.arena.add_child(node, child)
+
+    def reset(self):
+        super().reset()
+        self.arena = SyntaxArena()
+
+    def parse(self, **kwargs) -> SyntaxArena:
+        root = super().parse(**kwargs)
+        self.arena.root = NONE if root is None else root
+        # the list tails are only needed while the lists grow
+        self.arena.last_child.clear()
+        return self.arena
@@ -1,37 +1,74 @@
-from typing import List
+from itertools import chain
+from typing import Dict, List, TextIO, Union
 from src.lexer import Token
 from src.ply.code_generator_base import CodeGeneratorBase
 from src.symbol_table import SymbolTable, DataType, EntryType, Entry
+from src.syntax_arena import SyntaxArena
 from src.syntax_tree import Node, Program
-from src.three_address_code import ThreeAddressCode, Label
+from src.activation_record_layout import lay_out_activation_records
+from src.code_stream import CodeStream
+from src.cross_reference import CrossReference
+from src.three_address_code import ThreeAddressCode, Label, Segment, JumpList
+
+LOOP_WEIGHT = 8
+MAX_LOOP_DEPTH = 6  # deeper loops weigh as much, one is as hot as the other for all we know
 
 
 class CodeGenerator(CodeGeneratorBase):
-    def __init__(self, syntax_tree_root: Node):
+    def __init__(self, syntax_tree_root: Union[Node, SyntaxArena], static_constants=False, stream_code=False):
+        # either a syntax tree or a syntax arena, both are visited the same way
         self.syntax_tree_root = syntax_tree_root
         if isinstance(syntax_tree_root, Program):
             self._symbol_table = SymbolTable(syntax_tree_root.name)
+        elif isinstance(syntax_tree_root, SyntaxArena) and syntax_tree_root.program_name():
+            self._symbol_table = SymbolTable(syntax_tree_root.program_name())
         else:
             self._symbol_table = SymbolTable(Token("ID", "DEFAULT", None, 0))
-        self.quadruples: List[ThreeAddressCode] = []
+        self.static_constants = static_constants
+        self._symbol_table.constants.static_reals = static_constants
+        # the quadruples are kept in segments, so code emitted out of order is appended to its segment
+        # rather than inserted, and they are only concatenated when asked for
+        self.segments: Dict[Segment, List[ThreeAddressCode]] = {segment: [] for segment in Segment}
+        self.segment: List[ThreeAddressCode] = self.segments[Segment.MAIN]
+        self.segment_name = Segment.MAIN
+        # when streaming, the current segment is flushed once it reaches flush_at quadruples
+        self.code_stream = CodeStream() if stream_code else None
+        self.flush_at = self.code_stream.chunk_size if stream_code else None
         self.next_available_label = 0
         self.logs = []
+        self.semantic_analysis_relaxed = False
+        # an access in a loop is estimated to run LOOP_WEIGHT times for every loop around it
+        self.loop_depth = 0
+        self.access_weight = 1
+        # definitions and uses of names, recorded as they are resolved
+        self.cross_reference = CrossReference()
 
     def newlabel(self):
         self.next_available_label += 1
         return self.next_available_label
 
-    def backpatch(self, quadruples: List[ThreeAddressCode], label: Label):
+    def backpatch(self, quadruples: JumpList, label: Label):
         for quadruple in quadruples:
             quadruple.address3 = label  # fill goto for conditional and unconditional jumps
             # 'quadruple - 1' is for transforming to zero based
 
-    def insert_quadruple(self, index: int, tac: ThreeAddressCode):
-        self.quadruples.insert(index, tac)
+    def emit_to(self, segment: Segment, tac: ThreeAddressCode) -> ThreeAddressCode:
+        self.segments[segment].append(tac)
+        return tac
+
+    def switch_segment(self, segment: Segment):
+        self.segment = self.segments[segment]
+        self.segment_name = segment
+        if self.code_stream is not None:
+            self.flush_at = len(self.segment) + self.code_stream.chunk_size
+
+    @property
+    def quadruples(self) -> List[ThreeAddressCode]:
+        return list(chain.from_iterable(self.segments.values()))
 
     @property
     def nextquad(self):
-        return len(self.quadruples) + 1  # not zero based
+        return sum(map(len, self.segments.values())) + 1  # not zero based
 
     def log(self, log):
         self.logs.append(log)
@@ -40,33 +77,45 @@ class CodeGenerator(CodeGeneratorBase):
             raise log
 
     def emit(self, tac: ThreeAddressCode) -> ThreeAddressCode:
-        self.quadruples.append(tac)
+        self.segment.append(tac)
+        # counted for the layout of activation records
+        weight = self.access_weight
+        for address in (tac.address1, tac.address2, tac.address3):
+            if type(address) is Entry:
+                address.accesses += weight
+        if self.flush_at is not None and len(self.segment) >= self.flush_at:
+            self.flush_at = self.code_stream.flush(self.segment_name, self.segment)
         return tac
 
+    def enter_loop(self):
+        self.loop_depth += 1
+        self.access_weight = LOOP_WEIGHT ** min(self.loop_depth, MAX_LOOP_DEPTH)
+
+    def leave_loop(self):
+        self.loop_depth -= 1
+        self.access_weight = LOOP_WEIGHT ** min(self.loop_depth, MAX_LOOP_DEPTH)
+
+    def lay_out_activation_records(self):
+        lay_out_activation_records(self._symbol_table)
+
     def newtemp(self, data_type: DataType) -> Entry:
-        # Could we implement this method in symbol table?
-        self._symbol_table.next_available_temporary[data_type] += 1
-        maximum = self._symbol_table.max_count_of_temporary[data_type]
-        current = self._symbol_table.next_available_temporary[data_type]
-        if current > maximum:
-            self._symbol_table.max_count_of_temporary[data_type] = current
-            entry = self.insert_entry(
-                Token("ID", f"temporary_{data_type.name}_{current}", current, 0),
-                data_type,
-                EntryType.TEMPORARY
-            )
-        else:
-            entry = self.lookup_entries(Token("ID", f"temporary_{data_type.name}_{current}", current, 0))
-        return entry
+        return self._symbol_table.allocate_temporary(data_type)
 
     def freetemp(self, data_type: DataType):
-        self._symbol_table.next_available_temporary[data_type] -= 1
+        self._symbol_table.free_temporary(data_type)
 
     def generate(self, semantic_analysis_relaxed: bool):
+        # when streaming, only the quadruples which are not flushed yet
         self.semantic_analysis_relaxed = semantic_analysis_relaxed
         self.syntax_tree_root.visit(self)
         return self.quadruples
 
+    def write_code(self, file: TextIO):
+        if self.code_stream is not None:
+            self.code_stream.write(file, self.segments)
+        else:
+            file.writelines(f"{quadruple}\n" for quadruple in self.quadruples)
+
     @property
     def symbol_table(self) -> SymbolTable:
         return self._symbol_table
@@ -78,26 +127,29 @@ class CodeGenerator(CodeGeneratorBase):
         entry, warning = self._symbol_table.insert_entry(identifier, data_type, entry_type)
         if warning:
             self.log(warning)
+        if entry_type != EntryType.CONSTANT:
+            self.cross_reference.define(entry)
         return entry
 
     def insert_procedure(self, identifier: Token):
         entry, warning = self._symbol_table.insert_procedure(identifier)
         if warning:
             self.log(warning)
+        self.cross_reference.define(entry)
         return entry
 
     def lookup_entries(self, identifier: Token):
-        if self.semantic_analysis_relaxed:
-            entry = self._symbol_table.lookup_entries(identifier)
-            if not entry:
-                entry, _ = self._symbol_table.insert_entry(identifier, DataType.REAL, EntryType.DECLARATION)
-            return entry
-        return self._symbol_table.lookup_entries(identifier)
+        entry = self._symbol_table.lookup_entries(identifier)
+        if not entry and self.semantic_analysis_relaxed:
+            entry, _ = self._symbol_table.insert_entry(identifier, DataType.REAL, EntryType.DECLARATION)
+        if entry:
+            self.cross_reference.use(entry, identifier)
+        return entry
 
     def lookup_procedures(self, identifier: Token):
-        if self.semantic_analysis_relaxed:
-            procedure = self._symbol_table.lookup_procedure(identifier)
-            if not procedure:
-                procedure, _ = self._symbol_table.insert_procedure(identifier)
-            return procedure
-        return self._symbol_table.lookup_procedure(identifier)
+        procedure = self._symbol_table.lookup_procedure(identifier)
+        if not procedure and self.semantic_analysis_relaxed:
+            procedure, _ = self._symbol_table.insert_procedure(identifier)
+        if procedure:
+            self.cross_reference.call(procedure, identifier, self._symbol_table)
+        return procedure
@@ -0,0 +1,59 @@
+import shutil
+import tempfile
+from typing import Dict, List, TextIO
+
+from src.three_address_code import ThreeAddressCode, ConditionalJump, UnconditionalJump, Call, Segment
+
+
+# Writes the generated C while it is generated, so the quadruples and their text are not all held at
+# once. The segments emitted in program order (globals, procedure bodies and the main body) are flushed
+# in chunks to section files, each up to its first jump which is not backpatched yet, as a jump is only
+# final once it is, or up to its first call of a procedure still being generated, as a call clears as
+# many temporaries as the procedure ends up with. The other segments are only complete at the end of
+# code generation, when they are written with the sections in their places.
+
+STREAMED = (Segment.GLOBALS, Segment.PROCEDURES, Segment.MAIN)
+CHUNK_SIZE = 4096  # quadruples
+
+
+def finalized(quadruples: List[ThreeAddressCode]) -> int:
+    # the count of quadruples before the first pending jump or call
+    for index, quadruple in enumerate(quadruples):
+        if isinstance(quadruple, (ConditionalJump, UnconditionalJump)) and quadruple.address3 is None:
+            return index
+        if isinstance(quadruple, Call) and not quadruple.address1.generated:
+            return index
+    return len(quadruples)
+
+
+class CodeStream:
+    def __init__(self, chunk_size: int = CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.sections: Dict[Segment, TextIO] = {segment: tempfile.TemporaryFile("w+") for segment in STREAMED}
+
+    def flush(self, segment: Segment, quadruples: List[ThreeAddressCode]) -> int:
+        # writes the finalized quadruples and drops them from the segment, and returns the segment length
+        # for the next flush: while a pending jump holds the segment back, the length doubles, so the
+        # quadruples behind it are not scanned again for every chunk
+        count = finalized(quadruples)
+        self.sections[segment].writelines(f"{quadruple}\n" for quadruple in quadruples[:count])
+        del quadruples[:count]
+        return len(quadruples) + max(len(quadruples), self.chunk_size)
+
+    def write(self, file: TextIO, segments: Dict[Segment, List[ThreeAddressCode]]):
+        try:
+            for segment, quadruples in segments.items():
+                section = self.sections.get(segment)
+                if section is None:
+                    file.writelines(f"{quadruple}\n" for quadruple in quadruples)
+                    continue
+                section.writelines(f"{quadruple}\n" for quadruple in quadruples)
+                quadruples.clear()
+                section.seek(0)
+                shutil.copyfileobj(section, file)
+        finally:
+            self.close()
+
+    def close(self):
+        for section in self.sections.values():
+            section.close()
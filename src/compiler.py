@@ -1,8 +1,46 @@
+import os
+from concurrent.futures import Future
+from contextlib import nullcontext
+from typing import List, Iterable, Union
+
 from src import utils
 from src.lexer import PascalLexer
-from src.parser import PascalParser
-from src.pydot_generator import PyDotGenerator
+from src.parser import PascalParser, ParseResult
+from src.arena_parser import PascalArenaParser
+from src.memory_report import MemoryReport
+from src.ndjson_generator import NdjsonGenerator
+from src.pydot_generator import PyDotGenerator, SvgRenderer, DrawingLimits
 from src.code_generator import CodeGenerator
+from src.cross_reference import CrossReference
+from src.errors import SemanticError
+from src.symbol_table import SymbolTable
+from src.symbol_table_file import write_symbol_table_file
+from src.syntax_arena import SyntaxArena
+from src.syntax_tree import Node, Program
+from src.syntax_tree_cache import SyntaxTreeCache
+from src.three_address_code import ThreeAddressCode
+from src.translator import PascalTranslator
+
+
+class CompilationResult:
+    def __init__(self,
+                 output_file_path: str,
+                 syntax_tree_root: Union[Node, SyntaxArena],
+                 quadruples: List[ThreeAddressCode] = None,
+                 symbol_table: SymbolTable = None,
+                 cross_reference: CrossReference = None):
+        self.output_file_path = output_file_path
+        self.syntax_tree_root = syntax_tree_root
+        self.quadruples = quadruples
+        self.symbol_table = symbol_table
+        self.cross_reference = cross_reference
+        self.svgs: List[Future] = []  # the syntax tree renderings which run in the background
+        self.error: Exception = None  # set by compile_many for units which could not be compiled
+
+    def wait_for_svg(self):
+        # raises the first rendering error, if any
+        for svg in self.svgs:
+            svg.result()
 
 
 def prepare_lexer(**kwargs):
@@ -17,6 +55,80 @@ def prepare_parser(pascal_lexer: PascalLexer, **kwargs):
     return pascal_parser
 
 
+def prepare_arena_parser(pascal_lexer: PascalLexer, **kwargs):
+    pascal_arena_parser = PascalArenaParser()
+    pascal_arena_parser.build(pascal_lexer, **kwargs)
+    return pascal_arena_parser
+
+
+def prepare_translator(pascal_lexer: PascalLexer, **kwargs):
+    pascal_translator = PascalTranslator()
+    pascal_translator.build(pascal_lexer, **kwargs)
+    return pascal_translator
+
+
+def prepare_front_end(pascal_lexer: PascalLexer, one_pass=False, arena=False, **kwargs):
+    # the parser which fits the compilation mode
+    if one_pass:
+        return prepare_translator(pascal_lexer, **kwargs)
+    if arena:
+        return prepare_arena_parser(pascal_lexer, **kwargs)
+    return prepare_parser(pascal_lexer, **kwargs)
+
+
+def parse_result(pascal_lexer: PascalLexer, pascal_parser: PascalParser, root) -> ParseResult:
+    return ParseResult(root, pascal_lexer.generated_tokens, pascal_parser.reductions, pascal_parser.errors,
+                       pascal_parser.statistics)
+
+
+def write_parse_outputs(output_file_path: str, result: ParseResult):
+    with open(f"{output_file_path}.tokens", "w") as f:
+        for token in result.tokens:
+            f.write(f"{token}\n")
+    with open(f"{output_file_path}.reductions", "w") as f:
+        for reduction in result.reductions:
+            f.write(f"{reduction}\n")
+    if result.statistics is not None:
+        with open(f"{output_file_path}.stats", "w") as f:
+            result.statistics.write(f)
+
+
+def write_code_outputs(output_file_path: str, code_generator: CodeGenerator, binary_symbols=False):
+    symbol_table = code_generator.symbol_table
+    with open(f"{output_file_path}.symbols", "w") as f:
+        symbol_table.write(f)
+    if binary_symbols:
+        write_symbol_table_file(symbol_table, f"{output_file_path}.symbols.bin")
+    with open(f"{output_file_path}.compiled.c", "w") as f:
+        code_generator.write_code(f)
+
+
+def draw_syntax_tree(output_file_path: str,
+                     root: Node,
+                     svg_renderer: SvgRenderer = None,
+                     drawing_limits: DrawingLimits = None,
+                     svg_per_procedure=False) -> List[Future]:
+    trees = []
+    detached = {}
+    if svg_per_procedure and isinstance(root, Program):
+        # every procedure gets its own drawing, the program drawing only shows their nodes
+        names = set()
+        for procedure in root.procedures.children:
+            name = procedure.name.lexeme
+            while name in names:  # shadowing procedures
+                name = f"{name}_"
+            names.add(name)
+            path = f"{output_file_path}.syntax.{name}.svg"
+            detached[procedure.id] = os.path.basename(path)
+            trees.append((PyDotGenerator(f"Procedure {name}", procedure, drawing_limits), path))
+    trees.insert(0, (PyDotGenerator("Syntax Tree", root, drawing_limits, detached), f"{output_file_path}.syntax.svg"))
+    if svg_renderer:
+        return [svg_renderer.submit(tree, path) for tree, path in trees]
+    for tree, path in trees:
+        tree.write_svg(path)
+    return []
+
+
 def compile_(
         input_file_path: str,
         output_path: str,
@@ -25,27 +137,141 @@ def compile_(
         debug=False,
         semantic_analysis_relaxed=False,
         code_generation=True,
-        start: str = None):
+        start: str = None,
+        statistics=False,
+        one_pass=False,
+        arena=False,
+        cache_directory: str = None,
+        svg_renderer: SvgRenderer = None,
+        drawing_limits: DrawingLimits = None,
+        svg_per_procedure=False,
+        ndjson=False,
+        memory_report=False,
+        static_constants=False,
+        binary_symbols=False,
+        stream_code=False) -> CompilationResult:
     output_file_path = utils.get_output_file_path(input_file_path, output_path)
     if not pascal_lexer:
         pascal_lexer = prepare_lexer()
     if not pascal_parser:
-        pascal_parser = prepare_parser(pascal_lexer, debug=debug, start=start)
-    with open(input_file_path, "r") as f:
-        pascal_lexer.input(f.read())
-    root = pascal_parser.parse(debug=debug)
-    with open(f"{output_file_path}.tokens", "w") as f:
-        for token in pascal_lexer.generated_tokens:
-            f.write(f"{token}\n")
-    with open(f"{output_file_path}.reductions", "w") as f:
-        for reduction in pascal_parser.reductions:
-            f.write(f"{reduction}\n")
-    tree = PyDotGenerator("Syntax Tree", root).generate()
-    tree.write_svg(f"{output_file_path}.syntax.svg")
-    if code_generation:
-        code_generator = CodeGenerator(root)
-        quadruples = code_generator.generate(semantic_analysis_relaxed)
-        with open(f"{output_file_path}.symbols", "w") as f:
-            f.write(str(code_generator.symbol_table))
-        with open(f"{output_file_path}.compiled.c", "w") as f:
-            f.writelines(f"{quadruple}\n" for quadruple in quadruples)
+        pascal_parser = prepare_front_end(pascal_lexer, one_pass, arena, debug=debug, start=start, statistics=statistics)
+    # memory accounting is opt-in: the report is None unless memory_report is set
+    with MemoryReport(f"{output_file_path}.memory.json") if memory_report else nullcontext() as memory:
+        # lexer and parser may be reused across compilation units
+        pascal_lexer.reset()
+        pascal_parser.reset()
+        with open(input_file_path, "r") as f:
+            source = f.read()
+        pascal_lexer.input(source)
+        if one_pass:
+            # code is generated during parsing, there is no syntax tree to draw
+            quadruples = pascal_parser.parse(semantic_analysis_relaxed=semantic_analysis_relaxed,
+                                             static_constants=static_constants, stream_code=stream_code,
+                                             debug=debug)
+            if stream_code:
+                quadruples = None  # only the ones left to write
+            write_parse_outputs(output_file_path, parse_result(pascal_lexer, pascal_parser, None))
+            symbol_table = pascal_parser.code_generator.symbol_table
+            cross_reference = pascal_parser.code_generator.cross_reference
+            cross_reference.finish(pascal_lexer.generated_tokens)
+            if memory:
+                memory.phase("translation", pascal_lexer.generated_tokens, symbol_table, quadruples)
+            write_code_outputs(output_file_path, pascal_parser.code_generator, binary_symbols)
+            return CompilationResult(output_file_path, None, quadruples, symbol_table, cross_reference)
+        # only syntax trees are cached, and a cached parse has no statistics to report
+        cache = None
+        if cache_directory and not arena and pascal_parser.statistics is None:
+            cache = SyntaxTreeCache(cache_directory)
+            key = cache.key(source, pascal_parser.grammar_signature())
+        parsed = cache.load(key) if cache else None
+        if parsed is None:
+            parsed = parse_result(pascal_lexer, pascal_parser, pascal_parser.parse(debug=debug))
+            if cache and not parsed.errors:
+                cache.store(key, parsed)
+        root = parsed.syntax_tree_root
+        if memory:
+            memory.phase("parse", parsed.tokens, root)
+        write_parse_outputs(output_file_path, parsed)
+        svgs = []
+        # the drawing is made from syntax tree nodes, and there is no tree when recovery could not reach one
+        drawable = not arena and root is not None
+        if drawable:
+            svgs = draw_syntax_tree(output_file_path, root, svg_renderer, drawing_limits, svg_per_procedure)
+        if ndjson and drawable:
+            NdjsonGenerator(root).write_ndjson_file(f"{output_file_path}.syntax.ndjson")
+        if parsed.errors:
+            # the tree only covers the valid parts of the input, so stop before code generation;
+            # the drawings of that tree are already submitted, so they go with the error
+            error = SyntaxError("\n".join(str(error) for error in parsed.errors))
+            error.svgs = svgs
+            raise error
+        result = CompilationResult(output_file_path, root)
+        result.svgs = svgs
+        if code_generation:
+            code_generator = CodeGenerator(root, static_constants, stream_code)
+            quadruples = code_generator.generate(semantic_analysis_relaxed)
+            if stream_code:
+                quadruples = None  # only the ones left to write
+            if memory:
+                memory.phase("code_generation", code_generator.symbol_table, quadruples)
+            write_code_outputs(output_file_path, code_generator, binary_symbols)
+            result.quadruples = quadruples
+            result.symbol_table = code_generator.symbol_table
+            code_generator.cross_reference.finish(parsed.tokens)
+            result.cross_reference = code_generator.cross_reference
+        return result
+
+
+def compile_many(
+        input_file_paths: Iterable[str],
+        output_path: str,
+        debug=False,
+        semantic_analysis_relaxed=False,
+        code_generation=True,
+        start: str = None,
+        statistics=False,
+        one_pass=False,
+        arena=False,
+        cache_directory: str = None,
+        svg_workers: int = None,
+        drawing_limits: DrawingLimits = None,
+        svg_per_procedure=False,
+        ndjson=False,
+        memory_report=False,
+        static_constants=False,
+        binary_symbols=False,
+        stream_code=False) -> List[CompilationResult]:
+    # build the lexer and parser tables once and share them between all compilation units
+    pascal_lexer = prepare_lexer()
+    pascal_parser = prepare_front_end(pascal_lexer, one_pass, arena, debug=debug, start=start, statistics=statistics)
+    # the syntax trees are rendered while the next units compile, at most svg_workers at a time
+    with SvgRenderer(svg_workers) as svg_renderer:
+        results = []
+        for input_file_path in input_file_paths:
+            try:
+                result = compile_(input_file_path, output_path, pascal_lexer, pascal_parser,
+                                  debug=debug,
+                                  semantic_analysis_relaxed=semantic_analysis_relaxed,
+                                  code_generation=code_generation,
+                                  start=start,
+                                  statistics=statistics,
+                                  one_pass=one_pass,
+                                  arena=arena,
+                                  cache_directory=cache_directory,
+                                  svg_renderer=svg_renderer,
+                                  drawing_limits=drawing_limits,
+                                  svg_per_procedure=svg_per_procedure,
+                                  ndjson=ndjson,
+                                  memory_report=memory_report,
+                                  static_constants=static_constants,
+                                  binary_symbols=binary_symbols,
+                                  stream_code=stream_code)
+            except (SyntaxError, SemanticError, Warning) as error:
+                # the error is kept with its unit and the batch goes on with the next one
+                result = CompilationResult(utils.get_output_file_path(input_file_path, output_path), None)
+                result.error = error
+                result.svgs = getattr(error, "svgs", [])
+            results.append(result)
+        for result in results:
+            result.wait_for_svg()
+    return results
@@ -0,0 +1,126 @@
+from array import array
+from bisect import bisect_right
+from typing import Dict, List, Union, Iterable, Optional
+
+from src.lexer import Token
+from src.symbol_table import SymbolTable, Entry
+
+
+# Definitions and uses of the entries and procedures of a compilation unit, recorded by the code generator
+# as it resolves names, so they can be queried without compiling again.
+#
+# A symbol is an entry or a procedure, numbered in the order they are met. Positions are token offsets, the
+# indexes of the tokens in the token stream of the unit, and -1 for tokens not in it. Once finished, the
+# uses of every symbol and the callers of every procedure are held in compact arrays grouped by symbol:
+# the group of symbol n runs from starts[n] to starts[n + 1].
+
+Symbol = Union[Entry, SymbolTable]
+
+
+def grouped(count: int, pairs: Iterable[tuple]) -> tuple:
+    # (starts, values) of the values sorted by (symbol, value)
+    starts = array("I", bytes(4 * (count + 1)))
+    values = array("i")
+    for symbol, value in sorted(pairs):
+        starts[symbol + 1] += 1
+        values.append(value)
+    for symbol in range(count):
+        starts[symbol + 1] += starts[symbol]
+    return starts, values
+
+
+class CrossReference:
+    def __init__(self):
+        self.symbols: List[Symbol] = []
+        self.numbers: Dict[int, int] = {}  # id of the symbol -> number, the symbols keep the ids taken
+        # recorded during code generation
+        self.use_symbols = array("I")
+        self.use_tokens: List[Token] = []
+        self.calls: Dict[tuple, None] = {}  # (callee, caller) numbers, once per pair
+        # filled by finish
+        self.definitions = array("i")
+        self.use_starts = array("I")
+        self.uses_by_symbol = array("i")
+        self.caller_starts = array("I")
+        self.callers_by_symbol = array("i")
+        self.occurrence_offsets = array("i")  # definitions and uses in offset order
+        self.occurrence_symbols = array("I")
+        self.names: Dict[str, List[int]] = {}
+
+    def number(self, symbol: Symbol) -> int:
+        number = self.numbers.get(id(symbol))
+        if number is None:
+            number = self.numbers[id(symbol)] = len(self.symbols)
+            self.symbols.append(symbol)
+        return number
+
+    def define(self, symbol: Symbol):
+        self.number(symbol)
+
+    def use(self, symbol: Symbol, token: Token):
+        self.use_symbols.append(self.number(symbol))
+        self.use_tokens.append(token)
+
+    def call(self, procedure: SymbolTable, token: Token, caller: SymbolTable):
+        self.use(procedure, token)
+        self.calls[(self.number(procedure), self.number(caller))] = None
+
+    @staticmethod
+    def definition_token(symbol: Symbol) -> Token:
+        return symbol.header if isinstance(symbol, SymbolTable) else symbol.token
+
+    def finish(self, tokens: List[Token]):
+        # resolves the tokens to offsets and groups the uses, tokens being the token stream of the unit
+        offsets = {id(token): offset for offset, token in enumerate(tokens)}
+        count = len(self.symbols)
+        self.definitions = array("i", (offsets.get(id(self.definition_token(symbol)), -1)
+                                       for symbol in self.symbols))
+        use_offsets = [offsets.get(id(token), -1) for token in self.use_tokens]
+        self.use_starts, self.uses_by_symbol = grouped(count, zip(self.use_symbols, use_offsets))
+        self.caller_starts, self.callers_by_symbol = grouped(count, self.calls)
+        occurrences = [(offset, symbol) for symbol, offset in enumerate(self.definitions) if offset >= 0]
+        occurrences.extend((offset, symbol) for symbol, offset in zip(self.use_symbols, use_offsets) if offset >= 0)
+        occurrences.sort()
+        self.occurrence_offsets = array("i", (offset for offset, _ in occurrences))
+        self.occurrence_symbols = array("I", (symbol for _, symbol in occurrences))
+        self.names = {}
+        for number, symbol in enumerate(self.symbols):
+            self.names.setdefault(self.definition_token(symbol).lexeme, []).append(number)
+        # the recorded tokens are not needed any more
+        self.use_symbols = array("I")
+        self.use_tokens = []
+
+    def definition(self, symbol: Symbol) -> int:
+        return self.definitions[self.numbers[id(symbol)]]
+
+    def uses(self, symbol: Symbol) -> array:
+        # the offsets of the uses, in increasing order
+        number = self.numbers.get(id(symbol))
+        if number is None:
+            return array("i")
+        return self.uses_by_symbol[self.use_starts[number]:self.use_starts[number + 1]]
+
+    def callers(self, procedure: SymbolTable) -> List[SymbolTable]:
+        # the procedures calling procedure, and the program if its body does
+        number = self.numbers.get(id(procedure))
+        if number is None:
+            return []
+        callers = self.callers_by_symbol[self.caller_starts[number]:self.caller_starts[number + 1]]
+        return [self.symbols[caller] for caller in callers]
+
+    def named(self, lexeme: str) -> List[Symbol]:
+        # the symbols defined with the name, in every scope
+        return [self.symbols[number] for number in self.names.get(lexeme, ())]
+
+    def symbol_at(self, offset: int) -> Optional[Symbol]:
+        # the symbol defined or used by the token at offset
+        index = bisect_right(self.occurrence_offsets, offset) - 1
+        if index >= 0 and self.occurrence_offsets[index] == offset:
+            return self.symbols[self.occurrence_symbols[index]]
+        return None
+
+    def unused(self) -> List[Entry]:
+        # the variables and parameters which are never used
+        starts = self.use_starts
+        return [symbol for number, symbol in enumerate(self.symbols)
+                if isinstance(symbol, Entry) and starts[number] == starts[number + 1]]
@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, List, Tuple
 
 import src.ply.lex
 
@@ -58,6 +58,10 @@ class PascalLexer:
         self.engine = None
         self.comment_start = 0
         self.generated_tokens: List[Token] = []
+        # lexeme and attribute of every distinct literal and identifier, shared by all its occurrences
+        self.payloads: Dict[str, Dict[str, Tuple[str, object]]] = {
+            "ID": {}, "INTEGER_CONSTANT": {}, "REAL_CONSTANT": {},
+        }
 
     def t_inline_comment(self, token):
         r'//.*'
@@ -90,12 +94,14 @@ class PascalLexer:
 
     def t_REAL_CONSTANT(self, token):
         r'([1-9][0-9]*|0)\.[0-9]+'
-        token.value = Token(token.type, token.value, float(token.value), token.lineno)
+        lexeme, attribute = self.payload("REAL_CONSTANT", token.value, float)
+        token.value = Token(token.type, lexeme, attribute, token.lineno)
         return token
 
     def t_INTEGER_CONSTANT(self, token):
         r'[1-9][0-9]*|0'
-        token.value = Token(token.type, token.value, int(token.value), token.lineno)
+        lexeme, attribute = self.payload("INTEGER_CONSTANT", token.value, int)
+        token.value = Token(token.type, lexeme, attribute, token.lineno)
         return token
 
     def t_ID(self, token):
@@ -106,15 +112,33 @@ class PascalLexer:
         if token.type == "FALSE":
             token.value = Token(token.type, token.value, False, token.lineno)
         if token.type == 'ID':
-            token.value = Token(token.type, token.value, None, token.lineno)
+            lexeme, _ = self.payload("ID", token.value, None)
+            token.value = Token(token.type, lexeme, None, token.lineno)
         return token
 
+    def payload(self, token_type: str, lexeme: str, convert) -> Tuple[str, object]:
+        payloads = self.payloads[token_type]
+        payload = payloads.get(lexeme)
+        if payload is None:
+            payload = payloads[lexeme] = (lexeme, convert(lexeme) if convert else None)
+        return payload
+
     def build(self, **kwargs):
         self.engine = src.ply.lex.lex(module=self, **kwargs)
 
     def input(self, inp):
         self.engine.input(inp)
 
+    def reset(self):
+        # prepare the lexer for a new compilation unit without rebuilding the engine
+        self.comment_level = 0
+        self.comment_start = 0
+        self.generated_tokens = []
+        for payloads in self.payloads.values():
+            payloads.clear()
+        self.engine.lineno = 1
+        self.engine.begin('INITIAL')
+
     def token(self):
         token = self.engine.token()
         if token:
@@ -0,0 +1,88 @@
+import gc
+import json
+import sys
+import tracemalloc
+from enum import Enum
+from types import BuiltinFunctionType, CodeType, FunctionType, MethodType, ModuleType
+from typing import Dict, List
+
+
+# Memory accounting of a compilation: after every phase, the objects reachable from the results of the
+# phases so far are counted and sized per class, and tracemalloc reports the traced memory, its peak
+# during the phase and the files which allocated the most.
+
+# shared by every compilation, so not part of its memory
+SHARED = (type, ModuleType, FunctionType, BuiltinFunctionType, MethodType, CodeType, Enum)
+TOP_ALLOCATIONS = 10
+
+
+def object_sizes(roots) -> Dict[str, List[int]]:
+    # class name -> [count, bytes], walking the object graph with an explicit stack
+    sizes: Dict[str, List[int]] = {}
+    seen = set()
+    stack = list(roots)
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, SHARED):
+            continue
+        seen.add(id(obj))
+        size = sys.getsizeof(obj)
+        if hasattr(obj, "__dict__"):
+            # the attributes of instances without slots are counted with the instance
+            attributes = obj.__dict__
+            seen.add(id(attributes))
+            size += sys.getsizeof(attributes)
+            stack.extend(attributes.values())
+        counted = sizes.get(type(obj).__name__)
+        if counted is None:
+            counted = sizes[type(obj).__name__] = [0, 0]
+        counted[0] += 1
+        counted[1] += size
+        stack.extend(gc.get_referents(obj))
+    return sizes
+
+
+class MemoryReport:
+    # used as a context manager around a compilation, which writes the report even if the compilation fails
+    def __init__(self, path: str):
+        self.path = path
+        self.started_tracing = False
+        self.phases: List[dict] = []
+        self.roots = []
+
+    def phase(self, name: str, *roots):
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        allocations = snapshot.statistics("filename")[:TOP_ALLOCATIONS]
+        self.roots.extend(root for root in roots if root is not None)
+        sizes = object_sizes(self.roots)
+        self.phases.append({
+            "phase": name,
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            "classes": {
+                name: {"count": count, "bytes": size}
+                for name, (count, size) in sorted(sizes.items(), key=lambda item: item[1][1], reverse=True)
+            },
+            "allocations": [
+                {"file": statistic.traceback[0].filename, "bytes": statistic.size, "count": statistic.count}
+                for statistic in allocations
+            ],
+        })
+        # the accounting itself allocates, so the next phase starts measuring after it
+        tracemalloc.reset_peak()
+
+    def __enter__(self):
+        # tracing may already be on, for instance under a profiler, and is then left on
+        self.started_tracing = not tracemalloc.is_tracing()
+        if self.started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.started_tracing:
+            tracemalloc.stop()
+        self.roots = []
+        with open(self.path, "w") as f:
+            json.dump({"phases": self.phases}, f, indent=2)
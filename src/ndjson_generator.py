@@ -0,0 +1,110 @@
+import json
+from typing import Iterable, List, TextIO
+
+from src.lexer import Token
+from src.symbol_table import DataType
+from src.syntax_tree import Node, Program, Declarations, Declaration, Procedures, Procedure, Parameters, \
+    CompoundStatement, PrintStatement, AssignmentStatement, WhileStatement, IfStatement, IfElseStatement, \
+    ProcedureCallStatement, Arguments, ErrorStatement, BinaryExpression, UnaryExpression, TerminalExpression
+from src.syntax_tree_cache import build_node, build_declaration, serialized_children
+
+
+# The syntax tree as newline delimited JSON: one record per node, in preorder, so every parent
+# comes before its children:
+#   {"id": 7, "tag": "binary_expression", "leaf": {"type": "PLUS", ...}, "parent": 9, "index": 0}
+# leaf is a token, the data type and identifiers of a declaration, or null. parent is null for the
+# root and index is the position of the node among the children of its parent. The expression of a
+# print statement is its only child.
+
+KINDS = {
+    "program": Program, "declarations": Declarations, "declaration": Declaration, "procedures": Procedures,
+    "procedure": Procedure, "parameters": Parameters, "compound_statement": CompoundStatement,
+    "print": PrintStatement, "assignment": AssignmentStatement, "while": WhileStatement, "if": IfStatement,
+    "if_else": IfElseStatement, "procedure_call": ProcedureCallStatement, "arguments": Arguments,
+    "error": ErrorStatement, "binary_expression": BinaryExpression, "unary_expression": UnaryExpression,
+    "identifier_or_constant": TerminalExpression,
+}
+
+
+def token_record(token: Token) -> dict:
+    return {"type": token.type, "lexeme": token.lexeme, "attribute": token.attribute, "lineno": token.lineno}
+
+
+def leaf_record(node: Node):
+    if isinstance(node, Declaration):
+        return {"data_type": node.data_type.name, "identifiers": [token_record(token) for token in node.identifiers]}
+    if isinstance(node.leaf, Token):
+        return token_record(node.leaf)
+    return None
+
+
+class NdjsonGenerator:
+    # Streams the records while walking the tree, holding only the path to the current node.
+
+    def __init__(self, tree_root: Node):
+        self.tree_root: Node = tree_root
+
+    def write_ndjson(self, file: TextIO):
+        write = file.write
+        encode = json.JSONEncoder(separators=(",", ":")).encode
+        stack = [(None, enumerate([self.tree_root]))]
+        while stack:
+            parent, children = stack[-1]
+            index, child = next(children, (None, None))
+            if child is None:
+                stack.pop()
+                continue
+            write(encode({"id": child.id, "tag": child.tag, "leaf": leaf_record(child),
+                          "parent": None if parent is None else parent.id, "index": index}))
+            write("\n")
+            stack.append((child, enumerate(serialized_children(child))))
+
+    def write_ndjson_file(self, path: str):
+        with open(path, "w") as f:
+            self.write_ndjson(f)
+
+
+def token_from_record(record: dict) -> Token:
+    return Token(record["type"], record["lexeme"], record["attribute"], record["lineno"])
+
+
+def build_from_record(record: dict, children: List[Node]) -> Node:
+    kind = KINDS[record["tag"]]
+    leaf = record["leaf"]
+    if kind is Declaration:
+        identifiers = [token_from_record(token) for token in leaf["identifiers"]]
+        node = build_declaration(DataType[leaf["data_type"]], identifiers)
+    else:
+        node = build_node(kind, None if leaf is None else token_from_record(leaf), children)
+    node.id = record["id"]
+    return node
+
+
+def load_tree(lines: Iterable[str]) -> Node:
+    # the records are consumed as they come: a node is built once the stream leaves its subtree,
+    # so besides the tree only the records on the path to the current node are held
+    stack: List[tuple] = []  # (record, built children)
+    root = None
+    for line in lines:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        while stack and stack[-1][0]["id"] != record["parent"]:
+            root = finish(stack)
+        stack.append((record, []))
+    while stack:
+        root = finish(stack)
+    return root
+
+
+def finish(stack: List[tuple]) -> Node:
+    record, children = stack.pop()
+    node = build_from_record(record, children)
+    if stack:
+        stack[-1][1].append(node)
+    return node
+
+
+def load_tree_file(path: str) -> Node:
+    with open(path, "r") as f:
+        return load_tree(f)
@@ -1,8 +1,52 @@
+import hashlib
+import time
+from typing import List, Iterable, TextIO
+
 import src.ply.yacc
 from src.lexer import PascalLexer, Token
-from src.syntax_tree import Node, BinaryExpression, UnaryExpression, TerminalExpression, Program, Declarations, \
-    Declaration, Procedures, Procedure, Parameters, CompoundStatement, AssignmentStatement, WhileStatement, \
-    ProcedureCallStatement, IfStatement, IfElseStatement, Arguments, PrintStatement
+from src.syntax_tree import Node, Expression, BinaryExpression, UnaryExpression, TerminalExpression, Statement, \
+    Program, Declarations, Declaration, Procedures, Procedure, Parameters, CompoundStatement, AssignmentStatement, \
+    WhileStatement, ProcedureCallStatement, IfStatement, IfElseStatement, Arguments, PrintStatement, ErrorStatement
+
+
+class ParseStatistics:
+    def __init__(self, productions: List[src.ply.yacc.Production]):
+        self.productions = productions
+        self.shifts = 0
+        self.maximum_stack_depth = 0
+        # indexed by production number
+        self.reductions = [0] * len(productions)
+        self.nanoseconds = [0] * len(productions)
+
+    def write(self, f: TextIO):
+        f.write(f"shifts: {self.shifts}\n")
+        f.write(f"reductions: {sum(self.reductions)}\n")
+        f.write(f"maximum stack depth: {self.maximum_stack_depth}\n")
+        f.write(f"action time: {sum(self.nanoseconds) / 1e6:.3f} ms\n")
+        f.write(f"{'reductions':>10} {'total ms':>10} {'mean us':>10}  production (action)\n")
+        # hottest productions first
+        numbers = sorted(range(1, len(self.productions)), key=lambda number: -self.nanoseconds[number])
+        for number in numbers:
+            count = self.reductions[number]
+            if count == 0:
+                continue
+            production = self.productions[number]
+            f.write(f"{count:>10} {self.nanoseconds[number] / 1e6:>10.3f} {self.nanoseconds[number] / 1e3 / count:>10.3f}"
+                    f"  {production} ({production.func})\n")
+
+
+class ParseResult:
+    def __init__(self,
+                 syntax_tree_root: Node,
+                 tokens: List[Token],
+                 reductions: List[str],
+                 errors: List[SyntaxError],
+                 statistics: ParseStatistics = None):
+        self.syntax_tree_root = syntax_tree_root
+        self.tokens = tokens
+        self.reductions = reductions
+        self.errors = errors
+        self.statistics = statistics
 
 
 class PascalParser:
@@ -15,13 +59,85 @@ class PascalParser:
 
     def __init__(self):
         self.reductions = []
+        self.errors: List[SyntaxError] = []
+        self.statistics: ParseStatistics = None  # only collected when built with statistics=True
 
     def log(self, reduction):
         self.reductions.append(reduction)
 
+    # The nodes the reduction actions build, overridden by parsers which build other representations
+    # of the tree (see PascalArenaParser), so the grammar is only written here.
+
+    def make_program(self, name: Token, declarations: Declarations, procedures: Procedures,
+                     compound_statement: CompoundStatement) -> Program:
+        return Program(name, declarations, procedures, compound_statement)
+
+    def make_declarations(self, first_declaration: Declaration = None) -> Declarations:
+        return Declarations(first_declaration)
+
+    def make_declaration(self, first_identifier: Token) -> Declaration:
+        return Declaration(first_identifier)
+
+    def add_identifier(self, declaration: Declaration, identifier: Token):
+        declaration.add_identifier(identifier)
+
+    def set_data_type(self, declaration: Declaration, data_type: Token):
+        declaration.set_data_type(data_type)
+
+    def make_procedures(self, first_procedure: Procedure = None) -> Procedures:
+        return Procedures(first_procedure)
+
+    def make_procedure(self, name: Token, parameters: Parameters, declarations: Declarations,
+                       compound_statement: CompoundStatement) -> Procedure:
+        return Procedure(name, parameters, declarations, compound_statement)
+
+    def make_parameters(self, declarations: Declarations) -> Parameters:
+        return Parameters(declarations)
+
+    def make_compound_statement(self, first_statement: Statement) -> CompoundStatement:
+        return CompoundStatement(first_statement)
+
+    def make_print(self, expression: Expression) -> PrintStatement:
+        return PrintStatement(expression)
+
+    def make_assignment(self, lvalue: Token, rvalue: Expression) -> AssignmentStatement:
+        return AssignmentStatement(lvalue, rvalue)
+
+    def make_while(self, condition: Expression, body: Statement) -> WhileStatement:
+        return WhileStatement(condition, body)
+
+    def make_procedure_call(self, procedure_name: Token, arguments: Arguments) -> ProcedureCallStatement:
+        return ProcedureCallStatement(procedure_name, arguments)
+
+    def make_if(self, condition: Expression, body: Statement) -> IfStatement:
+        return IfStatement(condition, body)
+
+    def make_if_else(self, condition: Expression, then_body: Statement, else_body: Statement) -> IfElseStatement:
+        return IfElseStatement(condition, then_body, else_body)
+
+    def make_error(self, token: Token) -> ErrorStatement:
+        return ErrorStatement(token)
+
+    def make_arguments(self, first_expression: Expression = None) -> Arguments:
+        return Arguments(first_expression)
+
+    def make_binary(self, binary_operator: Token, left_operand: Expression,
+                    right_operand: Expression) -> BinaryExpression:
+        return BinaryExpression(binary_operator, left_operand, right_operand)
+
+    def make_unary(self, unary_operator: Token, operand: Expression) -> UnaryExpression:
+        return UnaryExpression(unary_operator, operand)
+
+    def make_terminal(self, terminal: Token) -> TerminalExpression:
+        return TerminalExpression(terminal)
+
+    def append(self, node: Node, child: Node):
+        # a child appended to a list node: declarations, procedures, statements or arguments
+        node.add_children(child)
+
     def p_program(self, p):
         """program : PROGRAM ID declarations procedures compound_statement"""
-        p[0] = Program(p[2], p[3], p[4], p[5])
+        p[0] = self.make_program(p[2], p[3], p[4], p[5])
         self.log(self.p_program.__doc__)
 
     def p_declarations(self, p):
@@ -31,7 +147,7 @@ class PascalParser:
             p[0] = p[2]
             self.log("declarations : VAR declaration_list SEMICOLON")
         else:
-            p[0] = Declarations()
+            p[0] = self.make_declarations()
             self.log("declarations : empty")
 
     def p_declaration_list(self, p):
@@ -39,17 +155,27 @@ class PascalParser:
                             | declaration"""
         if len(p) > 2:
             p[0] = p[1]
-            p[1].add_children(p[3])
+            self.append(p[1], p[3])
             self.log("declaration_list : declaration_list SEMICOLON declaration")
         else:
-            p[0] = Declarations(p[1])
+            p[0] = self.make_declarations(p[1])
             self.log("declaration_list : declaration")
 
+    def p_declaration_list_error(self, p):
+        """declaration_list : declaration_list SEMICOLON error
+                            | error"""
+        # panic mode recovery: the malformed declaration is dropped up to the next ';' or ')'
+        if len(p) > 2:
+            p[0] = p[1]
+            self.log("declaration_list : declaration_list SEMICOLON error")
+        else:
+            p[0] = self.make_declarations()
+            self.log("declaration_list : error")
+
     def p_declaration(self, p):
         """declaration : identifier_list COLON data_type"""
         p[0] = p[1]
-        declaration: Declaration = p[1]
-        declaration.set_data_type(p[3])
+        self.set_data_type(p[1], p[3])
         self.log(self.p_declaration.__doc__)
 
     def p_identifier_list(self, p):
@@ -57,10 +183,10 @@ class PascalParser:
                            | ID"""
         if len(p) > 2:
             p[0] = p[1]
-            p[1].add_identifier(p[3])
+            self.add_identifier(p[1], p[3])
             self.log("identifier_list : identifier_list COMMA ID")
         else:
-            p[0] = Declaration(p[1])
+            p[0] = self.make_declaration(p[1])
             self.log("identifier_list : ID")
 
     def p_data_type(self, p):
@@ -72,8 +198,8 @@ class PascalParser:
     def p_procedures(self, p):
         """procedures : procedure_list
                       | empty"""
-        if p[1].tag == "empty":
-            p[0] = Procedures()
+        if p[1] is None:  # empty
+            p[0] = self.make_procedures()
             self.log("procedures : empty")
         else:
             p[0] = p[1]
@@ -84,25 +210,32 @@ class PascalParser:
                           | procedure"""
         if len(p) > 2:
             p[0] = p[1]
-            p[1].add_children(p[2])
+            self.append(p[1], p[2])
             self.log("procedure_list : procedure_list procedure")
         else:
-            p[0] = Procedures(p[1])
+            p[0] = self.make_procedures(p[1])
             self.log("procedure_list : procedure")
 
     def p_procedure(self, p):
         """procedure : PROCEDURE ID parameters SEMICOLON declarations compound_statement SEMICOLON"""
-        p[0] = Procedure(p[2], p[3], p[5], p[6])
+        p[0] = self.make_procedure(p[2], p[3], p[5], p[6])
         self.log(self.p_procedure.__doc__)
 
+    def p_procedure_error(self, p):
+        """procedure : PROCEDURE error compound_statement SEMICOLON"""
+        # panic mode recovery: a malformed procedure header is skipped up to the procedure body
+        p[0] = self.make_procedure(p[2].value, self.make_parameters(self.make_declarations()), self.make_declarations(),
+                                   p[3])
+        self.log(self.p_procedure_error.__doc__)
+
     def p_parameters(self, p):
         """parameters : LEFT_PARENTHESIS declaration_list RIGHT_PARENTHESIS
                       | empty"""
         if len(p) > 2:
-            p[0] = Parameters(p[2])
+            p[0] = self.make_parameters(p[2])
             self.log("parameters : LEFT_PARENTHESIS declaration_list RIGHT_PARENTHESIS")
         else:
-            p[0] = Parameters(Declarations())
+            p[0] = self.make_parameters(self.make_declarations())
             self.log("parameters : empty")
 
     def p_compound_statement(self, p):
@@ -115,40 +248,40 @@ class PascalParser:
                           | statement"""
         if len(p) > 2:
             p[0] = p[1]
-            p[1].add_children(p[3])
+            self.append(p[1], p[3])
             self.log("statement_list : statement_list SEMICOLON statement")
         else:
-            p[0] = CompoundStatement(p[1])
+            p[0] = self.make_compound_statement(p[1])
             self.log("statement_list : statement")
 
     def p_statement_print(self, p):
         """statement : PRINT LEFT_PARENTHESIS expression RIGHT_PARENTHESIS"""
-        p[0] = PrintStatement(p[3])
+        p[0] = self.make_print(p[3])
         self.log(self.p_statement_print.__doc__)
 
     def p_statement_assignment(self, p):
         """statement : ID ASSIGN expression"""
-        p[0] = AssignmentStatement(p[1], p[3])
+        p[0] = self.make_assignment(p[1], p[3])
         self.log(self.p_statement_assignment.__doc__)
 
     def p_statement_while(self, p):
         """statement : WHILE expression DO statement"""
-        p[0] = WhileStatement(p[2], p[4])
+        p[0] = self.make_while(p[2], p[4])
         self.log(self.p_statement_while.__doc__)
 
     def p_statement_procedure_call(self, p):
         """statement : ID arguments"""
-        p[0] = ProcedureCallStatement(p[1], p[2])
+        p[0] = self.make_procedure_call(p[1], p[2])
         self.log(self.p_statement_procedure_call.__doc__)
 
     def p_statement_if(self, p):
         """statement : IF expression THEN statement"""
-        p[0] = IfStatement(p[2], p[4])
+        p[0] = self.make_if(p[2], p[4])
         self.log(self.p_statement_if.__doc__)
 
     def p_statement_if_else(self, p):
         """statement : IF expression THEN statement ELSE statement"""
-        p[0] = IfElseStatement(p[2], p[4], p[6])
+        p[0] = self.make_if_else(p[2], p[4], p[6])
         self.log(self.p_statement_if_else.__doc__)
 
     def p_statement_compound(self, p):
@@ -156,6 +289,12 @@ class PascalParser:
         p[0] = p[1]
         self.log(self.p_statement_compound.__doc__)
 
+    def p_statement_error(self, p):
+        """statement : error"""
+        # panic mode recovery: the malformed statement is skipped up to the next ';', 'end' or 'else'
+        p[0] = self.make_error(p[1].value)
+        self.log(self.p_statement_error.__doc__)
+
     def p_arguments(self, p):
         """arguments : LEFT_PARENTHESIS actual_parameter_list RIGHT_PARENTHESIS
                      | empty"""
@@ -163,7 +302,7 @@ class PascalParser:
             p[0] = p[2]
             self.log("arguments : LEFT_PARENTHESIS actual_parameter_list RIGHT_PARENTHESIS")
         else:
-            p[0] = Arguments()
+            p[0] = self.make_arguments()
             self.log("arguments : empty")
 
     def p_actual_parameter_list(self, p):
@@ -171,10 +310,10 @@ class PascalParser:
                                  | expression"""
         if len(p) > 2:
             p[0] = p[1]
-            p[1].add_children(p[3])
+            self.append(p[1], p[3])
             self.log("actual_parameter_list : actual_parameter_list COMMA expression")
         else:
-            p[0] = Arguments(p[1])
+            p[0] = self.make_arguments(p[1])
             self.log("actual_parameter_list : expression")
 
     def p_expression(self, p):
@@ -190,10 +329,10 @@ class PascalParser:
                 p[0] = p[2]  # node.children.extend([p[2]])
                 self.log("expression : ( expression )")
             else:  # E op E
-                p[0] = BinaryExpression(p[2], p[1], p[3])  # node.children.extend([p[1], p[2], p[3]])
+                p[0] = self.make_binary(p[2], p[1], p[3])  # node.children.extend([p[1], p[2], p[3]])
                 self.log(f"expression : expression {p[2].type} expression")
         elif len(p) == 3:  # op E
-            p[0] = UnaryExpression(p[1], p[2])  # node.children.extend([p[1], p[2]])
+            p[0] = self.make_unary(p[1], p[2])  # node.children.extend([p[1], p[2]])
             self.log(f"expression : unary_operator expression")
         elif len(p) == 2:
             p[0] = p[1]  # node.children.append(p[1])
@@ -205,7 +344,7 @@ class PascalParser:
                                   | ID
                                   | TRUE
                                   | FALSE"""
-        p[0] = TerminalExpression(p[1])  # Node("identifier_or_constant", leaf=p[1])
+        p[0] = self.make_terminal(p[1])  # Node("identifier_or_constant", leaf=p[1])
         self.log(f"identifier_or_constant : {p[1].type}")
 
     def p_relational_operator(self, p):
@@ -245,14 +384,68 @@ class PascalParser:
         """empty :"""
 
     def p_error(self, p):
-        error = f"Syntax error at token {p}"
-        self.log(error)
-        raise SyntaxError(error)
+        # errors are collected rather than raised so a single pass reports all of them;
+        # the error productions above take care of resynchronizing the parser
+        error = SyntaxError(f"Syntax error at token {p}" if p else "Syntax error at end of input")
+        self.errors.append(error)
+        self.log(str(error))
 
-    def build(self, lexer: PascalLexer, **kwargs):
+    def build(self, lexer: PascalLexer, statistics=False, **kwargs):
         self.lexer = lexer
         self.tokens = lexer.tokens
         self.engine = src.ply.yacc.yacc(module=self, **kwargs)
+        if statistics:
+            self.statistics = ParseStatistics(self.engine.productions)
+            for production in self.engine.productions[1:]:
+                production.callable = self.instrument(production)
+
+    def instrument(self, production: src.ply.yacc.Production):
+        # wrap the reduction action of a production to count and time it; the parser
+        # stacks are reused across parses, so the state stack can be captured once
+        action = production.callable
+        number = production.number
+        statestack = self.engine.statestack
+        clock = time.perf_counter_ns
+
+        def instrumented_action(p):
+            statistics = self.statistics
+            depth = len(statestack)
+            if depth > statistics.maximum_stack_depth:
+                statistics.maximum_stack_depth = depth
+            begin = clock()
+            action(p)
+            statistics.nanoseconds[number] += clock() - begin
+            statistics.reductions[number] += 1
+        return instrumented_action
+
+    def reset(self):
+        # fresh lists are handed out per unit since earlier results may still reference the old ones
+        Node.reset_ids()
+        self.reductions = []
+        self.errors = []
+        if self.statistics is not None:
+            self.statistics = ParseStatistics(self.engine.productions)
+
+    def grammar_signature(self) -> str:
+        # identifies the grammar and the kind of trees its actions build
+        productions = "\n".join(str(production) for production in self.engine.productions)
+        return hashlib.sha256(f"{type(self).__name__}\n{productions}".encode()).hexdigest()
 
     def parse(self, **kwargs):
-        return self.engine.parse(lexer=self.lexer, **kwargs)
+        root = self.engine.parse(lexer=self.lexer, **kwargs)
+        if self.statistics is not None:
+            # counted by the engine, as error recovery discards tokens and shifts error symbols
+            self.statistics.shifts = self.engine.shifts
+        return root
+
+    def parse_many(self, sources: Iterable[str], **kwargs) -> List[ParseResult]:
+        # the lexer and parser engines (and the parser stacks) are reused for every unit
+        results = []
+        for source in sources:
+            self.lexer.reset()
+            self.reset()
+            self.lexer.input(source)
+            root = self.parse(**kwargs)
+            results.append(ParseResult(root, self.lexer.generated_tokens, self.reductions, self.errors,
+                                       self.statistics))
+        return results
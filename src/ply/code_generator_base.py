@@ -1,7 +1,7 @@
 from abc import ABC, abstractmethod
 from src.lexer import Token
 from src.symbol_table import DataType, EntryType, SymbolTable, Entry
-from src.three_address_code import ThreeAddressCode
+from src.three_address_code import ThreeAddressCode, Segment
 
 
 class CodeGeneratorBase(ABC):
@@ -9,12 +9,28 @@ class CodeGeneratorBase(ABC):
     def emit(self, tac: ThreeAddressCode) -> ThreeAddressCode:
         pass
 
+    @abstractmethod
+    def enter_loop(self):
+        pass
+
+    @abstractmethod
+    def leave_loop(self):
+        pass
+
+    @abstractmethod
+    def lay_out_activation_records(self):
+        pass
+
     @abstractmethod
     def newlabel(self):
         pass
 
     @abstractmethod
-    def insert_quadruple(self, index: int, tac: ThreeAddressCode):
+    def emit_to(self, segment: Segment, tac: ThreeAddressCode) -> ThreeAddressCode:
+        pass
+
+    @abstractmethod
+    def switch_segment(self, segment: Segment):
         pass
 
     @abstractmethod
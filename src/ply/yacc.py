@@ -232,6 +232,10 @@ class LRParser:
         self.errorfunc = errorf
         self.set_defaulted_states()
         self.errorok = True
+        self.statestack = []
+        self.symstack = []
+        self.pslice = YaccProduction(None)
+        self.shifts = 0                     # Shift actions of the last parse, error symbols included
 
     def errok(self):
         self.errorok = True
@@ -257,6 +261,11 @@ class LRParser:
         for state, actions in self.action.items():
             rules = list(actions.values())
             if len(rules) == 1 and rules[0] < 0:
+                # States reducing an error production must consult the lookahead: otherwise the
+                # rule is reduced before the offending token is discarded and recovery never ends.
+                prod = self.productions[-rules[0]].prod
+                if prod and prod[-1] == 'error':
+                    continue
                 self.defaulted_states[state] = rules[0]
 
     def disable_defaulted_states(self):
@@ -281,7 +290,7 @@ class LRParser:
         goto    = self.goto                      # Local reference to goto table (to avoid lookup on self.)
         prod    = self.productions               # Local reference to production list (to avoid lookup on self.)
         defaulted_states = self.defaulted_states # Local reference to defaulted states
-        pslice  = YaccProduction(None)           # Production object passed to grammar rules
+        pslice  = self.pslice                    # Production object passed to grammar rules (reused)
         errorcount = 0                           # Used during error recovery
 
         if debug:
@@ -303,11 +312,15 @@ class LRParser:
         # Set the token function
         get_token = self.token = lexer.token
 
-        # Set up the state and symbol stacks
-        statestack = self.statestack = []   # Stack of parsing states
-        symstack = self.symstack = []       # Stack of grammar symbols
+        # Set up the state and symbol stacks.  The stacks are kept on the parser
+        # and cleared rather than reallocated so that repeated parses reuse them.
+        statestack = self.statestack        # Stack of parsing states
+        symstack = self.symstack            # Stack of grammar symbols
+        del statestack[:]
+        del symstack[:]
         pslice.stack = symstack             # Put in the production
         errtoken   = None                   # Err token
+        recoverytoken = None                # Lookahead that started the last error recovery
 
         # The start state is assumed to be (0,$end)
 
@@ -316,6 +329,7 @@ class LRParser:
         sym.type = '$end'
         symstack.append(sym)
         state = 0
+        self.shifts = 0
         while True:
             # Get the next symbol on the input.  If a lookahead symbol
             # is already set, we just use that. Otherwise, we'll pull
@@ -351,6 +365,7 @@ class LRParser:
                     # shift a symbol on the stack
                     statestack.append(t)
                     state = t
+                    self.shifts += 1
 
                     if debug:
                         debug.debug('Action : Shift and goto state %s', t)
@@ -556,6 +571,13 @@ class LRParser:
                         lookahead = None
                         continue
 
+                    # If this very token already started a recovery and still cannot be
+                    # shifted, discard it (as bison does) instead of recovering forever
+                    if lookahead is recoverytoken:
+                        lookahead = None
+                        continue
+                    recoverytoken = lookahead
+
                     # Create the error symbol for the first time and make it the new lookahead symbol
                     t = YaccSymbol()
                     t.type = 'error'
@@ -779,6 +801,12 @@ class Grammar(object):
 
         self.Follow       = {}      # A dictionary of precomputed FOLLOW(x) symbols
 
+        self.FirstBits    = {}      # FIRST(x) as bitsets over the terminal bits
+
+        self.TerminalBits = {}      # A dictionary mapping terminals, '$end' and '<empty>' to a bit
+
+        self.BitTerminals = []      # Symbol names indexed by bit position
+
         self.Precedence   = {}      # Precedence rules for each terminal. Contains tuples of the
                                     # form ('right',level) or ('nonassoc', level) or ('left',level)
 
@@ -1072,6 +1100,44 @@ class Grammar(object):
 
         return unused
 
+    # -------------------------------------------------------------------------
+    # terminal_bits()
+    #
+    # FIRST/FOLLOW sets and LALR lookaheads are computed over integer bitsets.
+    # Every terminal (plus '$end') is assigned one bit, in the order in which
+    # the terminals were declared, and one extra bit stands for '<empty>'.
+    # Returns the dictionary mapping terminal names to their bit.
+    # -------------------------------------------------------------------------
+    def terminal_bits(self):
+        if not self.TerminalBits:
+            for t in list(self.Terminals) + ['$end', '<empty>']:
+                self.TerminalBits[t] = 1 << len(self.BitTerminals)
+                self.BitTerminals.append(t)
+        return self.TerminalBits
+
+    # Convert a bitset back into the list of symbol names, in bit order
+    def bits_to_symbols(self, bits):
+        symbols = self.BitTerminals
+        result = []
+        while bits:
+            low = bits & -bits
+            result.append(symbols[low.bit_length() - 1])
+            bits ^= low
+        return result
+
+    # Compute the FIRST1 bitset of the tuple of symbols beta from the bitsets in first
+    def _first_bits(self, beta, first):
+        empty = self.TerminalBits['<empty>']
+        result = 0
+        for x in beta:
+            f = first[x]
+            result |= f
+            if not f & empty:
+                # x can not produce empty, so no further symbols of beta are considered
+                return result & ~empty
+        # every x in beta produces empty (or beta is empty), so beta produces empty as well
+        return result | empty
+
     # -------------------------------------------------------------------------
     # _first()
     #
@@ -1081,34 +1147,7 @@ class Grammar(object):
     # Afterward (e.g., when called from compute_follow()), it will be complete.
     # -------------------------------------------------------------------------
     def _first(self, beta):
-
-        # We are computing First(x1,x2,x3,...,xn)
-        result = []
-        for x in beta:
-            x_produces_empty = False
-
-            # Add all the non-<empty> symbols of First[x] to the result.
-            for f in self.First[x]:
-                if f == '<empty>':
-                    x_produces_empty = True
-                else:
-                    if f not in result:
-                        result.append(f)
-
-            if x_produces_empty:
-                # We have to consider the next x in beta,
-                # i.e. stay in the loop.
-                pass
-            else:
-                # We don't have to consider any further symbols in beta.
-                break
-        else:
-            # There was no 'break' from the loop,
-            # so x_produces_empty was true for all x in beta,
-            # so beta produces empty as well.
-            result.append('<empty>')
-
-        return result
+        return self.bits_to_symbols(self._first_bits(beta, self.FirstBits))
 
     # -------------------------------------------------------------------------
     # compute_first()
@@ -1119,30 +1158,36 @@ class Grammar(object):
         if self.First:
             return self.First
 
+        bits = self.terminal_bits()
+        first = self.FirstBits
+
         # Terminals:
         for t in self.Terminals:
-            self.First[t] = [t]
+            first[t] = bits[t]
 
-        self.First['$end'] = ['$end']
+        first['$end'] = bits['$end']
 
         # Nonterminals:
 
         # Initialize to the empty set:
         for n in self.Nonterminals:
-            self.First[n] = []
+            first[n] = 0
 
         # Then propagate symbols until no change:
+        productions = [(n, p.prod) for n in self.Nonterminals for p in self.Prodnames[n]]
         while True:
             some_change = False
-            for n in self.Nonterminals:
-                for p in self.Prodnames[n]:
-                    for f in self._first(p.prod):
-                        if f not in self.First[n]:
-                            self.First[n].append(f)
-                            some_change = True
+            for n, prod in productions:
+                f = first[n] | self._first_bits(prod, first)
+                if f != first[n]:
+                    first[n] = f
+                    some_change = True
             if not some_change:
                 break
 
+        for x, f in first.items():
+            self.First[x] = self.bits_to_symbols(f)
+
         return self.First
 
     # ---------------------------------------------------------------------
@@ -1161,38 +1206,43 @@ class Grammar(object):
         if not self.First:
             self.compute_first()
 
+        empty = self.TerminalBits['<empty>']
+
         # Add '$end' to the follow list of the start symbol
+        follow = {}
         for k in self.Nonterminals:
-            self.Follow[k] = []
+            follow[k] = 0
 
         if not start:
             start = self.Productions[1].name
 
-        self.Follow[start] = ['$end']
+        follow[start] = self.TerminalBits['$end']
+
+        # FIRST of the symbols after every nonterminal occurrence does not change while
+        # the follow sets grow, so it is computed once.  Each constraint is a tuple
+        # (B, first bits without '<empty>', name of the production if FOLLOW(name) flows into B)
+        constraints = []
+        for p in self.Productions[1:]:
+            for i, B in enumerate(p.prod):
+                if B in self.Nonterminals:
+                    fst = self._first_bits(p.prod[i+1:], self.FirstBits)
+                    constraints.append((B, fst & ~empty, p.name if fst & empty else None))
 
         while True:
             didadd = False
-            for p in self.Productions[1:]:
-                # Here is the production set
-                for i, B in enumerate(p.prod):
-                    if B in self.Nonterminals:
-                        # Okay. We got a non-terminal in a production
-                        fst = self._first(p.prod[i+1:])
-                        hasempty = False
-                        for f in fst:
-                            if f != '<empty>' and f not in self.Follow[B]:
-                                self.Follow[B].append(f)
-                                didadd = True
-                            if f == '<empty>':
-                                hasempty = True
-                        if hasempty or i == (len(p.prod)-1):
-                            # Add elements of follow(a) to follow(b)
-                            for f in self.Follow[p.name]:
-                                if f not in self.Follow[B]:
-                                    self.Follow[B].append(f)
-                                    didadd = True
+            for B, fst, name in constraints:
+                f = follow[B] | fst
+                if name is not None:
+                    # Add elements of follow(a) to follow(b)
+                    f |= follow[name]
+                if f != follow[B]:
+                    follow[B] = f
+                    didadd = True
             if not didadd:
                 break
+
+        for k, f in follow.items():
+            self.Follow[k] = self.bits_to_symbols(f)
         return self.Follow
 
 
@@ -1258,44 +1308,42 @@ class Grammar(object):
 # This is used to compute the values of Read() sets as well as FOLLOW sets
 # in LALR(1) generation.
 #
-# Inputs:  X    - An input set
-#          R    - A relation
-#          FP   - Set-valued function
+# The elements of X are the integers 0 .. X-1 and sets are integer bitsets.
+#
+# Inputs:  X    - Number of elements in the input set
+#          R    - A relation: R[x] is the list of y's related to x
+#          FP   - Set-valued function: FP[x] is the bitset F'(x)
 # ------------------------------------------------------------------------------
 
 def digraph(X, R, FP):
-    N = {}
-    for x in X:
-        N[x] = 0
+    N = [0] * X
     stack = []
-    F = {}
-    for x in X:
+    F = list(FP)
+    for x in range(X):
         if N[x] == 0:
-            traverse(x, N, stack, F, X, R, FP)
+            traverse(x, N, stack, F, R)
     return F
 
-def traverse(x, N, stack, F, X, R, FP):
+def traverse(x, N, stack, F, R):
     stack.append(x)
     d = len(stack)
     N[x] = d
-    F[x] = FP(x)             # F(X) <- F'(x)
 
-    rel = R(x)               # Get y's related to x
-    for y in rel:
+    for y in R[x]:           # Get y's related to x
         if N[y] == 0:
-            traverse(y, N, stack, F, X, R, FP)
-        N[x] = min(N[x], N[y])
-        for a in F.get(y, []):
-            if a not in F[x]:
-                F[x].append(a)
+            traverse(y, N, stack, F, R)
+        if N[y] < N[x]:
+            N[x] = N[y]
+        F[x] |= F[y]
     if N[x] == d:
-        N[stack[-1]] = MAXINT
-        F[stack[-1]] = F[x]
+        f = F[x]
         element = stack.pop()
+        N[element] = MAXINT
+        F[element] = f
         while element != x:
-            N[stack[-1]] = MAXINT
-            F[stack[-1]] = F[x]
             element = stack.pop()
+            N[element] = MAXINT
+            F[element] = f
 
 class LALRError(YaccError):
     pass
@@ -1488,21 +1536,22 @@ class LRTable:
     # Given a set of LR(0) items, this functions finds all of the non-terminal
     # transitions.    These are transitions in which a dot appears immediately before
     # a non-terminal.   Returns a list of tuples of the form (state,N) where state
-    # is the state number and N is the nonterminal symbol.
+    # is the state number and N is the nonterminal symbol.  The position of a
+    # transition in this list is its index in the relations computed below.
     #
     # The input C is the set of LR(0) items.
     # -----------------------------------------------------------------------------
 
     def find_nonterminal_transitions(self, C):
-        trans = []
+        trans = {}
         for stateno, state in enumerate(C):
             for p in state:
                 if p.lr_index < p.len - 1:
                     t = (stateno, p.prod[p.lr_index+1])
                     if t[1] in self.grammar.Nonterminals:
                         if t not in trans:
-                            trans.append(t)
-        return trans
+                            trans[t] = len(trans)
+        return list(trans)
 
     # -----------------------------------------------------------------------------
     # dr_relation()
@@ -1510,34 +1559,35 @@ class LRTable:
     # Computes the DR(p,A) relationships for non-terminal transitions.  The input
     # is a tuple (state,N) where state is a number and N is a nonterminal symbol.
     #
-    # Returns a list of terminals.
+    # Returns a bitset of terminals.
     # -----------------------------------------------------------------------------
 
     def dr_relation(self, C, trans, nullable):
         state, N = trans
-        terms = []
+        bits = self.grammar.TerminalBits
+        terms = 0
 
         g = self.lr0_goto(C[state], N)
         for p in g:
             if p.lr_index < p.len - 1:
                 a = p.prod[p.lr_index+1]
                 if a in self.grammar.Terminals:
-                    if a not in terms:
-                        terms.append(a)
+                    terms |= bits[a]
 
         # This extra bit is to handle the start state
         if state == 0 and N == self.grammar.Productions[0].prod[0]:
-            terms.append('$end')
+            terms |= bits['$end']
 
         return terms
 
     # -----------------------------------------------------------------------------
     # reads_relation()
     #
-    # Computes the READS() relation (p,A) READS (t,C).
+    # Computes the READS() relation (p,A) READS (t,C).  Returns the indices of
+    # the related transitions, given the dictionary of transition indices.
     # -----------------------------------------------------------------------------
 
-    def reads_relation(self, C, trans, empty):
+    def reads_relation(self, C, trans, empty, transindex):
         # Look for empty transitions
         rel = []
         state, N = trans
@@ -1548,7 +1598,7 @@ class LRTable:
             if p.lr_index < p.len - 1:
                 a = p.prod[p.lr_index + 1]
                 if a in empty:
-                    rel.append((j, a))
+                    rel.append(transindex[(j, a)])
 
         return rel
 
@@ -1562,8 +1612,8 @@ class LRTable:
     # This relation is determined by running the LR(0) state machine forward.
     # For example, starting with a production "N : . A B C", we run it forward
     # to obtain "N : A B C ."   We then build a relationship between this final
-    # state and the starting state.   These relationships are stored in a dictionary
-    # lookdict.
+    # state and the starting state.   These relationships are stored in a list
+    # indexed by transition.
     #
     # INCLUDES:
     #
@@ -1578,21 +1628,22 @@ class LRTable:
     # L is essentially a prefix (which may be empty), T is a suffix that must be
     # able to derive an empty string.  State p' must lead to state p with the string L.
     #
+    # Both relations are returned as lists indexed by transition number; the
+    # includes relation holds transition indices.
     # -----------------------------------------------------------------------------
 
     def compute_lookback_includes(self, C, trans, nullable):
-        lookdict = {}          # Dictionary of lookback relations
-        includedict = {}       # Dictionary of include relations
+        lookback = [None] * len(trans)          # Lookback relations
+        includes = [[] for _ in trans]          # Include relations
 
         # Make a dictionary of non-terminal transitions
         dtrans = {}
-        for t in trans:
-            dtrans[t] = 1
+        for i, t in enumerate(trans):
+            dtrans[t] = i
 
         # Loop over all transitions and compute lookbacks and includes
-        for state, N in trans:
+        for index, (state, N) in enumerate(trans):
             lookb = []
-            includes = []
             for p in C[state]:
                 if p.name != N:
                     continue
@@ -1621,7 +1672,7 @@ class LRTable:
                             li = li + 1
                         else:
                             # Appears to be a relation between (j,t) and (state,N)
-                            includes.append((j, t))
+                            includes[dtrans[(j, t)]].append(index)
 
                     g = self.lr0_goto(C[j], t)               # Go to next set
                     j = self.lr0_cidhash.get(id(g), -1)      # Go to next state
@@ -1640,13 +1691,9 @@ class LRTable:
                         i = i + 1
                     else:
                         lookb.append((j, r))
-            for i in includes:
-                if i not in includedict:
-                    includedict[i] = []
-                includedict[i].append((state, N))
-            lookdict[(state, N)] = lookb
+            lookback[index] = lookb
 
-        return lookdict, includedict
+        return lookback, includes
 
     # -----------------------------------------------------------------------------
     # compute_read_sets()
@@ -1657,13 +1704,14 @@ class LRTable:
     #          ntrans   = Set of nonterminal transitions
     #          nullable = Set of empty transitions
     #
-    # Returns a set containing the read sets
+    # Returns a list of read set bitsets indexed by transition
     # -----------------------------------------------------------------------------
 
     def compute_read_sets(self, C, ntrans, nullable):
-        FP = lambda x: self.dr_relation(C, x, nullable)
-        R =  lambda x: self.reads_relation(C, x, nullable)
-        F = digraph(ntrans, R, FP)
+        transindex = {t: i for i, t in enumerate(ntrans)}
+        FP = [self.dr_relation(C, x, nullable) for x in ntrans]
+        R = [self.reads_relation(C, x, nullable, transindex) for x in ntrans]
+        F = digraph(len(ntrans), R, FP)
         return F
 
     # -----------------------------------------------------------------------------
@@ -1679,13 +1727,11 @@ class LRTable:
     #            readsets   = Readset (previously computed)
     #            inclsets   = Include sets (previously computed)
     #
-    # Returns a set containing the follow sets
+    # Returns a list of follow set bitsets indexed by transition
     # -----------------------------------------------------------------------------
 
     def compute_follow_sets(self, ntrans, readsets, inclsets):
-        FP = lambda x: readsets[x]
-        R  = lambda x: inclsets.get(x, [])
-        F = digraph(ntrans, R, FP)
+        F = digraph(len(ntrans), inclsets, readsets)
         return F
 
     # -----------------------------------------------------------------------------
@@ -1701,15 +1747,16 @@ class LRTable:
     # -----------------------------------------------------------------------------
 
     def add_lookaheads(self, lookbacks, followset):
-        for trans, lb in lookbacks.items():
+        # Lookaheads are accumulated as bitsets and only converted to symbol lists at the end
+        lookaheads = {}
+        for trans, lb in enumerate(lookbacks):
+            f = followset[trans]
             # Loop over productions in lookback
             for state, p in lb:
-                if state not in p.lookaheads:
-                    p.lookaheads[state] = []
-                f = followset.get(trans, [])
-                for a in f:
-                    if a not in p.lookaheads[state]:
-                        p.lookaheads[state].append(a)
+                key = (state, p)
+                lookaheads[key] = lookaheads.get(key, 0) | f
+        for (state, p), f in lookaheads.items():
+            p.lookaheads[state] = self.grammar.bits_to_symbols(f)
 
     # -----------------------------------------------------------------------------
     # add_lalr_lookaheads()
@@ -1719,6 +1766,9 @@ class LRTable:
     # -----------------------------------------------------------------------------
 
     def add_lalr_lookaheads(self, C):
+        # Make sure every terminal has its bit
+        self.grammar.terminal_bits()
+
         # Determine all of the nullable nonterminals
         nullable = self.compute_nullable_nonterminals()
 
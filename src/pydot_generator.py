@@ -1,19 +1,194 @@
-import pydot
+import os
+import subprocess
+import tempfile
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import count
+from typing import BinaryIO, Dict, List, TextIO
+
 from src.syntax_tree import Node
 
 
+def quote(text: str) -> str:
+    # a DOT quoted string: backslashes and quotes are escaped, line breaks become \n escapes
+    text = text.replace("\\", "\\\\").replace('"', '\\"').replace("\r", "\\r").replace("\n", "\\n")
+    return f'"{text}"'
+
+
+class DrawingLimits:
+    # Keeps drawings of large trees readable. Nodes which are not drawn are replaced by summary nodes
+    # which count them: past node_budget drawn nodes, below depth_limit, and in homogeneous runs longer
+    # than collapse_limit, which are chains of nodes with the same tag (binary expression spines,
+    # nested whiles) and long lists of children (statement lists).
+    def __init__(self, node_budget: int = None, depth_limit: int = None, collapse_limit: int = None):
+        self.node_budget = node_budget
+        self.depth_limit = depth_limit
+        self.collapse_limit = collapse_limit
+
+
+class Summary:
+    # a summary node, drawn for hidden nodes, above the drawn children of a collapsed chain
+    def __init__(self, name: str, hidden: int, description: str, children: List[Node] = ()):
+        self.name = name
+        self.hidden = hidden
+        self.description = description
+        self.children = children
+
+    def __str__(self):
+        return f"... {self.hidden} nodes{self.description}"
+
+
+def subtree_size(root: Node) -> int:
+    size = 0
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        size += 1
+        stack.extend(node.children)
+    return size
+
+
+def hidden_size(item) -> int:
+    if isinstance(item, Summary):
+        return item.hidden + sum(subtree_size(child) for child in item.children)
+    return subtree_size(item)
+
+
 class PyDotGenerator:
-    def __init__(self, tree_name: str, tree_root: Node):
+    # Writes the syntax tree as DOT text while walking it, without building a graph in memory.
+    # Graphviz is only run to render SVG. Detached nodes are drawn without their subtrees, which
+    # are drawn elsewhere (see detached_description).
+
+    def __init__(self, tree_name: str, tree_root: Node, limits: DrawingLimits = None, detached=None):
+        self.tree_name = tree_name
         self.tree_root: Node = tree_root
-        self.pydot_tree: pydot.Dot = pydot.Dot(tree_name, graph_type="graph")
-
-    def generate(self):
-        self.pydot_tree.add_node(pydot.Node(self.tree_root.id, label=str(self.tree_root)))
-        self.traverse_tree(self.tree_root)
-        return self.pydot_tree
-
-    def traverse_tree(self, parent: Node):
-        for child in parent.children:
-            self.pydot_tree.add_node(pydot.Node(child.id, label=str(child)))
-            self.pydot_tree.add_edge(pydot.Edge(parent.id, child.id))
-            self.traverse_tree(child)
+        self.limits = limits or DrawingLimits()
+        self.detached: Dict[int, str] = detached or {}  # node id -> where its subtree is drawn
+        self.summaries = count()
+
+    @staticmethod
+    def name(item) -> str:
+        return item.name if isinstance(item, Summary) else str(item.id)
+
+    def summary(self, hidden: int, description: str = "", children=()) -> Summary:
+        return Summary(f"s{next(self.summaries)}", hidden, description, children)
+
+    def drawn_children(self, node, depth: int) -> list:
+        children = node.children
+        if not children or isinstance(node, Summary):
+            return children
+        if node.id in self.detached:
+            return [self.summary(sum(map(subtree_size, children)), f", drawn in {self.detached[node.id]}")]
+        limits = self.limits
+        if limits.depth_limit is not None and depth >= limits.depth_limit:
+            return [self.summary(sum(map(subtree_size, children)))]
+        if limits.collapse_limit is None:
+            return children
+        children = list(children)
+        chain = self.chain(node)
+        if len(chain) > limits.collapse_limit:
+            # the first and the last node of the chain are drawn, with a summary between them
+            hidden = 0
+            for link, next_link in zip(chain[1:-1], chain[2:]):
+                hidden += 1 + sum(subtree_size(child) for child in link.children if child is not next_link)
+            children[children.index(chain[1])] = self.summary(hidden, f" in a chain of {node.tag}", [chain[-1]])
+        if len(children) > limits.collapse_limit:
+            head = limits.collapse_limit // 2
+            tail = len(children) - (limits.collapse_limit - head)
+            middle = children[head:tail]
+            children[head:tail] = [self.summary(sum(map(hidden_size, middle)), f" in {len(middle)} children")]
+        return children
+
+    @staticmethod
+    def chain(node: Node) -> List[Node]:
+        # node and its descendants down the only child with the same tag
+        chain = [node]
+        while True:
+            same = [child for child in chain[-1].children if child.tag == node.tag]
+            if len(same) != 1:
+                return chain
+            chain.append(same[0])
+
+    def write_dot(self, file: TextIO):
+        file.write(f"graph {quote(self.tree_name)} {{\n")
+        file.write(f"{self.tree_root.id} [label={quote(str(self.tree_root))}];\n")
+        self.traverse_tree(self.tree_root, file)
+        file.write("}\n")
+
+    def traverse_tree(self, root: Node, file: TextIO):
+        # depth first in the order of the recursive walk, with an explicit stack of child iterators
+        write = file.write
+        name = self.name
+        budget = self.limits.node_budget
+        drawn = 1
+        stack = [(root, iter(self.drawn_children(root, 0)))]
+        while stack:
+            parent, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                continue
+            if budget is not None and drawn >= budget:
+                # the rest of the children of every open node is summarized once
+                hidden = hidden_size(child) + sum(map(hidden_size, children))
+                child = self.summary(hidden, ", over the node budget")
+            drawn += 1
+            write(f"{name(child)} [label={quote(str(child))}];\n{name(parent)} -- {name(child)};\n")
+            stack.append((child, iter(self.drawn_children(child, len(stack)))))
+
+    def write_dot_file(self, path: str):
+        with open(path, "w") as f:
+            self.write_dot(f)
+
+    def write_svg(self, path: str):
+        # the DOT text is streamed into dot; its diagnostics go to a file so a full pipe cannot block it
+        with tempfile.TemporaryFile() as errors:
+            process = subprocess.Popen(["dot", "-Tsvg", "-o", path], stdin=subprocess.PIPE, stderr=errors,
+                                       text=True)
+            try:
+                self.write_dot(process.stdin)
+            except BrokenPipeError:
+                pass  # dot exited early, its status and diagnostics tell why
+            finally:
+                try:
+                    process.stdin.close()
+                except BrokenPipeError:
+                    pass
+            check_dot(process.wait(), errors, path)
+
+
+def render_svg(dot_path: str, svg_path: str):
+    # runs in the worker processes of SvgRenderer, the DOT file is written for it and removed here
+    try:
+        with tempfile.TemporaryFile() as errors:
+            check_dot(subprocess.call(["dot", "-Tsvg", "-o", svg_path, dot_path], stderr=errors), errors, svg_path)
+    finally:
+        os.remove(dot_path)
+
+
+def check_dot(status: int, errors: BinaryIO, path: str):
+    if status != 0:
+        errors.seek(0)
+        raise RuntimeError(f"dot could not render {path}: {errors.read().decode(errors='replace').strip()}")
+
+
+class SvgRenderer:
+    # Renders syntax tree SVGs in worker processes, at most max_workers at a time, so Graphviz layout
+    # overlaps with the rest of the compilation. The DOT text is written by the caller, which holds the tree.
+
+    def __init__(self, max_workers: int = None):
+        self.executor = ProcessPoolExecutor(max_workers)
+
+    def submit(self, generator: PyDotGenerator, svg_path: str) -> Future:
+        dot_path = f"{os.path.splitext(svg_path)[0]}.dot"
+        generator.write_dot_file(dot_path)
+        return self.executor.submit(render_svg, dot_path, svg_path)
+
+    def shutdown(self):
+        # waits for the submitted renderings
+        self.executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
@@ -1,11 +1,18 @@
+import io
+from array import array
 from enum import Enum
-from typing import Tuple, Optional, List, Dict
+from typing import Tuple, Optional, List, Dict, Iterator, TextIO
 
 from src.lexer import Token
 
 
+def align(offset: int, alignment: int) -> int:
+    return -(-offset // alignment) * alignment
+
+
 class DataType(Enum):
-    REAL = ("REAL", 8)
+    # the width is the size of the C type emitted for the data type, a float for REAL
+    REAL = ("REAL", 4)
     INTEGER = ("INTEGER", 4)
     # we don't support boolean data types. this is just for expressions types during code generation
     BOOLEAN = ("BOOLEAN", 1)
@@ -31,10 +38,22 @@ class Entry:
         self.data_type: DataType = data_type
         self.entry_type = entry_type
         self.symbol_table = symbol_table
+        # the C access path, rendered once for the entry type it was rendered for
+        self.lvalue: str = None
+        self.lvalue_entry_type: EntryType = None
+        # accesses in the generated code, weighted by the nesting of the loops they are in
+        self.accesses: int = 0
 
     def __str__(self):
+        # parameters start as declarations and are retyped later, which renders them again
+        if self.lvalue_entry_type is not self.entry_type:
+            self.lvalue = self.render()
+            self.lvalue_entry_type = self.entry_type
+        return self.lvalue
+
+    def render(self):
         if self.entry_type == EntryType.CONSTANT:
-            return str(self.token.attribute)
+            return self.symbol_table.constants.render(self)
         if self.symbol_table.parent is None:  # entry in program
             if self.entry_type == EntryType.TEMPORARY:
                 return f"temporary_{self.data_type.name}[{self.token.attribute - 1}]"
@@ -54,6 +73,44 @@ class Entry:
                f"data_type: {self.data_type}, entry_type: {self.entry_type})"
 
 
+class ConstantPool:
+    # The literals of a compilation unit, shared by all its scopes: one entry per data type and value,
+    # so 4.0 and 4.00 are one constant wherever they are used. The values are kept in typed arrays,
+    # and the offset of an entry is its slot in the array of its data type.
+    typecodes = {
+        DataType.INTEGER: "q",
+        DataType.REAL: "d",
+        DataType.BOOLEAN: "b",
+    }
+
+    def __init__(self, symbol_table: 'SymbolTable'):
+        self.symbol_table = symbol_table
+        self.entries: Dict[Tuple[DataType, object], Entry] = {}
+        self.values = {data_type: array(typecode) for data_type, typecode in self.typecodes.items()}
+        # real constants are rendered as elements of a static const float array instead of double literals
+        self.static_reals = False
+
+    def insert(self, literal: Token, data_type: DataType) -> Entry:
+        key = (data_type, literal.attribute)
+        entry = self.entries.get(key)
+        if entry is None:
+            values = self.values[data_type]
+            slot = len(values)
+            try:
+                values.append(literal.attribute)
+            except OverflowError:  # an integer beyond 64 bits, kept as is
+                values = self.values[data_type] = list(values)
+                values.append(literal.attribute)
+            entry = self.entries[key] = Entry(literal, slot * data_type.value[1], data_type, EntryType.CONSTANT,
+                                              self.symbol_table)
+        return entry
+
+    def render(self, entry: Entry) -> str:
+        if self.static_reals and entry.data_type == DataType.REAL:
+            return f"constant_REAL[{entry.offset // entry.width}]"
+        return str(entry.token.attribute)
+
+
 class SymbolTable:
     def __init__(self, header: Token, parent: 'SymbolTable' = None):
         self.header = header
@@ -61,7 +118,21 @@ class SymbolTable:
         self.begin_code_label = None
         self.entries: Dict[str, Entry] = {}
         self.procedures: Dict[str, SymbolTable] = {}
+        # Flattened views of the names visible from this scope, filled by the lookups, so a repeated
+        # lookup is one probe whatever the nesting depth. The holders map a lexeme to the scopes whose
+        # views hold it; they are shared by the whole scope tree, and an insertion drops the lexeme from
+        # the views of its holders, which may resolve it differently from then on.
+        self.visible_entries: Dict[str, Entry] = {}
+        self.visible_procedures: Dict[str, SymbolTable] = {}
+        self.entry_holders: Dict[str, List[SymbolTable]] = parent.entry_holders if parent else {}
+        self.procedure_holders: Dict[str, List[SymbolTable]] = parent.procedure_holders if parent else {}
         self.parameters: List[Entry] = None
+        # temporaries live apart from the named entries, in a pool per data type indexed by slot: the slots
+        # below next_available_temporary are in use, and a pool only grows when all its slots are
+        self.temporaries: Dict[DataType, List[Entry]] = {
+            DataType.INTEGER: [],
+            DataType.REAL: []
+        }
         self.next_available_temporary = {
             DataType.INTEGER: 0,
             DataType.REAL: 0
@@ -70,34 +141,90 @@ class SymbolTable:
             DataType.INTEGER: 0,
             DataType.REAL: 0
         }
+        self.constants: ConstantPool = parent.constants if parent else ConstantPool(self)
         self.offset = 0
+        # set for procedures once their code is generated, see activation_record_layout
+        self.activation_record = None
+        # set once the code of the procedure is generated, its temporary counts are final from then on
+        self.generated = False
 
     def __str__(self):
-        lines = [f"SymbolTable(header: {self.header}):"]
+        buffer = io.StringIO()
+        self.write(buffer)
+        return buffer.getvalue()
+
+    def write(self, file: TextIO):
+        # the lines are written as they are made, without a trailing line break
+        lines = self.lines()
+        file.write(next(lines))
+        for line in lines:
+            file.write("\n")
+            file.write(line)
+
+    def lines(self) -> Iterator[str]:
+        # depth first in one pass, with the procedures left to write of every open scope on a stack, so a
+        # line is made once whatever the nesting depth
+        yield from self.scope_lines("")
+        stack = [("\t\t", iter(self.procedures.items()))]
+        while stack:
+            indent, procedures = stack[-1]
+            lexeme, procedure = next(procedures, (None, None))
+            if procedure is None:
+                stack.pop()
+                continue
+            yield f"{indent[:-1]}procedure: {lexeme} -> "
+            yield from procedure.scope_lines(indent)
+            stack.append((f"{indent}\t\t", iter(procedure.procedures.items())))
+
+    def scope_lines(self, indent: str) -> Iterator[str]:
+        yield f"{indent}SymbolTable(header: {self.header}):"
         for lexeme, entry in self.entries.items():
-            lines.append(f"\tentry: {lexeme} -> {entry.to_string()}")
-        for lexeme, procedure in self.procedures.items():
-            lines.append(f"\tprocedure: {lexeme} -> ")
-            lines.extend(f"\t\t{line}" for line in str(procedure).splitlines())
-        return "\n".join(lines)
+            yield f"{indent}\tentry: {lexeme} -> {entry.to_string()}"
+        if self.parent is None:
+            for entry in self.constants.entries.values():
+                yield f"{indent}\tconstant: {entry.token.attribute} -> {entry.to_string()}"
+        for data_type, count in self.max_count_of_temporary.items():
+            if count > 0:
+                yield f"{indent}\ttemporaries: {data_type.name} -> {count}"
+        if self.activation_record is not None:
+            yield f"{indent}\tactivation record: {self.activation_record.size} bytes, " \
+                  f"cache lines: {self.activation_record.cache_lines}"
 
     def set_begin_code_label(self, label):
         self.begin_code_label = label
 
     def insert_entry(self, identifier: Token, data_type: DataType, entry_type: EntryType):
+        if entry_type == EntryType.CONSTANT:
+            return self.constants.insert(identifier, data_type), None
         lexeme = identifier.lexeme
         warning = None
         if lexeme in self.entries:
             entry = self.entries[lexeme]
-            if entry.entry_type == EntryType.CONSTANT:
-                return entry, None
             warning = Warning(f"Entry {entry.to_string()} already exists in the symbol table. "
                               f"Token {identifier} shadows it.")
+        width = data_type.value[1]
+        self.offset = align(self.offset, width)
         entry = Entry(identifier, self.offset, data_type, entry_type, self)
         self.entries[lexeme] = entry
-        self.offset += entry.width
+        self.offset += width
+        for holder in self.entry_holders.pop(lexeme, ()):
+            del holder.visible_entries[lexeme]
         return entry, warning
 
+    def allocate_temporary(self, data_type: DataType) -> Entry:
+        slot = self.next_available_temporary[data_type]
+        pool = self.temporaries[data_type]
+        if slot == len(pool):
+            # the token only names the entry, its attribute is the one based slot number
+            token = Token("ID", f"temporary_{data_type.name}_{slot + 1}", slot + 1, 0)
+            pool.append(Entry(token, slot * data_type.value[1], data_type, EntryType.TEMPORARY, self))
+            self.max_count_of_temporary[data_type] = len(pool)
+        self.next_available_temporary[data_type] = slot + 1
+        return pool[slot]
+
+    def free_temporary(self, data_type: DataType):
+        self.next_available_temporary[data_type] -= 1
+
     def insert_procedure(self, identifier: Token):
         lexeme = identifier.lexeme
         warning = None
@@ -106,22 +233,34 @@ class SymbolTable:
                               f"Token {identifier} shadows it.")
         symbol_table = SymbolTable(identifier, self)
         self.procedures[lexeme] = symbol_table
+        for holder in self.procedure_holders.pop(lexeme, ()):
+            del holder.visible_procedures[lexeme]
         return symbol_table, warning
 
     def lookup_entries(self, identifier: Token):
-        lexeme = identifier.lexeme
-        current = self
-        while current is not None:
-            if lexeme in current.entries:
-                return current.entries[lexeme]
-            current = current.parent
-        return None
+        return self.lookup_lexeme(identifier.lexeme)
+
+    def lookup_lexeme(self, lexeme: str):
+        entry = self.visible_entries.get(lexeme)
+        if entry is None:
+            current = self
+            while current is not None:
+                if lexeme in current.entries:
+                    entry = self.visible_entries[lexeme] = current.entries[lexeme]
+                    self.entry_holders.setdefault(lexeme, []).append(self)
+                    break
+                current = current.parent
+        return entry
 
     def lookup_procedure(self, identifier: Token):
         lexeme = identifier.lexeme
-        current = self
-        while current is not None:
-            if lexeme in current.procedures:
-                return current.procedures[lexeme]
-            current = current.parent
-        return None
+        procedure = self.visible_procedures.get(lexeme)
+        if procedure is None:
+            current = self
+            while current is not None:
+                if lexeme in current.procedures:
+                    procedure = self.visible_procedures[lexeme] = current.procedures[lexeme]
+                    self.procedure_holders.setdefault(lexeme, []).append(self)
+                    break
+                current = current.parent
+        return procedure
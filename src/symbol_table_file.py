@@ -0,0 +1,142 @@
+import struct
+from typing import List
+
+from src.activation_record_layout import ActivationRecordLayout
+from src.symbol_table import SymbolTable, DataType, EntryType, Entry
+from src.syntax_tree_cache import TokenWriter, TokenReader, COUNT, NONE, DATA_TYPES, DATA_TYPE_CODES
+
+
+# Compact binary form of a symbol table, for tools which would otherwise parse the .symbols text.
+#
+# Layout (little endian): magic, the strings and tokens sections of the syntax tree cache, integer literals
+# beyond 64 bits included, then sections of fixed size records, each preceded by its count:
+#   scopes       header (I), parent scope (I), entry count (I), flags (B), in preorder
+#   entries      token (I), offset (I), data type (B), entry type (B), accesses (Q), of the scopes in order
+#   temporaries  the pool size of every data type with temporaries (I), of the scopes in order
+#   accesses     the accesses of the temporaries (Q), of the scopes and pools in order
+#   constants    token (I), data type (B)
+# The offsets of the activation records are stored, and laid out again identically when read back, as
+# the accesses they were laid out from are stored too.
+
+MAGIC = b"PASCAL-SYMBOL-TABLE-2\n"
+
+SCOPE = struct.Struct("<IIIB")
+ENTRY = struct.Struct("<IIBBQ")
+CONSTANT = struct.Struct("<IB")
+
+ENTRY_TYPES = list(EntryType)
+ENTRY_TYPE_CODES = {entry_type: code for code, entry_type in enumerate(ENTRY_TYPES)}
+# the data types temporaries are allocated for
+TEMPORARY_TYPES = [DataType.INTEGER, DataType.REAL]
+
+FLAG_ACTIVATION_RECORD = 1
+FLAG_STATIC_REALS = 2
+
+
+class SymbolTableWriter(TokenWriter):
+    def __init__(self):
+        super().__init__()
+        self.scope_records = bytearray()
+        self.entry_records = bytearray()
+        self.temporaries: List[int] = []
+        self.accesses: List[int] = []
+        self.constant_records = bytearray()
+
+    def write_scopes(self, root: SymbolTable):
+        stack = [(root, NONE)]
+        index = 0
+        while stack:
+            symbol_table, parent = stack.pop()
+            flags = FLAG_ACTIVATION_RECORD if symbol_table.activation_record is not None else 0
+            if parent == NONE and symbol_table.constants.static_reals:
+                flags |= FLAG_STATIC_REALS
+            self.scope_records += SCOPE.pack(self.token(symbol_table.header), parent, len(symbol_table.entries),
+                                             flags)
+            for entry in symbol_table.entries.values():
+                self.entry_records += ENTRY.pack(self.token(entry.token), entry.offset,
+                                                 DATA_TYPE_CODES[entry.data_type],
+                                                 ENTRY_TYPE_CODES[entry.entry_type], entry.accesses)
+            for data_type in TEMPORARY_TYPES:
+                pool = symbol_table.temporaries[data_type]
+                self.temporaries.append(len(pool))
+                self.accesses.extend(entry.accesses for entry in pool)
+            # reversed, so they are popped in order
+            stack.extend((procedure, index) for procedure in reversed(symbol_table.procedures.values()))
+            index += 1
+
+    def dumps(self, root: SymbolTable) -> bytes:
+        self.write_scopes(root)
+        for entry in root.constants.entries.values():
+            self.constant_records += CONSTANT.pack(self.token(entry.token), DATA_TYPE_CODES[entry.data_type])
+        data = bytearray(MAGIC)
+        self.write_tokens(data)
+        for records, record in ((self.scope_records, SCOPE), (self.entry_records, ENTRY)):
+            data += COUNT.pack(len(records) // record.size)
+            data += records
+        for code, values in (("I", self.temporaries), ("Q", self.accesses)):
+            data += COUNT.pack(len(values))
+            data += struct.pack(f"<{len(values)}{code}", *values)
+        data += COUNT.pack(len(self.constant_records) // CONSTANT.size)
+        data += self.constant_records
+        return bytes(data)
+
+
+class SymbolTableReader(TokenReader):
+    def __init__(self, data: bytes):
+        super().__init__(data, MAGIC, "binary symbol table")
+
+    def read_scopes(self) -> SymbolTable:
+        tokens = self.tokens
+        scopes = list(self.records(SCOPE))
+        entries = iter(self.records(ENTRY))
+        temporaries = iter(self.values("I"))
+        accesses = iter(self.values("Q"))
+        symbol_tables: List[SymbolTable] = []
+        laid_out: List[SymbolTable] = []
+        for header, parent, entry_count, flags in scopes:
+            if parent == NONE:
+                symbol_table = SymbolTable(tokens[header])
+                symbol_table.constants.static_reals = bool(flags & FLAG_STATIC_REALS)
+            else:
+                symbol_table, _ = symbol_tables[parent].insert_procedure(tokens[header])
+            for _ in range(entry_count):
+                token, offset, data_type, entry_type, entry_accesses = next(entries)
+                entry = Entry(tokens[token], offset, DATA_TYPES[data_type], ENTRY_TYPES[entry_type], symbol_table)
+                entry.accesses = entry_accesses
+                symbol_table.entries[entry.token.lexeme] = entry
+                symbol_table.offset = max(symbol_table.offset, offset + entry.width)
+            parameters = [entry for entry in symbol_table.entries.values()
+                          if entry.entry_type == EntryType.PARAMETER]
+            if parameters:
+                symbol_table.parameters = parameters
+            for data_type in TEMPORARY_TYPES:
+                for _ in range(next(temporaries)):
+                    symbol_table.allocate_temporary(data_type).accesses = next(accesses)
+                symbol_table.next_available_temporary[data_type] = 0
+            if flags & FLAG_ACTIVATION_RECORD:
+                laid_out.append(symbol_table)
+            symbol_tables.append(symbol_table)
+        for symbol_table in laid_out:
+            symbol_table.activation_record = ActivationRecordLayout(symbol_table)
+        return symbol_tables[0]
+
+    def read_constants(self, root: SymbolTable):
+        for token, data_type in self.records(CONSTANT):
+            root.constants.insert(self.tokens[token], DATA_TYPES[data_type])
+
+    def loads(self) -> SymbolTable:
+        self.read_strings()
+        self.read_tokens()
+        root = self.read_scopes()
+        self.read_constants(root)
+        return root
+
+
+def write_symbol_table_file(symbol_table: SymbolTable, path: str):
+    with open(path, "wb") as f:
+        f.write(SymbolTableWriter().dumps(symbol_table))
+
+
+def read_symbol_table_file(path: str) -> SymbolTable:
+    with open(path, "rb") as f:
+        return SymbolTableReader(f.read()).loads()
@@ -0,0 +1,321 @@
+from array import array
+from enum import IntEnum
+from typing import Dict, Iterator, List
+
+from src.errors import SemanticError
+from src.lexer import Token
+from src.ply.code_generator_base import CodeGeneratorBase
+from src.symbol_table import DataType
+from src.syntax_tree import BinaryExpression, UnaryExpression, TerminalExpression, PrintStatement, \
+    AssignmentStatement, WhileStatement, IfStatement, IfElseStatement, CompoundStatement, ProcedureCallStatement, \
+    Declaration, Parameters, Procedure, Program, ExpressionAttributes, StatementAttributes
+
+
+# Struct-of-arrays storage for syntax trees: a node is an index into parallel arrays instead of
+# an object. Children are linked through first_child and next_sibling, tokens are referenced by
+# their index in tokens and data types by their index in DATA_TYPES.
+
+
+class NodeKind(IntEnum):
+    PROGRAM = 0
+    DECLARATIONS = 1
+    DECLARATION = 2
+    IDENTIFIER = 3
+    PROCEDURES = 4
+    PROCEDURE = 5
+    PARAMETERS = 6
+    COMPOUND_STATEMENT = 7
+    PRINT = 8
+    ASSIGNMENT = 9
+    WHILE = 10
+    IF = 11
+    IF_ELSE = 12
+    PROCEDURE_CALL = 13
+    ARGUMENTS = 14
+    ERROR = 15
+    BINARY_EXPRESSION = 16
+    UNARY_EXPRESSION = 17
+    TERMINAL_EXPRESSION = 18
+
+
+# the tags of the equivalent syntax tree nodes
+TAGS = {
+    NodeKind.PROGRAM: "program",
+    NodeKind.DECLARATIONS: "declarations",
+    NodeKind.DECLARATION: "declaration",
+    NodeKind.IDENTIFIER: "identifier",
+    NodeKind.PROCEDURES: "procedures",
+    NodeKind.PROCEDURE: "procedure",
+    NodeKind.PARAMETERS: "parameters",
+    NodeKind.COMPOUND_STATEMENT: "compound_statement",
+    NodeKind.PRINT: "print",
+    NodeKind.ASSIGNMENT: "assignment",
+    NodeKind.WHILE: "while",
+    NodeKind.IF: "if",
+    NodeKind.IF_ELSE: "if_else",
+    NodeKind.PROCEDURE_CALL: "procedure_call",
+    NodeKind.ARGUMENTS: "arguments",
+    NodeKind.ERROR: "error",
+    NodeKind.BINARY_EXPRESSION: "binary_expression",
+    NodeKind.UNARY_EXPRESSION: "unary_expression",
+    NodeKind.TERMINAL_EXPRESSION: "identifier_or_constant",
+}
+
+DATA_TYPES: List[DataType] = list(DataType)
+DATA_TYPE_CODES: Dict[DataType, int] = {data_type: code for code, data_type in enumerate(DATA_TYPES)}
+NONE = -1  # no node, token or data type
+
+
+class SyntaxArena:
+    def __init__(self):
+        self.kind = array("B")
+        self.first_child = array("i")
+        self.next_sibling = array("i")
+        self.token = array("i")
+        # declared type of declarations, type found by code generation for expressions
+        self.data_type = array("b")
+        self.tokens: List[Token] = []
+        self.root = NONE
+        # last child of the lists which were appended to, so appending does not walk the siblings
+        self.last_child: Dict[int, int] = {}
+
+    def __len__(self):
+        return len(self.kind)
+
+    def add_node(self, kind: NodeKind, token: Token = None, children=(), data_type: DataType = None) -> int:
+        node = len(self.kind)
+        self.kind.append(kind)
+        self.first_child.append(children[0] if children else NONE)
+        self.next_sibling.append(NONE)
+        if token is None:
+            self.token.append(NONE)
+        else:
+            self.token.append(len(self.tokens))
+            self.tokens.append(token)
+        self.data_type.append(NONE if data_type is None else DATA_TYPE_CODES[data_type])
+        for previous, child in zip(children, children[1:]):
+            self.next_sibling[previous] = child
+        return node
+
+    def add_child(self, parent: int, child: int):
+        last = self.last_child.get(parent, NONE)
+        if last == NONE:
+            last = self.first_child[parent]
+            if last == NONE:
+                self.first_child[parent] = child
+                self.last_child[parent] = child
+                return
+            while self.next_sibling[last] != NONE:
+                last = self.next_sibling[last]
+        self.next_sibling[last] = child
+        self.last_child[parent] = child
+
+    def children(self, node: int) -> Iterator[int]:
+        child = self.first_child[node]
+        while child != NONE:
+            yield child
+            child = self.next_sibling[child]
+
+    def token_of(self, node: int) -> Token:
+        index = self.token[node]
+        return None if index == NONE else self.tokens[index]
+
+    def data_type_of(self, node: int) -> DataType:
+        code = self.data_type[node]
+        return None if code == NONE else DATA_TYPES[code]
+
+    def set_data_type(self, node: int, data_type: DataType):
+        self.data_type[node] = NONE if data_type is None else DATA_TYPE_CODES[data_type]
+
+    def program_name(self) -> Token:
+        if self.root != NONE and self.kind[self.root] == NodeKind.PROGRAM:
+            return self.token_of(self.root)
+        return None
+
+    def visit(self, code_generator: CodeGeneratorBase):
+        # same order as Node.visit: a walker yields the nodes to visit and gets back their attributes
+        stack = [WALKERS[self.kind[self.root]](self, self.root, code_generator)]
+        attributes = None
+        while stack:
+            try:
+                node = stack[-1].send(attributes)
+            except StopIteration as stop:
+                stack.pop()
+                attributes = stop.value
+                continue
+            stack.append(WALKERS[self.kind[node]](self, node, code_generator))
+            attributes = None
+
+
+# The walkers run the code generation phases of src.syntax_tree over arena nodes. Every walker
+# is a generator, even the ones which have nothing to visit, and returns the attributes of its node.
+
+
+def walk_program(arena: SyntaxArena, node: int, code_generator: CodeGeneratorBase):
+    declarations, procedures, compound_statement = arena.children(node)
+    Program.mark_declarations(code_generator)
+    entrylist = yield declarations
+    unconditional_jump = Program.mark_procedures(code_generator, entrylist)
+    yield procedures
+    Program.mark_compound_statement(code_generator, unconditional_jump)
+    compound_statement = yield compound_statement
+    Program.translate(code_generator, compound_statement)
+
+
+def walk_declarations(arena: SyntaxArena, node: int, code_generator: CodeGeneratorBase):
+    entrylist = []
+    for child in arena.children(node):
+        entrylist.extend((yield child))
+    return entrylist
+
+
+def walk_declaration(arena: SyntaxArena, node: int, code_generator: CodeGeneratorBase):
+    yield from ()  # the identifiers are leaves, nothing to visit
+    identifiers = [arena.token_of(child) for child in arena.children(node)]
+    return Declaration.translate(code_generator, identifiers, arena.data_type_of(node))
+
+
+def walk_procedures(arena: SyntaxArena, node: int, code_generator: CodeGeneratorBase):
+    for child in arena.children(node):
+        yield child
+
+
+def walk_procedure(arena: SyntaxArena, node: int, code_generator: CodeGeneratorBase):
+    parameters, declarations, compound_statement = arena.children(node)
+    symbol_table = Procedure.mark_parameters(code_generator, arena.token_of(node))
+    yield parameters
+    yield declarations
+    compound_statement = yield compound_statement
+    Procedure.translate(code_generator, symbol_table, compound_statement)
+
+
+def walk_parameters(arena: SyntaxArena, node: int, code_generator: CodeGeneratorBase):
+    entrylist = yield arena.first_child[node]
+    Parameters.translate(code_generator, entrylist)
+    return entrylist
+
+
+def walk_compound_statement(arena: SyntaxArena, node: int, code_generator: CodeGeneratorBase):
+    statement = None
+    for child in arena.children(node):
+        if statement is not None:
+            CompoundStatement.mark_statement(code_generator, statement)
+        statement = yield child
+    return statement  # the nextlist of a compound statement is the one of its last statement
+
+
+def walk_print(arena: SyntaxArena, node: int, code_generator: CodeGeneratorBase):
+    expression = yield arena.first_child[node]
+    PrintStatement.translate(code_generator, expression)
+    return StatementAttributes()
+
+
+def walk_assignment(arena: SyntaxArena, node: int, code_generator: CodeGeneratorBase):
+    rvalue = yield arena.first_child[node]
+    AssignmentStatement.translate(code_generator, arena.token_of(node), rvalue)
+    return StatementAttributes()
+
+
+def walk_while(arena: SyntaxArena, node: int, code_generator: CodeGeneratorBase):
+    condition, body = arena.children(node)
+    result = StatementAttributes()
+    marker1 = WhileStatement.mark_condition(code_generator)
+    condition = yield condition
+    marker2 = WhileStatement.mark_body(code_generator, condition)
+    body = yield body
+    WhileStatement.translate(code_generator, result, condition, body, marker1, marker2)
+    return result
+
+
+def walk_if(arena: SyntaxArena, node: int, code_generator: CodeGeneratorBase):
+    condition, body = arena.children(node)
+    result = StatementAttributes()
+    condition = yield condition
+    marker = IfStatement.mark_body(code_generator, condition)
+    body = yield body
+    IfStatement.translate(code_generator, result, condition, body, marker)
+    return result
+
+
+def walk_if_else(arena: SyntaxArena, node: int, code_generator: CodeGeneratorBase):
+    condition, then_body, else_body = arena.children(node)
+    result = StatementAttributes()
+    condition = yield condition
+    marker1 = IfStatement.mark_body(code_generator, condition)
+    then_body = yield then_body
+    unconditional_jump, marker3 = IfElseStatement.mark_else_body(code_generator)
+    else_body = yield else_body
+    IfElseStatement.translate(code_generator, result, condition, then_body, else_body,
+                              marker1, unconditional_jump, marker3)
+    return result
+
+
+def walk_procedure_call(arena: SyntaxArena, node: int, code_generator: CodeGeneratorBase):
+    queue = yield arena.first_child[node]
+    ProcedureCallStatement.translate(code_generator, arena.token_of(node), queue)
+    return StatementAttributes()
+
+
+def walk_arguments(arena: SyntaxArena, node: int, code_generator: CodeGeneratorBase):
+    queue = []
+    for child in arena.children(node):
+        expression = yield child
+        queue.append(expression.place)
+    return queue
+
+
+def walk_error(arena: SyntaxArena, node: int, code_generator: CodeGeneratorBase):
+    yield from ()  # a leaf, nothing to visit
+    code_generator.log(SemanticError(
+        f"Could not generate code for malformed statement at token {arena.token_of(node)}."))
+    return StatementAttributes()
+
+
+def walk_binary_expression(arena: SyntaxArena, node: int, code_generator: CodeGeneratorBase):
+    left_operand, right_operand = arena.children(node)
+    binary_operator = arena.token_of(node)
+    result = ExpressionAttributes()
+    left_operand = yield left_operand
+    marker = BinaryExpression.mark_right_operand(code_generator, binary_operator)
+    right_operand = yield right_operand
+    BinaryExpression.translate(code_generator, result, binary_operator, left_operand, right_operand, marker)
+    arena.set_data_type(node, result.type)
+    return result
+
+
+def walk_unary_expression(arena: SyntaxArena, node: int, code_generator: CodeGeneratorBase):
+    result = ExpressionAttributes()
+    operand = yield arena.first_child[node]
+    UnaryExpression.translate(code_generator, result, arena.token_of(node), operand)
+    arena.set_data_type(node, result.type)
+    return result
+
+
+def walk_terminal_expression(arena: SyntaxArena, node: int, code_generator: CodeGeneratorBase):
+    yield from ()  # a leaf, nothing to visit
+    result = ExpressionAttributes()
+    TerminalExpression.translate(code_generator, result, arena.token_of(node))
+    arena.set_data_type(node, result.type)
+    return result
+
+
+WALKERS = {
+    NodeKind.PROGRAM: walk_program,
+    NodeKind.DECLARATIONS: walk_declarations,
+    NodeKind.DECLARATION: walk_declaration,
+    NodeKind.PROCEDURES: walk_procedures,
+    NodeKind.PROCEDURE: walk_procedure,
+    NodeKind.PARAMETERS: walk_parameters,
+    NodeKind.COMPOUND_STATEMENT: walk_compound_statement,
+    NodeKind.PRINT: walk_print,
+    NodeKind.ASSIGNMENT: walk_assignment,
+    NodeKind.WHILE: walk_while,
+    NodeKind.IF: walk_if,
+    NodeKind.IF_ELSE: walk_if_else,
+    NodeKind.PROCEDURE_CALL: walk_procedure_call,
+    NodeKind.ARGUMENTS: walk_arguments,
+    NodeKind.ERROR: walk_error,
+    NodeKind.BINARY_EXPRESSION: walk_binary_expression,
+    NodeKind.UNARY_EXPRESSION: walk_unary_expression,
+    NodeKind.TERMINAL_EXPRESSION: walk_terminal_expression,
+}
@@ -1,35 +1,66 @@
 from abc import ABC, abstractmethod
-from typing import List, Union
+from itertools import count
+from typing import Iterator, List, Tuple, Union
 from src.errors import SemanticError
 from src.lexer import Token
 from src.operator_enum import UnaryOperator, BinaryOperator
 from src.ply.code_generator_base import CodeGeneratorBase
-from src.symbol_table import DataType, EntryType, Entry
+from src.symbol_table import DataType, EntryType, Entry, SymbolTable
 from src.three_address_code import UnaryAssignment, BinaryAssignment, BareAssignment, ConditionalJump, \
     UnconditionalJump, Call, BeginProgram, EndProgram, Label, ThreeAddressCode, Definition, Temporary, \
-    ActivationRecordDefinition, Return, Print
+    ActivationRecordDefinition, Return, Print, Constants, Segment, JumpList, NO_JUMPS
+
+
+# Code generation of every node is split into static phases: 'mark_*' phases run between
+# the children of a node and 'translate' runs after all of them. walk() calls them around
+# the visits of the children, while the one-pass translator (src.translator) calls them from
+# reduction actions with attribute records in place of the nodes.
+#
+# Nodes are slotted and keep each child only once, in children; named accessors are properties
+# over children and leaf. Backpatch lists are JumpLists, the nodes without pending jumps share
+# the empty one.
+
+NO_CHILDREN: Tuple['Node', ...] = ()  # shared by the leaves, replaced by a list on the first child
 
 
 class Node(ABC):
+    __slots__ = ("id", "tag", "children", "leaf", "parent")
+    # nodes are numbered in creation order, from zero for every parse (see reset_ids)
+    ids = count()
+
     def __init__(self, tag=None, children: List['Node'] = None, leaf=None, parent: 'Node'=None):
+        self.id: int = next(Node.ids)
         self.tag = tag
-        self.children: List['Node'] = []
+        self.children: List['Node'] = NO_CHILDREN
         if children:
             self.add_children(*children)
         self.leaf = leaf
         self.parent: 'Node' = parent
 
-    @property
-    def id(self):
-        return str(id(self))
+    @staticmethod
+    def reset_ids():
+        Node.ids = count()
 
     def add_children(self, *args):
+        if self.children is NO_CHILDREN:
+            self.children = []
         for child in args:
             child.parent = self
             self.children.append(child)
 
-    @abstractmethod
     def visit(self, code_generator: CodeGeneratorBase):
+        # walk() yields the nodes to visit before resuming; the suspended walks are kept on an
+        # explicit stack rather than the Python one, so deep trees cannot hit the recursion limit
+        stack = [self.walk(code_generator)]
+        while stack:
+            node = next(stack[-1], None)
+            if node is None:
+                stack.pop()
+            else:
+                stack.append(node.walk(code_generator))
+
+    @abstractmethod
+    def walk(self, code_generator: CodeGeneratorBase) -> Iterator['Node']:
         pass
 
     def __str__(self):
@@ -37,307 +68,485 @@ class Node(ABC):
 
 
 class Expression(Node):
+    __slots__ = ("place", "type", "truelist", "falselist")
+
     @abstractmethod
     def __init__(self, tag, children=None, leaf=None):
         super().__init__(tag, children, leaf)
         self.place: Entry = None
         self.type: DataType = None
-        self.truelist: List[ThreeAddressCode] = []
-        self.falselist: List[ThreeAddressCode] = []
+        self.truelist: JumpList = NO_JUMPS
+        self.falselist: JumpList = NO_JUMPS
 
 
 class BinaryExpression(Expression):
+    __slots__ = ()
+
     def __init__(self, binary_operator: Token, left_operand: Expression, right_operand: Expression):
         super().__init__("binary_expression", children=[left_operand, right_operand], leaf=binary_operator)
-        self.binary_operator = binary_operator
-        self.left_operand = left_operand
-        self.right_operand = right_operand
 
-    def visit(self, code_generator: CodeGeneratorBase):
-        self.left_operand.visit(code_generator)
-        if self.binary_operator.type in ["AND", "OR"]:
+    @property
+    def binary_operator(self) -> Token:
+        return self.leaf
+
+    @property
+    def left_operand(self) -> Expression:
+        return self.children[0]
+
+    @property
+    def right_operand(self) -> Expression:
+        return self.children[1]
+
+    def walk(self, code_generator: CodeGeneratorBase):
+        yield self.left_operand
+        marker = self.mark_right_operand(code_generator, self.binary_operator)
+        yield self.right_operand
+        self.translate(code_generator, self, self.binary_operator, self.left_operand, self.right_operand, marker)
+
+    @staticmethod
+    def mark_right_operand(code_generator: CodeGeneratorBase, binary_operator: Token) -> Label:
+        if binary_operator.type in ["AND", "OR"]:
             # marker = code_generator.nextquad
             marker = Label(code_generator.newlabel())
             code_generator.emit(marker)
-        self.right_operand.visit(code_generator)
+            return marker
+        return None
+
+    @staticmethod
+    def translate(code_generator: CodeGeneratorBase,
+                  result: Expression,
+                  binary_operator: Token,
+                  left_operand: Expression,
+                  right_operand: Expression,
+                  marker: Label):
         arithmetic_types = [DataType.REAL, DataType.INTEGER]
-        if self.binary_operator.type in ["LESS_THAN", "GREATER_THAN", "NOT_EQUAL",
+        if binary_operator.type in ["LESS_THAN", "GREATER_THAN", "NOT_EQUAL",
             "EQUAL", "LESS_THAN_OR_EQUAL", "GREATER_THAN_OR_EQUAL"]:
             # type checking
-            if self.left_operand.type not in arithmetic_types or self.right_operand.type not in arithmetic_types:
+            if left_operand.type not in arithmetic_types or right_operand.type not in arithmetic_types:
                 code_generator.log(
                     SemanticError(f"Incompatible types: relational operators only apply to arithmetic types.")
                 )
             # free temporary
-            if self.left_operand.place.entry_type == EntryType.TEMPORARY:
-                code_generator.freetemp(self.left_operand.place.data_type)
-            if self.right_operand.place.entry_type == EntryType.TEMPORARY:
-                code_generator.freetemp(self.right_operand.place.data_type)
+            if left_operand.place.entry_type == EntryType.TEMPORARY:
+                code_generator.freetemp(left_operand.place.data_type)
+            if right_operand.place.entry_type == EntryType.TEMPORARY:
+                code_generator.freetemp(right_operand.place.data_type)
             # find the type of result
-            self.type = DataType.BOOLEAN
+            result.type = DataType.BOOLEAN
             # TODO: convert to Relational Operator Enum. we have just relaxed restricting types :)
             # code generation
             conditional_jump = code_generator.emit(ConditionalJump(
-                self.binary_operator.lexeme,
-                self.left_operand.place,
-                self.right_operand.place,
+                binary_operator.lexeme,
+                left_operand.place,
+                right_operand.place,
                 None  # None label is to be backpatched
             ))
             unconditional_jump = code_generator.emit(UnconditionalJump(None))
             # backpatching
             # nextquad = code_generator.nextquad
-            self.truelist = [conditional_jump]  # [nextquad]
-            self.falselist = [unconditional_jump]  # [nextquad + 1]
-        if self.binary_operator.type in ["PLUS", "MINUS", "TIMES", "DIVIDE", "MOD", "DIV"]:
+            result.truelist = JumpList.of(conditional_jump)  # [nextquad]
+            result.falselist = JumpList.of(unconditional_jump)  # [nextquad + 1]
+        if binary_operator.type in ["PLUS", "MINUS", "TIMES", "DIVIDE", "MOD", "DIV"]:
             # type checking
-            if self.left_operand.type not in arithmetic_types or self.right_operand.type not in arithmetic_types:
+            if left_operand.type not in arithmetic_types or right_operand.type not in arithmetic_types:
                 code_generator.log(
                     SemanticError(f"Incompatible types: arithmetic operators only apply to arithmetic types.")
                 )
             # TODO: type checking right and left of MOD and DIV
             # free temporary
-            if self.left_operand.place.entry_type == EntryType.TEMPORARY:
-                code_generator.freetemp(self.left_operand.place.data_type)
-            if self.right_operand.place.entry_type == EntryType.TEMPORARY:
-                code_generator.freetemp(self.right_operand.place.data_type)
+            if left_operand.place.entry_type == EntryType.TEMPORARY:
+                code_generator.freetemp(left_operand.place.data_type)
+            if right_operand.place.entry_type == EntryType.TEMPORARY:
+                code_generator.freetemp(right_operand.place.data_type)
             # find the type of result and allocate temporary
-            if self.left_operand.type == DataType.REAL or self.right_operand.type == DataType.REAL:
-                self.type = DataType.REAL
-                self.place = code_generator.newtemp(self.type)
-            if self.left_operand.type == DataType.INTEGER and self.right_operand.type == DataType.INTEGER:
-                self.type = DataType.INTEGER
-                self.place = code_generator.newtemp(self.type)
+            if left_operand.type == DataType.REAL or right_operand.type == DataType.REAL:
+                result.type = DataType.REAL
+                result.place = code_generator.newtemp(result.type)
+            if left_operand.type == DataType.INTEGER and right_operand.type == DataType.INTEGER:
+                result.type = DataType.INTEGER
+                result.place = code_generator.newtemp(result.type)
             # code generation
             code_generator.emit(BinaryAssignment(
-                self.binary_operator.lexeme,
-                self.left_operand.place,
-                self.right_operand.place,
-                self.place
+                binary_operator.lexeme,
+                left_operand.place,
+                right_operand.place,
+                result.place
             ))
-        if self.binary_operator.type in ["AND", "OR"]:
+        if binary_operator.type in ["AND", "OR"]:
             # type checking
-            if self.left_operand.type != DataType.BOOLEAN or self.left_operand.type != DataType.BOOLEAN:
+            if left_operand.type != DataType.BOOLEAN or left_operand.type != DataType.BOOLEAN:
                 code_generator.log(
                     SemanticError(f"Incompatible types: logical operators only apply to boolean types.")
                 )
             # find the type of result
-            self.type = DataType.BOOLEAN
+            result.type = DataType.BOOLEAN
             # backpatching
-            if self.binary_operator.type == "OR":
-                code_generator.backpatch(self.left_operand.falselist, marker)
-                self.truelist = self.left_operand.truelist + self.right_operand.truelist
-                self.falselist = self.right_operand.falselist
-            if self.binary_operator.type == "AND":
-                code_generator.backpatch(self.left_operand.truelist, marker)
-                self.truelist = self.right_operand.truelist
-                self.falselist = self.left_operand.falselist + self.right_operand.falselist
+            if binary_operator.type == "OR":
+                code_generator.backpatch(left_operand.falselist, marker)
+                result.truelist = left_operand.truelist.merge(right_operand.truelist)
+                result.falselist = right_operand.falselist
+            if binary_operator.type == "AND":
+                code_generator.backpatch(left_operand.truelist, marker)
+                result.truelist = right_operand.truelist
+                result.falselist = left_operand.falselist.merge(right_operand.falselist)
 
 
 class UnaryExpression(Expression):
+    __slots__ = ()
+
     def __init__(self, unary_operator: Token, operand: Expression):
         super().__init__("unary_expression", children=[operand], leaf=unary_operator)
-        self.unary_operator = unary_operator
-        self.operand = operand
 
-    def visit(self, code_generator):
-        self.operand.visit(code_generator)
+    @property
+    def unary_operator(self) -> Token:
+        return self.leaf
+
+    @property
+    def operand(self) -> Expression:
+        return self.children[0]
+
+    def walk(self, code_generator):
+        yield self.operand
+        self.translate(code_generator, self, self.unary_operator, self.operand)
+
+    @staticmethod
+    def translate(code_generator: CodeGeneratorBase, result: Expression, unary_operator: Token, operand: Expression):
         # find the type of result
-        self.type = self.operand.type
-        if self.unary_operator.type == "NOT":
+        result.type = operand.type
+        if unary_operator.type == "NOT":
             # type checking
-            if self.operand.type != DataType.BOOLEAN:
-                code_generator.log(SemanticError(f"Incompatible types: expected {DataType.BOOLEAN} got {self.operand.type}"))
+            if operand.type != DataType.BOOLEAN:
+                code_generator.log(SemanticError(f"Incompatible types: expected {DataType.BOOLEAN} got {operand.type}"))
             # backpatching
-            self.truelist = self.operand.falselist
-            self.falselist = self.operand.truelist
+            result.truelist = operand.falselist
+            result.falselist = operand.truelist
         else:
             # allocate temporary
-            self.place = code_generator.newtemp(self.type)
+            result.place = code_generator.newtemp(result.type)
             expected = [DataType.REAL, DataType.INTEGER]
             # type checking
-            if self.operand.type not in expected:
-                code_generator.log(SemanticError(f"Incompatible types: expected {expected} got {self.operand.type}"))
+            if operand.type not in expected:
+                code_generator.log(SemanticError(f"Incompatible types: expected {expected} got {operand.type}"))
             # code generation
-            code_generator.emit(UnaryAssignment(self.unary_operator.lexeme, self.operand.place, self.place))
+            code_generator.emit(UnaryAssignment(unary_operator.lexeme, operand.place, result.place))
 
 
 class TerminalExpression(Expression):
+    __slots__ = ()
+
     def __init__(self, terminal: Token):
         super().__init__("identifier_or_constant", leaf=terminal)
-        self.terminal: Token = terminal
 
-    def visit(self, code_generator):
-        if self.terminal.type == "ID":
-            entry = code_generator.lookup_entries(self.terminal)
+    @property
+    def terminal(self) -> Token:
+        return self.leaf
+
+    def walk(self, code_generator):
+        self.translate(code_generator, self, self.terminal)
+        yield from ()  # a leaf, nothing to visit
+
+    @staticmethod
+    def translate(code_generator: CodeGeneratorBase, result: Expression, terminal: Token):
+        if terminal.type == "ID":
+            entry = code_generator.lookup_entries(terminal)
             if not entry:
-                code_generator.log(SemanticError(f"Identifier {self.terminal} is used before declaration."))
-            self.place = entry
-            self.type = entry.data_type
-        elif self.terminal.type == "INTEGER_CONSTANT":
-            entry = code_generator.insert_entry(self.terminal, DataType.INTEGER, EntryType.CONSTANT)
-            self.place = entry
-            self.type = entry.data_type
-        elif self.terminal.type == "REAL_CONSTANT":
-            entry = code_generator.insert_entry(self.terminal, DataType.REAL, EntryType.CONSTANT)
-            self.place = entry
-            self.type = entry.data_type
-        elif self.terminal.type == "TRUE":
-            entry = code_generator.insert_entry(self.terminal, DataType.BOOLEAN, EntryType.CONSTANT)
-            #self.place = entry # note that this is not necessary because we don't have boolean data types at all
-            self.type = entry.data_type
+                code_generator.log(SemanticError(f"Identifier {terminal} is used before declaration."))
+            result.place = entry
+            result.type = entry.data_type
+        elif terminal.type == "INTEGER_CONSTANT":
+            entry = code_generator.insert_entry(terminal, DataType.INTEGER, EntryType.CONSTANT)
+            result.place = entry
+            result.type = entry.data_type
+        elif terminal.type == "REAL_CONSTANT":
+            entry = code_generator.insert_entry(terminal, DataType.REAL, EntryType.CONSTANT)
+            result.place = entry
+            result.type = entry.data_type
+        elif terminal.type == "TRUE":
+            entry = code_generator.insert_entry(terminal, DataType.BOOLEAN, EntryType.CONSTANT)
+            #result.place = entry # note that this is not necessary because we don't have boolean data types at all
+            result.type = entry.data_type
             # backpatching
             unconditional_jump = code_generator.emit(UnconditionalJump(None))  # None label is to be backpatched
-            self.truelist = [unconditional_jump]
-        elif self.terminal.type == "FALSE":
-            entry = code_generator.insert_entry(self.terminal, DataType.BOOLEAN, EntryType.CONSTANT)
-            #self.place = entry # note that this is not necessary
-            self.type = entry.data_type
+            result.truelist = JumpList.of(unconditional_jump)
+        elif terminal.type == "FALSE":
+            entry = code_generator.insert_entry(terminal, DataType.BOOLEAN, EntryType.CONSTANT)
+            #result.place = entry # note that this is not necessary
+            result.type = entry.data_type
             # backpatching
             unconditional_jump = code_generator.emit(UnconditionalJump(None))  # None label is to be backpatched
-            self.falselist = [unconditional_jump]
+            result.falselist = JumpList.of(unconditional_jump)
 
 
 class Statement(Node):
+    __slots__ = ("nextlist",)
+
     def __init__(self, tag, children=None, leaf=None):
         super().__init__(tag, children, leaf)
-        self.nextlist: List[ThreeAddressCode] = []
+        self.nextlist: JumpList = NO_JUMPS
 
     @abstractmethod
-    def visit(self, code_generator):
+    def walk(self, code_generator):
         pass
 
 
 class PrintStatement(Statement):
+    __slots__ = ()
+
     def __init__(self, expression: Expression):
         super().__init__("print", leaf=expression)
-        self.expression = expression
 
-    def visit(self, code_generator):
-        self.expression.visit(code_generator)
-        code_generator.emit(Print(self.expression.place))
-        if self.expression.place.entry_type == EntryType.TEMPORARY:
-            code_generator.freetemp(self.expression.place.data_type)
+    @property
+    def expression(self) -> Expression:
+        return self.leaf
+
+    def walk(self, code_generator):
+        yield self.expression
+        self.translate(code_generator, self.expression)
+
+    @staticmethod
+    def translate(code_generator: CodeGeneratorBase, expression: Expression):
+        code_generator.emit(Print(expression.place))
+        if expression.place.entry_type == EntryType.TEMPORARY:
+            code_generator.freetemp(expression.place.data_type)
 
 
 class AssignmentStatement(Statement):
+    __slots__ = ()
+
     def __init__(self, lvalue: Token, rvalue: Expression):
         super().__init__("assignment", children=[rvalue], leaf=lvalue)
-        self.rvalue = rvalue
-        self.lvalue = lvalue
 
-    def visit(self, code_generator):
-        self.rvalue.visit(code_generator)
-        entry = code_generator.lookup_entries(self.lvalue)
+    @property
+    def lvalue(self) -> Token:
+        return self.leaf
+
+    @property
+    def rvalue(self) -> Expression:
+        return self.children[0]
+
+    def walk(self, code_generator):
+        yield self.rvalue
+        self.translate(code_generator, self.lvalue, self.rvalue)
+
+    @staticmethod
+    def translate(code_generator: CodeGeneratorBase, lvalue: Token, rvalue: Expression):
+        entry = code_generator.lookup_entries(lvalue)
         if not entry:
-            code_generator.log(SemanticError(f"Identifier {self.lvalue} is used before declaration."))
-        if entry.data_type != self.rvalue.type:
-            code_generator.log(SemanticError(f"Type mismatch, {entry.data_type} could not be mixed with {self.rvalue.type}."))
-        code_generator.emit(BareAssignment(self.rvalue.place, entry))
-        if self.rvalue.place.entry_type == EntryType.TEMPORARY:
-            code_generator.freetemp(self.rvalue.place.data_type)
+            code_generator.log(SemanticError(f"Identifier {lvalue} is used before declaration."))
+        if entry.data_type != rvalue.type:
+            code_generator.log(SemanticError(f"Type mismatch, {entry.data_type} could not be mixed with {rvalue.type}."))
+        code_generator.emit(BareAssignment(rvalue.place, entry))
+        if rvalue.place.entry_type == EntryType.TEMPORARY:
+            code_generator.freetemp(rvalue.place.data_type)
 
 
 class WhileStatement(Statement):
+    __slots__ = ()
+
     def __init__(self, condition: Expression, body: Statement):
         super().__init__("while", children=[condition, body])
-        self.condition = condition
-        self.body = body
 
-    def visit(self, code_generator):
-        marker1 = code_generator.emit(Label(code_generator.newlabel()))  # code_generator.nextquad
-        self.condition.visit(code_generator)
-        if self.condition.type != DataType.BOOLEAN:
+    @property
+    def condition(self) -> Expression:
+        return self.children[0]
+
+    @property
+    def body(self) -> Statement:
+        return self.children[1]
+
+    def walk(self, code_generator):
+        marker1 = self.mark_condition(code_generator)
+        yield self.condition
+        marker2 = self.mark_body(code_generator, self.condition)
+        yield self.body
+        self.translate(code_generator, self, self.condition, self.body, marker1, marker2)
+
+    @staticmethod
+    def mark_condition(code_generator: CodeGeneratorBase) -> Label:
+        code_generator.enter_loop()
+        return code_generator.emit(Label(code_generator.newlabel()))  # code_generator.nextquad
+
+    @staticmethod
+    def mark_body(code_generator: CodeGeneratorBase, condition: Expression) -> Label:
+        if condition.type != DataType.BOOLEAN:
             code_generator.log(
                 SemanticError(f"Type mismatch, conditional expressions have to be boolean."))
-        marker2 = code_generator.emit(Label(code_generator.newlabel()))  # code_generator.nextquad
-        self.body.visit(code_generator)
-        code_generator.backpatch(self.body.nextlist, marker1)
-        code_generator.backpatch(self.condition.truelist, marker2)
-        self.nextlist = self.condition.falselist
+        return code_generator.emit(Label(code_generator.newlabel()))  # code_generator.nextquad
+
+    @staticmethod
+    def translate(code_generator: CodeGeneratorBase,
+                  result: Statement,
+                  condition: Expression,
+                  body: Statement,
+                  marker1: Label,
+                  marker2: Label):
+        code_generator.backpatch(body.nextlist, marker1)
+        code_generator.backpatch(condition.truelist, marker2)
+        result.nextlist = condition.falselist
         code_generator.emit(UnconditionalJump(marker1))  # f"l{marker1}"
+        code_generator.leave_loop()
 
 
 class IfStatement(Statement):
+    __slots__ = ()
+
     def __init__(self, condition: Expression, body: Statement):
         super().__init__("if", children=[condition, body])
-        self.condition = condition
-        self.body = body
 
-    def visit(self, code_generator):
-        self.condition.visit(code_generator)
-        if self.condition.type != DataType.BOOLEAN:
+    @property
+    def condition(self) -> Expression:
+        return self.children[0]
+
+    @property
+    def body(self) -> Statement:
+        return self.children[1]
+
+    def walk(self, code_generator):
+        yield self.condition
+        marker = self.mark_body(code_generator, self.condition)
+        yield self.body
+        self.translate(code_generator, self, self.condition, self.body, marker)
+
+    @staticmethod
+    def mark_body(code_generator: CodeGeneratorBase, condition: Expression) -> Label:
+        if condition.type != DataType.BOOLEAN:
             code_generator.log(
                 SemanticError(f"Type mismatch, conditional expressions have to be boolean."))
-        marker = code_generator.emit(Label(code_generator.newlabel()))  # code_generator.nextquad
-        self.body.visit(code_generator)
-        code_generator.backpatch(self.condition.truelist, marker)
-        self.nextlist = self.condition.falselist + self.body.nextlist
+        return code_generator.emit(Label(code_generator.newlabel()))  # code_generator.nextquad
+
+    @staticmethod
+    def translate(code_generator: CodeGeneratorBase,
+                  result: Statement,
+                  condition: Expression,
+                  body: Statement,
+                  marker: Label):
+        code_generator.backpatch(condition.truelist, marker)
+        result.nextlist = condition.falselist.merge(body.nextlist)
 
 
 class IfElseStatement(Statement):
+    __slots__ = ()
+
     def __init__(self, condition: Expression, then_body: Statement, else_body: Statement):
         super().__init__("if_else", children=[condition, then_body, else_body])
-        self.condition = condition
-        self.then_body = then_body
-        self.else_body = else_body
 
-    def visit(self, code_generator):
-        self.condition.visit(code_generator)
-        if self.condition.type != DataType.BOOLEAN:
-            code_generator.log(
-                SemanticError(f"Type mismatch, conditional expressions have to be boolean."))
-        marker1 = code_generator.emit(Label(code_generator.newlabel()))  # code_generator.nextquad
-        self.then_body.visit(code_generator)
+    @property
+    def condition(self) -> Expression:
+        return self.children[0]
+
+    @property
+    def then_body(self) -> Statement:
+        return self.children[1]
+
+    @property
+    def else_body(self) -> Statement:
+        return self.children[2]
+
+    def walk(self, code_generator):
+        yield self.condition
+        # the then part is marked exactly like the body of an if statement
+        marker1 = IfStatement.mark_body(code_generator, self.condition)
+        yield self.then_body
+        unconditional_jump, marker3 = self.mark_else_body(code_generator)
+        yield self.else_body
+        self.translate(code_generator, self, self.condition, self.then_body, self.else_body,
+                       marker1, unconditional_jump, marker3)
+
+    @staticmethod
+    def mark_else_body(code_generator: CodeGeneratorBase):
         # marker2 = code_generator.nextquad
         unconditional_jump = code_generator.emit(UnconditionalJump(None))
         marker3 = code_generator.emit(Label(code_generator.newlabel()))  # code_generator.nextquad  # could be marker2 + 1?
-        self.else_body.visit(code_generator)
-        code_generator.backpatch(self.condition.truelist, marker1)
-        code_generator.backpatch(self.condition.falselist, marker3)
-        self.nextlist = self.then_body.nextlist + self.else_body.nextlist + [unconditional_jump]
+        return unconditional_jump, marker3
+
+    @staticmethod
+    def translate(code_generator: CodeGeneratorBase,
+                  result: Statement,
+                  condition: Expression,
+                  then_body: Statement,
+                  else_body: Statement,
+                  marker1: Label,
+                  unconditional_jump: UnconditionalJump,
+                  marker3: Label):
+        code_generator.backpatch(condition.truelist, marker1)
+        code_generator.backpatch(condition.falselist, marker3)
+        result.nextlist = then_body.nextlist.merge(else_body.nextlist).merge(JumpList.of(unconditional_jump))
 
 
 class CompoundStatement(Statement):
+    __slots__ = ()
+
     def __init__(self, first_statement: Statement):
         super().__init__("compound_statement", children=[first_statement])
 
-    def visit(self, code_generator):
+    def walk(self, code_generator):
         for statement in self.children[:-1]:
-            statement.visit(code_generator)
-            if len(statement.nextlist) > 0:
-                marker = code_generator.emit(Label(code_generator.newlabel()))  # code_generator.nextquad
-                code_generator.backpatch(statement.nextlist, marker)
-        self.children[-1].visit(code_generator)
+            yield statement
+            self.mark_statement(code_generator, statement)
+        yield self.children[-1]
         self.nextlist = self.children[-1].nextlist
 
+    @staticmethod
+    def mark_statement(code_generator: CodeGeneratorBase, previous_statement: Statement):
+        if previous_statement.nextlist:
+            marker = code_generator.emit(Label(code_generator.newlabel()))  # code_generator.nextquad
+            code_generator.backpatch(previous_statement.nextlist, marker)
+
+
+class ErrorStatement(Statement):
+    __slots__ = ()
+
+    def __init__(self, token: Token):
+        # placeholder for a statement skipped by syntax error recovery
+        super().__init__("error", leaf=token)
+
+    def walk(self, code_generator):
+        code_generator.log(SemanticError(f"Could not generate code for malformed statement at token {self.leaf}."))
+        yield from ()  # a leaf, nothing to visit
+
 
 class Arguments(Node):
+    __slots__ = ("queue",)
+
     def __init__(self, first_expression: Expression = None):
         super().__init__("arguments")
         if first_expression:
             self.add_children(first_expression)
         self.queue = []
 
-    def visit(self, code_generator):
+    def walk(self, code_generator):
         for expression in self.children:
-            expression.visit(code_generator)
+            yield expression
             self.queue.append(expression.place)
 
 
 class ProcedureCallStatement(Statement):
+    __slots__ = ()
+
     def __init__(self, procedure_name: Token, arguments: Arguments):
         super().__init__("procedure_call", children=[arguments], leaf=procedure_name)
-        self.procedure_name = procedure_name
-        self.arguments = arguments
 
-    def visit(self, code_generator):
-        self.arguments.visit(code_generator)
-        procedure = code_generator.lookup_procedures(self.procedure_name)
-        if len(procedure.parameters) != len(self.arguments.queue):
+    @property
+    def procedure_name(self) -> Token:
+        return self.leaf
+
+    @property
+    def arguments(self) -> Arguments:
+        return self.children[0]
+
+    def walk(self, code_generator):
+        yield self.arguments
+        self.translate(code_generator, self.procedure_name, self.arguments.queue)
+
+    @staticmethod
+    def translate(code_generator: CodeGeneratorBase, procedure_name: Token, queue: List[Entry]):
+        procedure = code_generator.lookup_procedures(procedure_name)
+        if len(procedure.parameters) != len(queue):
             code_generator.log(SemanticError("Procedure call arity does not match the procedure parameter counts."))
         marker = Label(code_generator.newlabel())
         code_generator.emit(Call(procedure, marker))
-        for place, parameter in zip(self.arguments.queue, procedure.parameters):
+        for place, parameter in zip(queue, procedure.parameters):
             if place.data_type != parameter.data_type:
                 code_generator.log(SemanticError("Type mismatch when passing arguments to procedure."))
             code_generator.emit(BareAssignment(place, parameter))
@@ -348,128 +557,236 @@ class ProcedureCallStatement(Statement):
 
 
 class Declaration(Node):
+    __slots__ = ("identifiers", "data_type", "entrylist")
+
     def __init__(self, first_identifier: Token):
         super().__init__("declaration")  # leaf = <data_type, [identifiers]>
         self.identifiers: List[Token] = [first_identifier]
         self.data_type: DataType = DataType.INTEGER
         self.entrylist = []
 
-    def set_data_type(self, token: Token):
+    @staticmethod
+    def to_data_type(token: Token) -> DataType:
         if token.type == "REAL":
-            self.data_type = DataType.REAL
-        elif token.type == "INTEGER":
-            self.data_type = DataType.INTEGER
+            return DataType.REAL
+        return DataType.INTEGER
+
+    def set_data_type(self, token: Token):
+        self.data_type = self.to_data_type(token)
         self.leaf = (self.data_type, self.identifiers)
 
     def add_identifier(self, identifier: Token):
         self.identifiers.append(identifier)
 
-    def visit(self, code_generator):
-        for identifier in self.identifiers:
-            self.entrylist.append(code_generator.insert_entry(identifier, self.data_type, EntryType.DECLARATION))
+    def walk(self, code_generator):
+        self.entrylist.extend(self.translate(code_generator, self.identifiers, self.data_type))
+        yield from ()  # a leaf, nothing to visit
+
+    @staticmethod
+    def translate(code_generator: CodeGeneratorBase, identifiers: List[Token], data_type: DataType) -> List[Entry]:
+        return [code_generator.insert_entry(identifier, data_type, EntryType.DECLARATION)
+                for identifier in identifiers]
 
 
 class Declarations(Node):
+    __slots__ = ("entrylist",)
+
     def __init__(self, first_declaration: Declaration = None):
         super().__init__("declarations")
         if first_declaration:
             self.add_children(first_declaration)
         self.entrylist = []
 
-    def visit(self, code_generator):
+    def walk(self, code_generator):
         for child in self.children:
-            child.visit(code_generator)
+            yield child
             self.entrylist.extend(child.entrylist)
 
 
 class Parameters(Node):
+    __slots__ = ("entrylist",)
+
     def __init__(self, declarations: Declarations):
         super().__init__("parameters", children=[declarations])
-        self.declarations = declarations
 
-    def visit(self, code_generator):
-        self.declarations.visit(code_generator)
-        for entry in self.declarations.entrylist:
-            entry.entry_type = EntryType.PARAMETER
+    @property
+    def declarations(self) -> Declarations:
+        return self.children[0]
+
+    def walk(self, code_generator):
+        yield self.declarations
+        self.translate(code_generator, self.declarations.entrylist)
         self.entrylist = self.declarations.entrylist
 
+    @staticmethod
+    def translate(code_generator: CodeGeneratorBase, entrylist: List[Entry]):
+        for entry in entrylist:
+            entry.entry_type = EntryType.PARAMETER
+        code_generator.symbol_table.parameters = entrylist
+
 
 class Procedure(Node):
+    __slots__ = ()
+
     def __init__(self,
                  name: Token,
                  parameters: Parameters,
                  declarations: Declarations,
                  compound_statement: CompoundStatement):
         super().__init__("procedure", children=[parameters, declarations, compound_statement], leaf=name)
-        self.name = name
-        self.parameters = parameters
-        self.declarations = declarations
-        self.compound_statement = compound_statement
 
-    def visit(self, code_generator):
+    @property
+    def name(self) -> Token:
+        return self.leaf
+
+    @property
+    def parameters(self) -> Parameters:
+        return self.children[0]
+
+    @property
+    def declarations(self) -> Declarations:
+        return self.children[1]
+
+    @property
+    def compound_statement(self) -> CompoundStatement:
+        return self.children[2]
+
+    def walk(self, code_generator):
+        symbol_table = self.mark_parameters(code_generator, self.name)
+        # visit parameters
+        yield self.parameters
+        yield self.declarations
+        yield self.compound_statement
+        self.translate(code_generator, symbol_table, self.compound_statement)
+
+    @staticmethod
+    def mark_parameters(code_generator: CodeGeneratorBase, name: Token) -> SymbolTable:
         # create a symbol table for the procedure
-        symbol_table = code_generator.insert_procedure(self.name)
+        symbol_table = code_generator.insert_procedure(name)
         # mark the beginning of code for the procedure
         begin_marker = Label(code_generator.newlabel())
         code_generator.emit(begin_marker)
         symbol_table.set_begin_code_label(begin_marker)
         # set current symbol table in code generator to the newly generated one
         code_generator.set_symbol_table(symbol_table)
-        # visit parameters
-        self.parameters.visit(code_generator)
-        symbol_table.parameters = self.parameters.entrylist
-        self.declarations.visit(code_generator)
-        self.compound_statement.visit(code_generator)
-        # insert procedure activation record struct at the beginning of program
-        code_generator.insert_quadruple(1, ActivationRecordDefinition(symbol_table))
+        return symbol_table
+
+    @staticmethod
+    def translate(code_generator: CodeGeneratorBase, symbol_table: SymbolTable, compound_statement: CompoundStatement):
+        # the activation record struct is defined with the others, before all code
+        code_generator.emit_to(Segment.STRUCTS, ActivationRecordDefinition(symbol_table))
         # mark the end of code for the procedure
-        if len(self.compound_statement.nextlist) > 0:
+        if compound_statement.nextlist:
             end_marker = Label(code_generator.newlabel())
             code_generator.emit(end_marker)
-            code_generator.backpatch(self.compound_statement.nextlist, end_marker)  # code_generator.nextquad
+            code_generator.backpatch(compound_statement.nextlist, end_marker)  # code_generator.nextquad
         code_generator.emit(Return(symbol_table))
+        symbol_table.generated = True
         # restore enclosing scope symbol table
         code_generator.set_symbol_table(symbol_table.parent)
 
 
 class Procedures(Node):
+    __slots__ = ()
+
     def __init__(self, first_procedure: Procedure = None):
         super().__init__("procedures")
         if first_procedure:
             self.add_children(first_procedure)
 
-    def visit(self, code_generator):
+    def walk(self, code_generator):
         for child in self.children:
-            child.visit(code_generator)
+            yield child
 
 
 class Program(Node):
+    __slots__ = ()
+
     def __init__(self,
                  name: Token,
                  declarations: Declarations,
                  procedures: Procedures,
                  compound_statement: CompoundStatement):
         super().__init__("program", children=[declarations, procedures, compound_statement], leaf=name)
-        self.declarations = declarations
-        self.procedures = procedures
-        self.compound_statement = compound_statement
-        self.name = name
-
-    def visit(self, code_generator):
-        code_generator.emit(BeginProgram())
-        self.declarations.visit(code_generator)
-        for entry in self.declarations.entrylist:
+
+    @property
+    def name(self) -> Token:
+        return self.leaf
+
+    @property
+    def declarations(self) -> Declarations:
+        return self.children[0]
+
+    @property
+    def procedures(self) -> Procedures:
+        return self.children[1]
+
+    @property
+    def compound_statement(self) -> CompoundStatement:
+        return self.children[2]
+
+    def walk(self, code_generator):
+        self.mark_declarations(code_generator)
+        yield self.declarations
+        unconditional_jump = self.mark_procedures(code_generator, self.declarations.entrylist)
+        yield self.procedures
+        self.mark_compound_statement(code_generator, unconditional_jump)
+        yield self.compound_statement
+        self.translate(code_generator, self.compound_statement)
+
+    @staticmethod
+    def mark_declarations(code_generator: CodeGeneratorBase):
+        code_generator.emit_to(Segment.PROLOGUE, BeginProgram())
+        code_generator.switch_segment(Segment.GLOBALS)
+
+    @staticmethod
+    def mark_procedures(code_generator: CodeGeneratorBase, entrylist: List[Entry]) -> UnconditionalJump:
+        for entry in entrylist:
             code_generator.emit(Definition(entry))
         unconditional_jump = code_generator.emit(UnconditionalJump(None))
-        self.procedures.visit(code_generator)
-        begin_marker = code_generator.emit(Label(code_generator.newlabel()))
-        code_generator.backpatch([unconditional_jump], begin_marker)
-        quad = code_generator.nextquad
-        self.compound_statement.visit(code_generator)
-        for data_type, count in code_generator.symbol_table.max_count_of_temporary.items():
+        code_generator.switch_segment(Segment.PROCEDURES)
+        return unconditional_jump
+
+    @staticmethod
+    def mark_compound_statement(code_generator: CodeGeneratorBase, unconditional_jump: UnconditionalJump):
+        # the temporaries of the main body are declared after its label, so the jump to it runs their initializers
+        begin_marker = code_generator.emit_to(Segment.TEMPORARIES, Label(code_generator.newlabel()))
+        code_generator.backpatch(JumpList.of(unconditional_jump), begin_marker)
+        code_generator.switch_segment(Segment.MAIN)
+
+    @staticmethod
+    def translate(code_generator: CodeGeneratorBase, compound_statement: CompoundStatement):
+        for data_type, count in reversed(code_generator.symbol_table.max_count_of_temporary.items()):
             if count > 0:
-                code_generator.insert_quadruple(quad - 1, Temporary(data_type, count))
-        if len(self.compound_statement.nextlist) > 0:
+                code_generator.emit_to(Segment.TEMPORARIES, Temporary(data_type, count))
+        constants = code_generator.symbol_table.constants
+        if constants.static_reals and constants.values[DataType.REAL]:
+            # procedures use them too
+            code_generator.emit_to(Segment.CONSTANTS, Constants(DataType.REAL, constants.values[DataType.REAL]))
+        if compound_statement.nextlist:
             end_marker = code_generator.emit(Label(code_generator.newlabel()))
-            code_generator.backpatch(self.compound_statement.nextlist, end_marker)
+            code_generator.backpatch(compound_statement.nextlist, end_marker)
         code_generator.emit(EndProgram())
+        # all accesses are counted by now
+        code_generator.lay_out_activation_records()
+
+
+# Synthesized attributes for code generation without nodes (the one-pass translator and the
+# syntax arena). They stand in for expression and statement nodes in the phases above.
+
+
+class ExpressionAttributes:
+    __slots__ = ("place", "type", "truelist", "falselist")
+
+    def __init__(self):
+        self.place: Entry = None
+        self.type: DataType = None
+        self.truelist: JumpList = NO_JUMPS
+        self.falselist: JumpList = NO_JUMPS
+
+
+class StatementAttributes:
+    __slots__ = ("nextlist",)
+
+    def __init__(self):
+        self.nextlist: JumpList = NO_JUMPS
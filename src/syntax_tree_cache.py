@@ -0,0 +1,296 @@
+import hashlib
+import os
+import struct
+from typing import Dict, List, Optional
+
+from src.lexer import Token
+from src.parser import ParseResult
+from src.symbol_table import DataType
+from src.syntax_tree import Node, Program, Declarations, Declaration, Procedures, Procedure, Parameters, \
+    CompoundStatement, PrintStatement, AssignmentStatement, WhileStatement, IfStatement, IfElseStatement, \
+    ProcedureCallStatement, Arguments, ErrorStatement, BinaryExpression, UnaryExpression, TerminalExpression
+
+
+# Binary cache of parse results, keyed by a hash of the source and of the grammar signature.
+#
+# Layout (little endian): magic, then sections of fixed size records, each preceded by its count:
+#   strings      length (I) and utf-8 bytes
+#   tokens       type (I), lexeme (I), lineno (I), attribute kind (B)
+#   integers     the integer attributes (q) of the tokens, in token order
+#   reals        the real attributes (d) of the tokens, in token order
+#   long ints    the integer attributes beyond 64 bits, as strings of their decimal digits (I), in token order
+#   nodes        kind (B), id (I), token (I), child count (I), in postorder
+#   declarations data type and identifier count, then the identifiers, of the declarations in order (I)
+#   generated tokens and reductions (I)
+# Strings and tokens are referenced by index, so repeated token types and reductions are stored once.
+# A node is rebuilt from the nodes of its children, which precede it.
+
+MAGIC = b"PASCAL-SYNTAX-TREE-2\n"
+NONE = 0xFFFFFFFF
+
+KINDS = [
+    Program, Declarations, Declaration, Procedures, Procedure, Parameters, CompoundStatement, PrintStatement,
+    AssignmentStatement, WhileStatement, IfStatement, IfElseStatement, ProcedureCallStatement, Arguments,
+    ErrorStatement, BinaryExpression, UnaryExpression, TerminalExpression,
+]
+KIND_CODES = {kind: code for code, kind in enumerate(KINDS)}
+DATA_TYPES = list(DataType)
+DATA_TYPE_CODES = {data_type: code for code, data_type in enumerate(DATA_TYPES)}
+# nodes whose leaf is a token
+TOKEN_KINDS = {Program, Procedure, AssignmentStatement, ProcedureCallStatement, ErrorStatement,
+               BinaryExpression, UnaryExpression, TerminalExpression}
+
+COUNT = struct.Struct("<I")
+TOKEN = struct.Struct("<IIIB")
+NODE = struct.Struct("<BIII")
+
+ATTRIBUTE_NONE, ATTRIBUTE_FALSE, ATTRIBUTE_TRUE, ATTRIBUTE_INTEGER, ATTRIBUTE_REAL, ATTRIBUTE_LONG_INTEGER = range(6)
+INTEGER_MIN, INTEGER_MAX = -2 ** 63, 2 ** 63 - 1
+
+
+def serialized_children(node: Node) -> List[Node]:
+    # the expression of a print statement is its leaf rather than a child
+    if isinstance(node, PrintStatement):
+        return [node.expression]
+    return node.children
+
+
+class TokenWriter:
+    # the strings and the tokens with their attributes, shared with the binary symbol tables
+    def __init__(self):
+        self.strings: Dict[str, int] = {}
+        self.tokens: Dict[int, int] = {}  # id of the token object -> index, to keep shared tokens shared
+        self.token_records = bytearray()
+        self.integers: List[int] = []
+        self.reals: List[float] = []
+        self.long_integers: List[int] = []  # indexes of the decimal strings
+
+    def string(self, string: str) -> int:
+        index = self.strings.get(string)
+        if index is None:
+            index = self.strings[string] = len(self.strings)
+        return index
+
+    def token(self, token: Token) -> int:
+        index = self.tokens.get(id(token))
+        if index is None:
+            index = self.tokens[id(token)] = len(self.tokens)
+            attribute = token.attribute
+            if attribute is None:
+                attribute_kind = ATTRIBUTE_NONE
+            elif isinstance(attribute, bool):  # before int, bool being one
+                attribute_kind = ATTRIBUTE_TRUE if attribute else ATTRIBUTE_FALSE
+            elif isinstance(attribute, int):
+                if INTEGER_MIN <= attribute <= INTEGER_MAX:
+                    attribute_kind = ATTRIBUTE_INTEGER
+                    self.integers.append(attribute)
+                else:
+                    attribute_kind = ATTRIBUTE_LONG_INTEGER
+                    self.long_integers.append(self.string(str(attribute)))
+            else:
+                attribute_kind = ATTRIBUTE_REAL
+                self.reals.append(attribute)
+            self.token_records += TOKEN.pack(self.string(token.type), self.string(token.lexeme), token.lineno,
+                                             attribute_kind)
+        return index
+
+    def write_tokens(self, data: bytearray):
+        data += COUNT.pack(len(self.strings))
+        for string in self.strings:
+            encoded = string.encode()
+            data += COUNT.pack(len(encoded))
+            data += encoded
+        data += COUNT.pack(len(self.tokens))
+        data += self.token_records
+        for code, values in (("q", self.integers), ("d", self.reals), ("I", self.long_integers)):
+            data += COUNT.pack(len(values))
+            data += struct.pack(f"<{len(values)}{code}", *values)
+
+
+class TreeWriter(TokenWriter):
+    def __init__(self):
+        super().__init__()
+        self.node_records = bytearray()
+        self.declarations: List[int] = []
+
+    def write_tree(self, root: Node) -> int:
+        # a reversed preorder with the children pushed in order gives the postorder of the tree
+        preorder = []
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            preorder.append(node)
+            stack.extend(serialized_children(node))
+        for node in reversed(preorder):
+            kind = type(node)
+            token = self.token(node.leaf) if kind in TOKEN_KINDS else NONE
+            self.node_records += NODE.pack(KIND_CODES[kind], node.id, token, len(serialized_children(node)))
+            if kind is Declaration:
+                self.declarations.append(DATA_TYPE_CODES[node.data_type])
+                self.declarations.append(len(node.identifiers))
+                self.declarations.extend(self.token(identifier) for identifier in node.identifiers)
+        return len(preorder)
+
+    def dumps(self, parse_result: ParseResult) -> bytes:
+        nodes = self.write_tree(parse_result.syntax_tree_root)
+        generated_tokens = [self.token(token) for token in parse_result.tokens]
+        reductions = [self.string(reduction) for reduction in parse_result.reductions]
+        data = bytearray(MAGIC)
+        self.write_tokens(data)
+        data += COUNT.pack(nodes)
+        data += self.node_records
+        for indexes in (self.declarations, generated_tokens, reductions):
+            data += COUNT.pack(len(indexes))
+            data += struct.pack(f"<{len(indexes)}I", *indexes)
+        return bytes(data)
+
+
+class TokenReader:
+    def __init__(self, data: bytes, magic: bytes, description: str):
+        if not data.startswith(magic):
+            raise ValueError(f"Not a {description} file.")
+        self.data = memoryview(data)
+        self.offset = len(magic)
+        self.strings: List[str] = []
+        self.tokens: List[Token] = []
+
+    def count(self) -> int:
+        count, = COUNT.unpack_from(self.data, self.offset)
+        self.offset += COUNT.size
+        return count
+
+    def values(self, code: str) -> tuple:
+        count = self.count()
+        values = struct.unpack_from(f"<{count}{code}", self.data, self.offset)
+        self.offset += struct.calcsize(f"<{count}{code}")
+        return values
+
+    def records(self, record: struct.Struct):
+        count = self.count()
+        end = self.offset + count * record.size
+        records = record.iter_unpack(self.data[self.offset:end])
+        self.offset = end
+        return records
+
+    def read_strings(self):
+        for _ in range(self.count()):
+            length = self.count()
+            self.strings.append(str(self.data[self.offset:self.offset + length], "utf-8"))
+            self.offset += length
+
+    def read_tokens(self):
+        strings = self.strings
+        records = list(self.records(TOKEN))
+        integers = iter(self.values("q"))
+        reals = iter(self.values("d"))
+        long_integers = iter(self.values("I"))
+        for type_, lexeme, lineno, attribute_kind in records:
+            if attribute_kind == ATTRIBUTE_NONE:
+                attribute = None
+            elif attribute_kind == ATTRIBUTE_INTEGER:
+                attribute = next(integers)
+            elif attribute_kind == ATTRIBUTE_REAL:
+                attribute = next(reals)
+            elif attribute_kind == ATTRIBUTE_LONG_INTEGER:
+                attribute = int(strings[next(long_integers)])
+            else:
+                attribute = attribute_kind == ATTRIBUTE_TRUE
+            self.tokens.append(Token(strings[type_], strings[lexeme], attribute, lineno))
+
+
+class TreeReader(TokenReader):
+    def __init__(self, data: bytes):
+        super().__init__(data, MAGIC, "syntax tree cache")
+
+    def read_tree(self) -> Node:
+        tokens = self.tokens
+        records = list(self.records(NODE))
+        declarations = iter(self.values("I"))
+        stack: List[Node] = []
+        for code, node_id, token, child_count in records:
+            kind = KINDS[code]
+            if child_count:
+                children = stack[-child_count:]
+                del stack[-child_count:]
+            else:
+                children = []
+            if kind is Declaration:
+                data_type = DATA_TYPES[next(declarations)]
+                identifiers = [tokens[next(declarations)] for _ in range(next(declarations))]
+                node = build_declaration(data_type, identifiers)
+            else:
+                node = build_node(kind, None if token == NONE else tokens[token], children)
+            node.id = node_id
+            stack.append(node)
+        return stack[0]
+
+    def loads(self) -> ParseResult:
+        self.read_strings()
+        self.read_tokens()
+        root = self.read_tree()
+        tokens = [self.tokens[index] for index in self.values("I")]
+        reductions = [self.strings[index] for index in self.values("I")]
+        return ParseResult(root, tokens, reductions, [])
+
+
+def build_declaration(data_type: DataType, identifiers: List[Token]) -> Declaration:
+    node = Declaration(identifiers[0])
+    for identifier in identifiers[1:]:
+        node.add_identifier(identifier)
+    node.data_type = data_type
+    node.leaf = (data_type, node.identifiers)
+    return node
+
+
+def build_node(kind, token: Token, children: List[Node]) -> Node:
+    if kind in (Declarations, Procedures, Arguments):
+        node = kind()
+        if children:
+            node.add_children(*children)
+        return node
+    if kind is CompoundStatement:
+        node = CompoundStatement(children[0])
+        node.add_children(*children[1:])
+        return node
+    if kind in (Parameters, PrintStatement, WhileStatement, IfStatement, IfElseStatement):
+        return kind(*children)
+    if kind in (ErrorStatement, TerminalExpression):
+        return kind(token)
+    return kind(token, *children)
+
+
+class SyntaxTreeCache:
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(source: str, grammar_signature: str) -> str:
+        return hashlib.sha256(MAGIC + grammar_signature.encode() + b"\0" + source.encode()).hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.ast")
+
+    def load(self, key: str) -> Optional[ParseResult]:
+        try:
+            with open(self.path(key), "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            return TreeReader(data).loads()
+        except (ValueError, TypeError, IndexError, StopIteration, struct.error):
+            return None  # a truncated or corrupt file is a miss, and the source is parsed again
+
+    def store(self, key: str, parse_result: ParseResult):
+        # written aside and renamed, so concurrent compilations never read a partial file
+        path = self.path(key)
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary_path, "wb") as f:
+                f.write(TreeWriter().dumps(parse_result))
+            os.replace(temporary_path, path)
+        except BaseException:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
@@ -1,5 +1,7 @@
 from abc import ABC
+from enum import Enum
 
+from src.activation_record_layout import ActivationRecordLayout, Group
 from src.operator_enum import Operator, BinaryOperator, RelationalOperator, UnaryOperator
 from src.symbol_table import SymbolTable, DataType, EntryType, Entry
 
@@ -18,6 +20,18 @@ class ThreeAddressOperator(Operator):
     STRUCT_DEFINITION = "STRUCT_DEFINITION"
     VARIABLE_DEFINITION = "VARIABLE_DEFINITION"
     TEMPORARY_DEFINITION = "TEMPORARY_DEFINITION"
+    CONSTANT_DEFINITION = "CONSTANT_DEFINITION"
+
+
+class Segment(Enum):
+    # the parts of the generated program, appended to independently and output in this order
+    PROLOGUE = "PROLOGUE"
+    CONSTANTS = "CONSTANTS"
+    STRUCTS = "STRUCTS"  # activation records
+    GLOBALS = "GLOBALS"
+    PROCEDURES = "PROCEDURES"
+    TEMPORARIES = "TEMPORARIES"  # the label of the main body, then its temporaries
+    MAIN = "MAIN"
 
 
 CDataTypes = {
@@ -62,6 +76,16 @@ class Temporary(ThreeAddressCode):
         return f"{CDataTypes[self.address1]} temporary_{self.address1.name}[{self.address2}] = {{ 0 }};"
 
 
+class Constants(ThreeAddressCode):
+    def __init__(self, data_type: DataType, values):
+        super().__init__(ThreeAddressOperator.CONSTANT_DEFINITION, data_type, values)
+
+    def __str__(self):
+        values = ", ".join(str(value) for value in self.address2)
+        return f"static const {CDataTypes[self.address1]} " \
+               f"constant_{self.address1.name}[{len(self.address2)}] = {{ {values} }};"
+
+
 class Definition(ThreeAddressCode):
     def __init__(self, entry: Entry):
         super().__init__(ThreeAddressOperator.VARIABLE_DEFINITION, entry)
@@ -132,6 +156,7 @@ class ConditionalJump(ThreeAddressCode):
     def __init__(self, relational_operator: RelationalOperator, arg1, arg2, label: Label):
         self.relational_operator = relational_operator
         super().__init__(ThreeAddressOperator.CONDITIONAL_JUMP, arg1, arg2, label)
+        self.next_jump = None  # in the backpatch list of the jump
 
     def __str__(self):
         return f"if ({self.address1} {self.relational_operator} {self.address2}) goto {self.address3.name if self.address3 else None};"
@@ -140,11 +165,49 @@ class ConditionalJump(ThreeAddressCode):
 class UnconditionalJump(ThreeAddressCode):
     def __init__(self, label: Label):
         super().__init__(ThreeAddressOperator.UNCONDITIONAL_JUMP, None, None, label)
+        self.next_jump = None  # in the backpatch list of the jump
 
     def __str__(self):
         return f"goto {self.address3.name if self.address3 else None};"
 
 
+class JumpList:
+    # A backpatch list, chained through the next_jump links of its jumps from head to tail, so two lists
+    # are merged in constant time by linking the tail of the first to the head of the second. A merge takes
+    # over the jumps of both lists, which are then only used through the merged list.
+    __slots__ = ("head", "tail")
+
+    def __init__(self, head: ThreeAddressCode = None, tail: ThreeAddressCode = None):
+        self.head = head
+        self.tail = tail
+
+    @staticmethod
+    def of(jump: ThreeAddressCode) -> 'JumpList':
+        return JumpList(jump, jump)
+
+    def __bool__(self):
+        return self.head is not None
+
+    def __iter__(self):
+        jump = self.head
+        while jump is not None:
+            yield jump
+            if jump is self.tail:
+                break
+            jump = jump.next_jump
+
+    def merge(self, other: 'JumpList') -> 'JumpList':
+        if self.head is None:
+            return other
+        if other.head is None:
+            return self
+        self.tail.next_jump = other.head
+        return JumpList(self.head, other.tail)
+
+
+NO_JUMPS = JumpList()  # never linked to, so shared
+
+
 class Call(ThreeAddressCode):
     def __init__(self, procedure: SymbolTable, return_label: Label):
         super().__init__(ThreeAddressOperator.CALL, procedure, return_label)
@@ -185,39 +248,29 @@ class ActivationRecordDefinition(ThreeAddressCode):
     def __init__(self, procedure: SymbolTable):
         super().__init__(ThreeAddressOperator.STRUCT_DEFINITION, procedure)
 
-    def prepare_parameters(self):
+    @staticmethod
+    def prepare_struct(group: Group):
         result = ["struct {"]
-        for entry in self.address1.parameters:
+        for entry in group.entries:
             result.append(f"\t{CDataTypes[entry.data_type]} {entry.token.lexeme};")
-        result.append("} parameters;")
+        result.append(f"}} {group.name};")
         return "\n".join(result)
 
+    @staticmethod
+    def prepare_temporaries(group: Group):
+        return f"{CDataTypes[group.entries[0].data_type]} {group.name}[{len(group.entries)}];"
+
     def __str__(self):
+        # laid out with the rest once code generation is over, procedures shadowed by a later one are laid out here
+        layout = self.address1.activation_record or ActivationRecordLayout(self.address1)
         return "\n".join([
             f"struct activation_record_{self.address1.header.lexeme} {{",
             f"struct activation_record_{self.address1.header.lexeme}* control_link;",
             "void* return_address;",
-            self.prepare_parameters(),
-            self.prepare_temporaries(),
-            self.prepare_locals(),
+            *(self.prepare_temporaries(group) if group.array else self.prepare_struct(group) for group in layout.groups),
             "};",
             f"typedef struct activation_record_{self.address1.header.lexeme} "
             f"ActivationRecord_{self.address1.header.lexeme};",
             f"typedef ActivationRecord_{self.address1.header.lexeme}* "
             f"ActivationRecordPtr_{self.address1.header.lexeme};"
         ])
-
-    def prepare_temporaries(self):
-        result = []
-        for data_type, count in self.address1.max_count_of_temporary.items():
-            if count > 0:
-                result.append(f"{CDataTypes[data_type]} temporary_{data_type.name}[{count}];")
-        return "\n".join(result)
-
-    def prepare_locals(self):
-        result = ["struct {"]
-        for entry in self.address1.entries.values():
-            if entry.entry_type == EntryType.DECLARATION:
-                result.append(f"\t{CDataTypes[entry.data_type]} {entry.token.lexeme};")
-        result.append("} locals;")
-        return "\n".join(result)
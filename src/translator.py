@@ -0,0 +1,258 @@
+from typing import List
+
+from src.code_generator import CodeGenerator
+from src.lexer import PascalLexer, Token
+from src.parser import PascalParser
+from src.symbol_table import SymbolTable
+from src.syntax_tree import BinaryExpression, UnaryExpression, TerminalExpression, PrintStatement, \
+    AssignmentStatement, WhileStatement, IfStatement, IfElseStatement, CompoundStatement, ProcedureCallStatement, \
+    Declaration, Parameters, Procedure, Program, ExpressionAttributes, StatementAttributes
+from src.three_address_code import ThreeAddressCode
+
+
+class PascalTranslator(PascalParser):
+    # Syntax directed translation in a single pass: the reduction actions drive code generation
+    # and backpatching, so no syntax tree is kept. Marker nonterminals (empty productions)
+    # run the phases which the tree walk runs between the children of a node; they read the
+    # attributes of the symbols already on the parser stack through negative indexes.
+
+    def __init__(self):
+        super().__init__()
+        self.code_generator: CodeGenerator = None
+
+    def p_program(self, p):
+        """program : PROGRAM ID program_marker declarations procedures_marker procedures compound_marker compound_statement"""
+        Program.translate(self.code_generator, p[8])
+        p[0] = self.code_generator.quadruples
+        self.log("program : PROGRAM ID declarations procedures compound_statement")
+
+    def p_program_marker(self, p):
+        """program_marker : empty"""
+        self.code_generator.set_symbol_table(SymbolTable(p[-1]))
+        self.code_generator.symbol_table.constants.static_reals = self.code_generator.static_constants
+        Program.mark_declarations(self.code_generator)
+
+    def p_procedures_marker(self, p):
+        """procedures_marker : empty"""
+        p[0] = Program.mark_procedures(self.code_generator, p[-1])
+
+    def p_compound_marker(self, p):
+        """compound_marker : empty"""
+        Program.mark_compound_statement(self.code_generator, p[-2])
+
+    def p_declarations(self, p):
+        """declarations : VAR declaration_list SEMICOLON
+                        | empty"""
+        if len(p) > 2:
+            p[0] = p[2]
+            self.log("declarations : VAR declaration_list SEMICOLON")
+        else:
+            p[0] = []
+            self.log("declarations : empty")
+
+    def p_declaration_list(self, p):
+        """declaration_list : declaration_list SEMICOLON declaration
+                            | declaration"""
+        if len(p) > 2:
+            p[0] = p[1]
+            p[1].extend(p[3])
+            self.log("declaration_list : declaration_list SEMICOLON declaration")
+        else:
+            p[0] = p[1]
+            self.log("declaration_list : declaration")
+
+    def p_declaration(self, p):
+        """declaration : identifier_list COLON data_type"""
+        p[0] = Declaration.translate(self.code_generator, p[1], Declaration.to_data_type(p[3]))
+        self.log(self.p_declaration.__doc__)
+
+    def p_identifier_list(self, p):
+        """identifier_list : identifier_list COMMA ID
+                           | ID"""
+        if len(p) > 2:
+            p[0] = p[1]
+            p[1].append(p[3])
+            self.log("identifier_list : identifier_list COMMA ID")
+        else:
+            p[0] = [p[1]]
+            self.log("identifier_list : ID")
+
+    def p_procedures(self, p):
+        """procedures : procedure_list
+                      | empty"""
+        if p.slice[1].type == "empty":
+            self.log("procedures : empty")
+        else:
+            self.log("procedures : procedure_list")
+
+    def p_procedure_list(self, p):
+        """procedure_list : procedure_list procedure
+                          | procedure"""
+        if len(p) > 2:
+            self.log("procedure_list : procedure_list procedure")
+        else:
+            self.log("procedure_list : procedure")
+
+    def p_procedure(self, p):
+        """procedure : PROCEDURE ID procedure_marker parameters SEMICOLON declarations compound_statement SEMICOLON"""
+        Procedure.translate(self.code_generator, p[3], p[7])
+        self.log("procedure : PROCEDURE ID parameters SEMICOLON declarations compound_statement SEMICOLON")
+
+    def p_procedure_marker(self, p):
+        """procedure_marker : empty"""
+        p[0] = Procedure.mark_parameters(self.code_generator, p[-1])
+
+    def p_parameters(self, p):
+        """parameters : LEFT_PARENTHESIS declaration_list RIGHT_PARENTHESIS
+                      | empty"""
+        if len(p) > 2:
+            Parameters.translate(self.code_generator, p[2])
+            self.log("parameters : LEFT_PARENTHESIS declaration_list RIGHT_PARENTHESIS")
+        else:
+            Parameters.translate(self.code_generator, [])
+            self.log("parameters : empty")
+
+    def p_statement_list(self, p):
+        """statement_list : statement_list SEMICOLON statement_marker statement
+                          | statement"""
+        # the statement list carries the nextlist of its last statement
+        if len(p) > 2:
+            p[0] = p[4]
+            self.log("statement_list : statement_list SEMICOLON statement")
+        else:
+            p[0] = p[1]
+            self.log("statement_list : statement")
+
+    def p_statement_marker(self, p):
+        """statement_marker : empty"""
+        CompoundStatement.mark_statement(self.code_generator, p[-2])
+
+    def p_statement_print(self, p):
+        """statement : PRINT LEFT_PARENTHESIS expression RIGHT_PARENTHESIS"""
+        PrintStatement.translate(self.code_generator, p[3])
+        p[0] = StatementAttributes()
+        self.log(self.p_statement_print.__doc__)
+
+    def p_statement_assignment(self, p):
+        """statement : ID ASSIGN expression"""
+        AssignmentStatement.translate(self.code_generator, p[1], p[3])
+        p[0] = StatementAttributes()
+        self.log(self.p_statement_assignment.__doc__)
+
+    def p_statement_while(self, p):
+        """statement : WHILE while_condition_marker expression DO while_body_marker statement"""
+        p[0] = StatementAttributes()
+        WhileStatement.translate(self.code_generator, p[0], p[3], p[6], p[2], p[5])
+        self.log("statement : WHILE expression DO statement")
+
+    def p_while_condition_marker(self, p):
+        """while_condition_marker : empty"""
+        p[0] = WhileStatement.mark_condition(self.code_generator)
+
+    def p_while_body_marker(self, p):
+        """while_body_marker : empty"""
+        p[0] = WhileStatement.mark_body(self.code_generator, p[-2])
+
+    def p_statement_procedure_call(self, p):
+        """statement : ID arguments"""
+        ProcedureCallStatement.translate(self.code_generator, p[1], p[2])
+        p[0] = StatementAttributes()
+        self.log(self.p_statement_procedure_call.__doc__)
+
+    def p_statement_if(self, p):
+        """statement : IF expression THEN if_body_marker statement"""
+        p[0] = StatementAttributes()
+        IfStatement.translate(self.code_generator, p[0], p[2], p[5], p[4])
+        self.log("statement : IF expression THEN statement")
+
+    def p_statement_if_else(self, p):
+        """statement : IF expression THEN if_body_marker statement ELSE else_body_marker statement"""
+        p[0] = StatementAttributes()
+        unconditional_jump, marker3 = p[7]
+        IfElseStatement.translate(self.code_generator, p[0], p[2], p[5], p[8], p[4], unconditional_jump, marker3)
+        self.log("statement : IF expression THEN statement ELSE statement")
+
+    def p_if_body_marker(self, p):
+        """if_body_marker : empty"""
+        # shared by both if statements, so the parser need not decide between them before the body
+        p[0] = IfStatement.mark_body(self.code_generator, p[-2])
+
+    def p_else_body_marker(self, p):
+        """else_body_marker : empty"""
+        p[0] = IfElseStatement.mark_else_body(self.code_generator)
+
+    def p_arguments(self, p):
+        """arguments : LEFT_PARENTHESIS actual_parameter_list RIGHT_PARENTHESIS
+                     | empty"""
+        if len(p) > 2:
+            p[0] = p[2]
+            self.log("arguments : LEFT_PARENTHESIS actual_parameter_list RIGHT_PARENTHESIS")
+        else:
+            p[0] = []
+            self.log("arguments : empty")
+
+    def p_actual_parameter_list(self, p):
+        """actual_parameter_list : actual_parameter_list COMMA expression
+                                 | expression"""
+        if len(p) > 2:
+            p[0] = p[1]
+            p[1].append(p[3].place)
+            self.log("actual_parameter_list : actual_parameter_list COMMA expression")
+        else:
+            p[0] = [p[1].place]
+            self.log("actual_parameter_list : expression")
+
+    def p_expression(self, p):
+        """expression : expression additive_operator operand_marker expression %prec ADDITIVE
+                      | expression relational_operator operand_marker expression %prec RELATIONAL
+                      | expression multiplicative_operator operand_marker expression %prec MULTIPLICATIVE
+                      | LEFT_PARENTHESIS expression RIGHT_PARENTHESIS
+                      | unary_operator expression %prec UNARY
+                      | identifier_or_constant"""
+        if len(p) == 5:  # E op E
+            p[0] = ExpressionAttributes()
+            BinaryExpression.translate(self.code_generator, p[0], p[2], p[1], p[4], p[3])
+            self.log(f"expression : expression {p[2].type} expression")
+        elif len(p) == 4:  # ( E )
+            p[0] = p[2]
+            self.log("expression : ( expression )")
+        elif len(p) == 3:  # op E
+            p[0] = ExpressionAttributes()
+            UnaryExpression.translate(self.code_generator, p[0], p[1], p[2])
+            self.log(f"expression : unary_operator expression")
+        elif len(p) == 2:
+            p[0] = p[1]
+            self.log(f"expression : identifier_or_constant")
+
+    def p_operand_marker(self, p):
+        """operand_marker : empty"""
+        p[0] = BinaryExpression.mark_right_operand(self.code_generator, p[-1])
+
+    def p_identifier_or_constant(self, p):
+        """identifier_or_constant : INTEGER_CONSTANT
+                                  | REAL_CONSTANT
+                                  | ID
+                                  | TRUE
+                                  | FALSE"""
+        p[0] = ExpressionAttributes()
+        TerminalExpression.translate(self.code_generator, p[0], p[1])
+        self.log(f"identifier_or_constant : {p[1].type}")
+
+    def p_error(self, p):
+        # code generation has already consumed everything before the error, so there is nothing to recover into
+        super().p_error(p)
+        raise self.errors[-1]
+
+    def build(self, lexer: PascalLexer, statistics=False, **kwargs):
+        # the translation scheme only covers whole programs
+        start = kwargs.get("start") or "program"
+        if start != "program":
+            raise ValueError(f"One-pass translation only covers whole programs, not start symbol '{start}'.")
+        kwargs["start"] = start
+        super().build(lexer, statistics, **kwargs)
+
+    def parse(self, semantic_analysis_relaxed=False, static_constants=False, stream_code=False,
+              **kwargs) -> List[ThreeAddressCode]:
+        self.code_generator = CodeGenerator(None, static_constants, stream_code)
+        self.code_generator.semantic_analysis_relaxed = semantic_analysis_relaxed
+        return super().parse(**kwargs)
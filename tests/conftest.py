@@ -0,0 +1,30 @@
+import shutil
+from concurrent.futures import Future
+
+import pytest
+
+from src.pydot_generator import PyDotGenerator, SvgRenderer
+
+
+def write_dot_instead(renderer: SvgRenderer, generator: PyDotGenerator, svg_path: str) -> Future:
+    generator.write_dot_file(svg_path)
+    future = Future()
+    future.set_result(None)
+    return future
+
+
+@pytest.fixture(autouse=True)
+def without_graphviz(monkeypatch):
+    # the drawings are written as DOT text where graphviz is not installed
+    if shutil.which("dot") is None:
+        monkeypatch.setattr(PyDotGenerator, "write_svg", PyDotGenerator.write_dot_file)
+        monkeypatch.setattr(SvgRenderer, "submit", write_dot_instead)
+
+
+@pytest.fixture
+def write_source(tmp_path):
+    def write(name: str, source: str) -> str:
+        path = tmp_path / name
+        path.write_text(source)
+        return str(path)
+    return write
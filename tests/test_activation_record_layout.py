@@ -0,0 +1,85 @@
+import shutil
+import subprocess
+
+import pytest
+
+from src.activation_record_layout import struct_group
+from src.compiler import compile_
+from src.lexer import Token
+from src.symbol_table import SymbolTable, DataType, EntryType, Entry
+
+SOURCE = "\n".join([
+    "program layout",
+    "var a : integer;",
+    "procedure f (hot : integer; cold : real);",
+    "var x : real; i : integer; spare : integer;",
+    "begin",
+    "\ti := hot;",
+    "\twhile i > 0 do i := i - 1;",
+    "\tx := cold * 2.0",
+    "end;",
+    "begin",
+    "\tf(a, 1.5)",
+    "end",
+])
+
+
+def entry(scope: SymbolTable, lexeme: str, data_type: DataType, accesses: int) -> Entry:
+    entry = Entry(Token("ID", lexeme, None, 1), 0, data_type, EntryType.DECLARATION, scope)
+    entry.accesses = accesses
+    return entry
+
+
+def test_struct_fields_are_ordered_and_aligned():
+    scope = SymbolTable(Token("ID", "p", None, 1))
+    entries = [entry(scope, "flag", DataType.BOOLEAN, 5), entry(scope, "x", DataType.INTEGER, 5),
+               entry(scope, "y", DataType.REAL, 1), entry(scope, "last", DataType.BOOLEAN, 0),
+               entry(scope, "z", DataType.INTEGER, 0)]
+    group = struct_group("locals", entries)
+    # the most accessed first, the wider first among equally accessed, declaration order last
+    assert [(field.token.lexeme, field.offset) for field in group.entries] == \
+           [("x", 0), ("flag", 4), ("y", 8), ("z", 12), ("last", 16)]
+    assert group.alignment == 4
+    assert group.size == 20  # padded to its alignment
+    assert group.accesses == 11
+
+
+def test_activation_record_layout(write_source, tmp_path):
+    result = compile_(write_source("layout.program", SOURCE), str(tmp_path))
+    f = result.symbol_table.procedures["f"]
+    assert f.entries["x"].width == f.entries["cold"].width == 4  # a C float
+    layout = f.activation_record
+    # the groups with the most accesses per byte first, after the two links
+    assert [(group.name, group.size) for group in layout.groups] == \
+           [("temporary_INTEGER", 4), ("locals", 12), ("parameters", 8), ("temporary_REAL", 4)]
+    # i is accessed in the loop, so it comes first
+    assert [(field.token.lexeme, field.offset) for field in layout.locals.entries] == \
+           [("i", 20), ("x", 24), ("spare", 28)]
+    assert [(field.token.lexeme, field.offset) for field in layout.parameters.entries] == \
+           [("hot", 32), ("cold", 36)]
+    assert f.temporaries[DataType.INTEGER][0].offset == 16
+    assert f.temporaries[DataType.REAL][0].offset == 40
+    assert layout.size == 48 and layout.cache_lines == 1
+    with open(f"{result.output_file_path}.symbols") as symbols:
+        assert "activation record: 48 bytes, cache lines: 1" in symbols.read()
+
+
+@pytest.mark.skipif(shutil.which("gcc") is None, reason="needs a C compiler")
+def test_offsets_match_the_c_compiler(write_source, tmp_path):
+    result = compile_(write_source("layout.program", SOURCE), str(tmp_path))
+    with open(f"{result.output_file_path}.compiled.c") as f:
+        lines = f.read().splitlines()
+    struct = lines[lines.index("struct activation_record_f {"):lines.index("typedef struct activation_record_f "
+                                                                           "ActivationRecord_f;")]
+    f = result.symbol_table.procedures["f"]
+    members = {"locals." + lexeme: f.entries[lexeme] for lexeme in ("i", "x", "spare")}
+    members.update({"parameters." + lexeme: f.entries[lexeme] for lexeme in ("hot", "cold")})
+    members["temporary_INTEGER"] = f.temporaries[DataType.INTEGER][0]
+    members["temporary_REAL"] = f.temporaries[DataType.REAL][0]
+    source = "\n".join(["#include <stddef.h>", "#include <stdio.h>", *struct, "int main() {",
+                        *(f'printf("%zu\\n", offsetof(struct activation_record_f, {member}));' for member in members),
+                        'printf("%zu\\n", sizeof(struct activation_record_f));', "return 0;", "}"])
+    (tmp_path / "offsets.c").write_text(source)
+    subprocess.run(["gcc", "-o", str(tmp_path / "offsets"), str(tmp_path / "offsets.c")], check=True)
+    output = subprocess.run([str(tmp_path / "offsets")], check=True, capture_output=True, text=True).stdout
+    assert list(map(int, output.split())) == [entry.offset for entry in members.values()] + [f.activation_record.size]
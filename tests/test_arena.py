@@ -0,0 +1,24 @@
+import os
+
+import pytest
+
+from src.compiler import compile_
+
+INPUTS = os.path.join(os.path.dirname(__file__), "in")
+
+
+@pytest.mark.parametrize("test", sorted(os.listdir(INPUTS)))
+def test_arena_compiles_like_the_tree(tmp_path, test):
+    start = test.split(".")[1]
+    outputs = {}
+    for arena in (False, True):
+        output_path = tmp_path / ("arena" if arena else "tree")
+        os.makedirs(output_path)
+        compile_(os.path.join(INPUTS, test), str(output_path), semantic_analysis_relaxed=start != "program",
+                 start=start, arena=arena)
+        for extension in ("compiled.c", "symbols", "reductions"):
+            with open(output_path / f"{test}.{extension}") as f:
+                outputs.setdefault(extension, []).append(f.read())
+    for extension, (tree, arena) in outputs.items():
+        assert tree, extension
+        assert arena == tree, extension
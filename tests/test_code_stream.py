@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from src.code_stream import CodeStream
+from src.compiler import compile_
+
+# the recursive call is emitted before the expression which needs the second temporary of f
+RECURSIVE = "\n".join([
+    "program recursive",
+    "var a : integer;",
+    "procedure f (n : integer);",
+    "var r : integer;",
+    "begin",
+    "\tf(n - 1);",
+    "\tr := (n + 1) * (n + 2);",
+    "\tif n > 0 then",
+    "\t\tf(n - 2)",
+    "end;",
+    "procedure g (n : integer);",
+    "begin",
+    "\tf(n);",
+    "\tg(n - 1)",
+    "end;",
+    "begin",
+    "\tf(3);",
+    "\tg(2)",
+    "end",
+])
+
+
+def compiled(output_path: str) -> str:
+    with open(os.path.join(output_path, "recursive.program.compiled.c")) as f:
+        return f.read()
+
+
+@pytest.mark.parametrize("mode", ["tree", "arena", "one_pass"])
+@pytest.mark.parametrize("chunk_size", [1, 2, 4096])
+def test_streamed_recursive_calls_match(write_source, tmp_path, monkeypatch, mode, chunk_size):
+    monkeypatch.setattr(CodeStream.__init__, "__defaults__", (chunk_size,))
+    input_file_path = write_source("recursive.program", RECURSIVE)
+    flags = {} if mode == "tree" else {mode: True}
+    outputs = []
+    for stream_code in (False, True):
+        output_path = str(tmp_path / f"{stream_code}")
+        os.makedirs(output_path)
+        compile_(input_file_path, output_path, stream_code=stream_code, **flags)
+        outputs.append(compiled(output_path))
+    buffered, streamed = outputs
+    assert "temporary_INTEGER, 0, 2);" in buffered
+    assert streamed == buffered
@@ -0,0 +1,42 @@
+import os
+from concurrent.futures import Future
+
+import pytest
+
+from src.compiler import compile_many
+from src.errors import SemanticError
+from src.pydot_generator import SvgRenderer
+
+VALID = "program p\nvar a : integer;\nbegin\n\ta := 1\nend"
+SYNTAX_ERROR = "program p\nvar a : integer;\nbegin\n\ta := ;\n\ta := 1\nend"
+SEMANTIC_ERROR = "program p\nvar a : integer;\nbegin\n\tb := 1\nend"
+
+
+def test_errors_do_not_stop_the_batch(write_source, tmp_path):
+    output_path = tmp_path / "out"
+    os.makedirs(output_path)
+    input_file_paths = [
+        write_source("first.program", VALID),
+        write_source("syntax.program", SYNTAX_ERROR),
+        write_source("semantic.program", SEMANTIC_ERROR),
+        write_source("last.program", VALID),
+    ]
+    results = compile_many(input_file_paths, str(output_path))
+    assert [type(result.error) for result in results] == [type(None), SyntaxError, SemanticError, type(None)]
+    for name, result in zip(["first", "syntax", "semantic", "last"], results):
+        assert result.output_file_path == f"{output_path}/{name}.program"
+    for name in ["first", "last"]:
+        assert os.path.exists(output_path / f"{name}.program.compiled.c")
+    assert results[0].quadruples and results[3].quadruples
+
+
+def test_drawings_of_a_unit_with_syntax_errors_are_awaited(write_source, tmp_path, monkeypatch):
+    def fail(renderer, generator, svg_path):
+        future = Future()
+        future.set_exception(OSError(f"cannot render {svg_path}"))
+        return future
+    monkeypatch.setattr(SvgRenderer, "submit", fail)
+    output_path = tmp_path / "out"
+    os.makedirs(output_path)
+    with pytest.raises(OSError, match="syntax.program"):
+        compile_many([write_source("syntax.program", SYNTAX_ERROR)], str(output_path))
@@ -0,0 +1,64 @@
+import pytest
+
+from src.compiler import compile_
+from src.symbol_table import DataType
+
+SOURCE = "\n".join([
+    "program pool",
+    "var x : real;",
+    "procedure f;",
+    "begin",
+    "\tx := x * 4.0 + 2.5",
+    "end;",
+    "procedure g;",
+    "begin",
+    "\tx := 4.00 - x",
+    "end;",
+    "begin",
+    "\tx := 2.5;",
+    "\tf;",
+    "\tg",
+    "end",
+])
+
+MODES = {"tree": {}, "arena": {"arena": True}, "one_pass": {"one_pass": True}}
+
+
+def compile_pool(write_source, tmp_path, mode: str, static_constants: bool):
+    result = compile_(write_source("pool.program", SOURCE), str(tmp_path), static_constants=static_constants,
+                      **MODES[mode])
+    with open(f"{result.output_file_path}.compiled.c") as f:
+        return result, f.read().splitlines()
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_equal_literals_of_two_procedures_share_an_entry(write_source, tmp_path, mode):
+    result, _ = compile_pool(write_source, tmp_path, mode, False)
+    constants = result.symbol_table.constants
+    # 4.0 and 4.00 are one entry, and 2.5 of f and of the main body another
+    assert [(key, entry.offset) for key, entry in constants.entries.items()] == \
+           [((DataType.REAL, 4.0), 0), ((DataType.REAL, 2.5), 4)]
+    assert list(constants.values[DataType.REAL]) == [4.0, 2.5]
+    f = result.symbol_table.procedures["f"]
+    g = result.symbol_table.procedures["g"]
+    assert f.constants is g.constants is constants
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_static_constants_are_rendered_as_array_elements(write_source, tmp_path, mode):
+    _, lines = compile_pool(write_source, tmp_path, mode, True)
+    assert "static const float constant_REAL[2] = { 4.0, 2.5 };" in lines
+    f = next(line for line in lines if "x * " in line)
+    g = next(line for line in lines if " - x;" in line)
+    assert f.endswith("= x * constant_REAL[0];")
+    assert g.endswith("= constant_REAL[0] - x;")
+    assert "x = constant_REAL[1];" in lines
+    assert not any("4.0" in line or "2.5" in line for line in lines if not line.startswith("static const"))
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_constants_are_literals_by_default(write_source, tmp_path, mode):
+    _, lines = compile_pool(write_source, tmp_path, mode, False)
+    assert not any("constant_REAL" in line for line in lines)
+    assert "x = 2.5;" in lines
+    assert next(line for line in lines if " - x;" in line).endswith("= 4.0 - x;")
@@ -0,0 +1,82 @@
+from src.compiler import compile_, prepare_lexer
+from src.cross_reference import CrossReference
+from src.lexer import Token
+from src.symbol_table import SymbolTable, DataType, EntryType
+
+SOURCE = "\n".join([
+    "program p",
+    "var a, b, spare : integer;",
+    "procedure q (n : integer);",
+    "begin",
+    "\ta := n + a",
+    "end;",
+    "procedure r;",
+    "begin",
+    "\tq(a)",
+    "end;",
+    "begin",
+    "\tq(b);",
+    "\tr;",
+    "\tb := a",
+    "end",
+])
+
+
+def offsets_of(tokens, lexeme: str) -> list:
+    return [offset for offset, token in enumerate(tokens) if token.lexeme == lexeme]
+
+
+def test_queries(write_source, tmp_path):
+    result = compile_(write_source("p.program", SOURCE), str(tmp_path))
+    cross_reference = result.cross_reference
+    pascal_lexer = prepare_lexer()
+    pascal_lexer.input(SOURCE)
+    while pascal_lexer.token():
+        pass
+    tokens = pascal_lexer.generated_tokens
+    program = result.symbol_table
+    a = program.entries["a"]
+    b = program.entries["b"]
+    q = program.procedures["q"]
+    r = program.procedures["r"]
+    a_offsets = offsets_of(tokens, "a")
+    # the first occurrence defines a, the others use it, in increasing order
+    assert cross_reference.definition(a) == a_offsets[0]
+    assert list(cross_reference.uses(a)) == a_offsets[1:]
+    assert list(cross_reference.uses(b)) == offsets_of(tokens, "b")[1:]
+    assert list(cross_reference.uses(q)) == offsets_of(tokens, "q")[1:]
+    # in the order the symbols were met, the program being met at its first call
+    assert cross_reference.callers(q) == [r, program]
+    assert cross_reference.callers(r) == [program]
+    assert cross_reference.unused() == [program.entries["spare"]]
+    assert cross_reference.named("n") == [q.entries["n"]]
+    assert cross_reference.symbol_at(a_offsets[0]) is a
+    assert cross_reference.symbol_at(offsets_of(tokens, "q")[0]) is q
+    assert cross_reference.symbol_at(a_offsets[2]) is a
+    assert cross_reference.symbol_at(offsets_of(tokens, "begin")[0]) is None
+
+
+def test_tokens_outside_the_stream():
+    header = Token("ID", "p", None, 1)
+    stream = [header]
+    program = SymbolTable(header)
+    inside, _ = program.insert_entry(Token("ID", "a", None, 2), DataType.INTEGER, EntryType.DECLARATION)
+    stream.append(inside.token)
+    outside, _ = program.insert_entry(Token("ID", "b", None, 3), DataType.INTEGER, EntryType.DECLARATION)
+    use = Token("ID", "a", None, 4)
+    stream.append(use)
+    cross_reference = CrossReference()
+    cross_reference.define(program)
+    cross_reference.define(inside)
+    cross_reference.define(outside)
+    cross_reference.use(inside, use)
+    cross_reference.use(outside, Token("ID", "b", None, 5))
+    cross_reference.finish(stream)
+    assert cross_reference.definition(program) == 0
+    assert cross_reference.definition(inside) == 1
+    assert cross_reference.definition(outside) == -1
+    assert list(cross_reference.uses(inside)) == [2]
+    # a use outside the stream still counts as a use, at offset -1
+    assert list(cross_reference.uses(outside)) == [-1]
+    assert cross_reference.unused() == []
+    assert [cross_reference.symbol_at(offset) for offset in range(-1, 4)] == [None, program, inside, inside, None]
@@ -0,0 +1,59 @@
+import io
+import os
+import sys
+
+import pytest
+
+from benchmarks.programs import long_expression, nested_statements
+from src.code_generator import CodeGenerator
+from src.compiler import compile_, prepare_lexer, prepare_parser
+from src.ndjson_generator import NdjsonGenerator, load_tree
+from src.pydot_generator import PyDotGenerator, DrawingLimits
+
+# deeper than the recursion limit, so any recursive walk over the trees fails
+DEPTH = 5 * sys.getrecursionlimit()
+
+
+SOURCES = [long_expression, nested_statements]
+
+
+def tree_size(root) -> int:
+    size = 0
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        size += 1
+        stack.extend(node.children)
+    return size
+
+
+@pytest.mark.parametrize("source", SOURCES)
+def test_deep_tree_is_walked_generated_and_drawn(source):
+    pascal_lexer = prepare_lexer()
+    pascal_parser = prepare_parser(pascal_lexer, start="program")
+    pascal_lexer.input(source(DEPTH))
+    root = pascal_parser.parse()
+    assert not pascal_parser.errors
+    assert len(CodeGenerator(root).generate(False)) > DEPTH
+    for limits in (None, DrawingLimits(collapse_limit=16)):
+        dot = io.StringIO()
+        PyDotGenerator("Syntax Tree", root, limits).write_dot(dot)
+        assert dot.getvalue().endswith("}\n")
+    ndjson = io.StringIO()
+    NdjsonGenerator(root).write_ndjson(ndjson)
+    assert tree_size(load_tree(ndjson.getvalue().splitlines())) == tree_size(root)
+
+
+@pytest.mark.parametrize("source", SOURCES)
+@pytest.mark.parametrize("mode", ["tree", "cache", "arena", "one_pass"])
+def test_deep_tree_compiles(write_source, tmp_path, source, mode):
+    input_file_path = write_source("deep.program", source(DEPTH))
+    flags = {"cache": {"cache_directory": str(tmp_path / "cache")}, "tree": {}}.get(mode, {mode: True})
+    outputs = []
+    for run in range(2):  # the cache is stored, then loaded
+        output_path = tmp_path / f"out{run}"
+        os.makedirs(output_path)
+        compile_(input_file_path, str(output_path), ndjson=True, **flags)
+        with open(output_path / "deep.program.compiled.c") as f:
+            outputs.append(f.read())
+    assert outputs[0] == outputs[1]
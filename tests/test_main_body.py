@@ -0,0 +1,28 @@
+import os
+import re
+
+import pytest
+
+from src.compiler import compile_
+
+INPUTS = os.path.join(os.path.dirname(__file__), "in")
+TEMPORARY = re.compile(r"^(int|float) temporary_(INTEGER|REAL)\[\d+\] = \{ 0 \};$")
+
+
+@pytest.mark.parametrize("mode", ["tree", "arena", "one_pass"])
+@pytest.mark.parametrize("test", ["test1", "test3"])
+def test_main_label_comes_before_its_temporaries(tmp_path, mode, test):
+    flags = {} if mode == "tree" else {mode: True}
+    result = compile_(os.path.join(INPUTS, f"{test}.program"), str(tmp_path), **flags)
+    with open(f"{result.output_file_path}.compiled.c") as f:
+        lines = f.read().splitlines()
+    declarations = [index for index, line in enumerate(lines) if TEMPORARY.match(line)]
+    assert declarations
+    label = lines[declarations[0] - 1]
+    assert re.fullmatch(r"l\d+: ;", label)
+    # the jump over the procedures lands on the label, so the initializers run
+    jump = f"goto {label[:-len(': ;')]};"
+    assert lines.index(jump) < declarations[0]
+    assert declarations == list(range(declarations[0], declarations[0] + len(declarations)))
+    types = [TEMPORARY.match(lines[index]).group(2) for index in declarations]
+    assert types == sorted(types, reverse=True)  # REAL before INTEGER
@@ -0,0 +1,41 @@
+import io
+import os
+
+import pytest
+
+from src.code_generator import CodeGenerator
+from src.compiler import prepare_lexer, prepare_parser
+from src.ndjson_generator import NdjsonGenerator, load_tree, load_tree_file
+
+INPUTS = os.path.join(os.path.dirname(__file__), "in")
+PROGRAMS = sorted(name for name in os.listdir(INPUTS) if name.endswith(".program"))
+
+
+def parse(name: str):
+    pascal_lexer = prepare_lexer()
+    pascal_parser = prepare_parser(pascal_lexer, start="program")
+    with open(os.path.join(INPUTS, name)) as f:
+        pascal_lexer.input(f.read())
+    return pascal_parser.parse()
+
+
+def ndjson(root) -> str:
+    file = io.StringIO()
+    NdjsonGenerator(root).write_ndjson(file)
+    return file.getvalue()
+
+
+def quadruples(root) -> list:
+    return [str(quadruple) for quadruple in CodeGenerator(root).generate(False)]
+
+
+@pytest.mark.parametrize("name", PROGRAMS)
+def test_round_trip(name, tmp_path):
+    root = parse(name)
+    written = ndjson(root)
+    loaded = load_tree(written.splitlines())
+    assert ndjson(loaded) == written
+    assert quadruples(loaded) == quadruples(parse(name))
+    path = str(tmp_path / f"{name}.syntax.ndjson")
+    NdjsonGenerator(root).write_ndjson_file(path)
+    assert ndjson(load_tree_file(path)) == written
@@ -0,0 +1,25 @@
+import pytest
+
+from src.compiler import compile_, compile_many
+
+SOURCES = {
+    "expression": "a + 1",
+    "statement": "a := 1",
+    "procedure": "procedure p; begin a := 1 end",
+}
+
+
+@pytest.mark.parametrize("start", SOURCES)
+def test_partial_start_symbols_are_rejected(write_source, tmp_path, start):
+    input_file_path = write_source(f"test.{start}", SOURCES[start])
+    with pytest.raises(ValueError, match=f"not start symbol '{start}'"):
+        compile_(input_file_path, str(tmp_path), one_pass=True, start=start, semantic_analysis_relaxed=True)
+    with pytest.raises(ValueError, match=f"not start symbol '{start}'"):
+        compile_many([input_file_path], str(tmp_path), one_pass=True, start=start, semantic_analysis_relaxed=True)
+
+
+@pytest.mark.parametrize("start", [None, "program"])
+def test_programs_are_translated(write_source, tmp_path, start):
+    input_file_path = write_source("test.program", "program p\nvar a : integer;\nbegin\n\ta := 1\nend")
+    result = compile_(input_file_path, str(tmp_path), one_pass=True, start=start)
+    assert result.quadruples
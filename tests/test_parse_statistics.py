@@ -0,0 +1,26 @@
+from src.compiler import prepare_lexer, prepare_parser
+
+VALID = "program p\nvar a : integer;\nbegin\n\ta := 1\nend"
+# the statement at line 4 is replaced by an error symbol and its tokens are discarded
+RECOVERED = "program p\nvar a : integer;\nbegin\n\ta := := 2 3;\n\ta := 1\nend"
+
+
+def parse(source: str):
+    pascal_lexer = prepare_lexer()
+    pascal_parser = prepare_parser(pascal_lexer, start="program", statistics=True)
+    pascal_lexer.input(source)
+    root = pascal_parser.parse()
+    return pascal_lexer, pascal_parser, root
+
+
+def test_every_token_is_shifted_without_errors():
+    pascal_lexer, pascal_parser, root = parse(VALID)
+    assert root is not None and not pascal_parser.errors
+    assert pascal_parser.statistics.shifts == len(pascal_lexer.generated_tokens)
+
+
+def test_discarded_tokens_are_not_shifted():
+    pascal_lexer, pascal_parser, root = parse(RECOVERED)
+    assert root is not None and len(pascal_parser.errors) == 1
+    # a := are shifted, := 2 3 are discarded, and the error symbol is shifted in their place
+    assert pascal_parser.statistics.shifts == len(pascal_lexer.generated_tokens) - 3 + 1
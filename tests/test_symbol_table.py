@@ -0,0 +1,62 @@
+from src.lexer import Token
+from src.symbol_table import SymbolTable, DataType, EntryType
+
+
+def identifier(lexeme: str) -> Token:
+    return Token("ID", lexeme, None, 1)
+
+
+def scopes():
+    # program > middle > inner
+    program = SymbolTable(identifier("program"))
+    middle, _ = program.insert_procedure(identifier("middle"))
+    inner, _ = middle.insert_procedure(identifier("inner"))
+    return program, middle, inner
+
+
+def declare(scope: SymbolTable, lexeme: str):
+    entry, _ = scope.insert_entry(identifier(lexeme), DataType.INTEGER, EntryType.DECLARATION)
+    return entry
+
+
+def test_declaration_in_a_middle_scope_shadows_a_cached_global():
+    program, middle, inner = scopes()
+    global_x = declare(program, "x")
+    assert inner.lookup_lexeme("x") is global_x
+    assert middle.lookup_lexeme("x") is global_x
+    middle_x = declare(middle, "x")
+    assert inner.lookup_lexeme("x") is middle_x
+    assert middle.lookup_lexeme("x") is middle_x
+    assert program.lookup_lexeme("x") is global_x
+
+
+def test_miss_then_insert():
+    program, middle, inner = scopes()
+    assert inner.lookup_lexeme("y") is None
+    global_y = declare(program, "y")
+    assert inner.lookup_lexeme("y") is global_y
+    inner_y = declare(inner, "y")
+    assert inner.lookup_lexeme("y") is inner_y
+    assert middle.lookup_lexeme("y") is global_y
+
+
+def test_procedure_shadows_a_cached_procedure():
+    program, middle, inner = scopes()
+    global_p, _ = program.insert_procedure(identifier("p"))
+    assert inner.lookup_procedure(identifier("p")) is global_p
+    assert middle.lookup_procedure(identifier("p")) is global_p
+    middle_p, _ = middle.insert_procedure(identifier("p"))
+    assert inner.lookup_procedure(identifier("p")) is middle_p
+    assert middle.lookup_procedure(identifier("p")) is middle_p
+    assert program.lookup_procedure(identifier("p")) is global_p
+
+
+def test_redeclared_procedure_replaces_the_cached_one():
+    program, middle, inner = scopes()
+    first, warning = program.insert_procedure(identifier("p"))
+    assert warning is None
+    assert inner.lookup_procedure(identifier("p")) is first
+    second, warning = program.insert_procedure(identifier("p"))
+    assert isinstance(warning, Warning)
+    assert inner.lookup_procedure(identifier("p")) is second
+    assert program.lookup_procedure(identifier("p")) is second
@@ -0,0 +1,32 @@
+import pytest
+
+from src.compiler import compile_
+from src.symbol_table import DataType
+from src.symbol_table_file import read_symbol_table_file
+
+LONG_INTEGER = 2 ** 64 + 1
+SOURCE = "\n".join([
+    "program big",
+    "var a : integer; r : real;",
+    "procedure p (n : integer; x : real);",
+    "var i : integer;",
+    "begin",
+    f"\ti := n * {LONG_INTEGER};",
+    "\tx := x + 2.5",
+    "end;",
+    "begin",
+    f"\ta := {LONG_INTEGER} + 9223372036854775807;",
+    "\tp(a, r)",
+    "end",
+])
+
+
+@pytest.mark.parametrize("static_constants", [False, True])
+def test_round_trip_with_long_integer(write_source, tmp_path, static_constants):
+    input_file_path = write_source("big.program", SOURCE)
+    result = compile_(input_file_path, str(tmp_path), binary_symbols=True, static_constants=static_constants)
+    loaded = read_symbol_table_file(f"{result.output_file_path}.symbols.bin")
+    with open(f"{result.output_file_path}.symbols") as f:
+        assert str(loaded) == f.read()
+    assert (DataType.INTEGER, LONG_INTEGER) in loaded.constants.entries
+    assert loaded.constants.values[DataType.INTEGER] == result.symbol_table.constants.values[DataType.INTEGER]
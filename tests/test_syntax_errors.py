@@ -0,0 +1,30 @@
+import os
+
+import pytest
+
+from src.compiler import compile_
+
+# inputs which recovery cannot turn into a syntax tree, with the lines of the errors they report
+ROOTLESS = {
+    "header_semicolon": (["program p;", "begin", "\ta := ;", "end"], [1]),
+    "missing_end": (["program p", "var a : integer;", "begin", "\ta := ;", "\ta := 1"], [4, None]),
+    "trailing_end": (["program p", "var a : integer;", "begin", "\ta := ;", "\ta := 2 +;", "\ta := 1", "end end"],
+                     [4, 5, 7]),
+}
+
+
+@pytest.mark.parametrize("arena", [False, True], ids=["tree", "arena"])
+@pytest.mark.parametrize("name", ROOTLESS)
+def test_errors_are_reported_without_a_tree(write_source, tmp_path, name, arena):
+    lines, error_lines = ROOTLESS[name]
+    input_file_path = write_source(f"{name}.program", "\n".join(lines))
+    with pytest.raises(SyntaxError) as raised:
+        compile_(input_file_path, str(tmp_path), ndjson=True, arena=arena)
+    messages = str(raised.value).split("\n")
+    assert len(messages) == len(error_lines)
+    for message, lineno in zip(messages, error_lines):
+        if lineno is None:
+            assert message == "Syntax error at end of input"
+        else:
+            assert message.startswith("Syntax error at token ") and f"lineno: {lineno})" in message
+    assert not os.path.exists(tmp_path / f"{name}.program.syntax.ndjson")
@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+from src.compiler import compile_
+from src.syntax_tree_cache import SyntaxTreeCache, TreeWriter
+
+LONG_INTEGER = 2 ** 70 + 3
+SOURCE = "\n".join([
+    "program big",
+    "var a : integer;",
+    "begin",
+    f"\ta := {LONG_INTEGER};",
+    "\ta := a + 1",
+    "end",
+])
+
+
+def compile_to(input_file_path: str, output_path: str, **kwargs) -> str:
+    os.makedirs(output_path, exist_ok=True)
+    compile_(input_file_path, output_path, **kwargs)
+    with open(os.path.join(output_path, "big.program.compiled.c")) as f:
+        return f.read()
+
+
+def cache_files(cache_directory: str) -> list:
+    return sorted(os.listdir(cache_directory))
+
+
+def test_long_integer_is_cached(write_source, tmp_path):
+    input_file_path = write_source("big.program", SOURCE)
+    cache_directory = str(tmp_path / "cache")
+    plain = compile_to(input_file_path, str(tmp_path / "plain"))
+    stored = compile_to(input_file_path, str(tmp_path / "stored"), cache_directory=cache_directory)
+    [file_name] = cache_files(cache_directory)
+    assert file_name.endswith(".ast")
+    loaded = compile_to(input_file_path, str(tmp_path / "loaded"), cache_directory=cache_directory)
+    assert str(LONG_INTEGER) in plain
+    assert stored == plain
+    assert loaded == plain
+    parse_result = SyntaxTreeCache(cache_directory).load(file_name[:-len(".ast")])
+    assert LONG_INTEGER in [token.attribute for token in parse_result.tokens]
+
+
+@pytest.mark.parametrize("corrupt", [
+    lambda data: data[:len(data) // 2],
+    lambda data: data[:-1],
+    lambda data: b"",
+    lambda data: data[:30] + b"\xff" * (len(data) - 30),
+], ids=["half", "last byte cut", "empty", "overwritten"])
+def test_corrupt_file_is_a_miss(write_source, tmp_path, corrupt):
+    input_file_path = write_source("big.program", SOURCE)
+    cache_directory = str(tmp_path / "cache")
+    plain = compile_to(input_file_path, str(tmp_path / "plain"))
+    compile_to(input_file_path, str(tmp_path / "stored"), cache_directory=cache_directory)
+    [file_name] = cache_files(cache_directory)
+    path = os.path.join(cache_directory, file_name)
+    with open(path, "rb") as f:
+        data = f.read()
+    with open(path, "wb") as f:
+        f.write(corrupt(data))
+    assert SyntaxTreeCache(cache_directory).load(file_name[:-len(".ast")]) is None
+    assert compile_to(input_file_path, str(tmp_path / "parsed"), cache_directory=cache_directory) == plain
+
+
+def test_failed_store_leaves_no_file(write_source, tmp_path, monkeypatch):
+    def fail(self, parse_result):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(TreeWriter, "dumps", fail)
+    input_file_path = write_source("big.program", SOURCE)
+    cache_directory = str(tmp_path / "cache")
+    with pytest.raises(OSError):
+        compile_to(input_file_path, str(tmp_path / "out"), cache_directory=cache_directory)
+    assert cache_files(cache_directory) == []